@@ -1,28 +1,48 @@
 """Pillar 6: FastAPI routes - strategy generation, backtest, top strategies."""
 from __future__ import annotations
 
+import asyncio
+import threading
+import time
 import uuid
+from dataclasses import asdict
 from datetime import datetime
-from typing import Any
+from typing import Any, Awaitable
 
 import pandas as pd
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
 from app.config import Settings
 from app.services.backtest_engine import BacktestEngine
+from app.services.cache import cache_key, get_shared_cache, strategy_hash
+from app.services.container import ServiceContainer, get_service_container
 from app.services.feature_engineering import TechnicalFeatures
 from app.services.market_data import MarketDataService
 from app.services.email_notifications import send_entry_signal, send_exit_signal
-from app.services.mlflow_tracking import StrategyTracker, get_top_strategies_from_mlflow
+from app.services.executors import SweepsBusy, run_cpu, run_io, sweep_slot
+from app.services.monte_carlo import run_monte_carlo
 from app.services.news_data import NewsService
+from app.services.optimizer import SEARCH_METHODS, TARGET_METRICS, StrategyOptimizer, check_strategy
+from app.services.portfolio_engine import PortfolioBacktestEngine
+from app.services.response_encoding import downsample_series, encode_response
+from app.services.rule_compiler import required_indicators, uses_sentiment
 from app.services.signal_check import check_entry_exit_signals
-from app.services.sentiment_analysis import FinancialSentimentAnalyzer
-from app.services.strategy_generator import StrategyGenerator
-from app.services.vector_db import StrategyKnowledgeBase
+from app.services.sentiment_history import NEUTRAL_SENTIMENT, bar_sentiment
+from app.services.signal_scanner import get_signal_scanner
+from app.services.streaming import ProgressStream, get_stream
+from app.services.walk_forward import WalkForwardAnalyzer
 
 router = APIRouter(prefix="/api/v1", tags=["trading"])
 
+# Upper bound on strategies per /backtest/batch call
+MAX_BATCH_STRATEGIES = 500
+# Upper bound on symbols per /backtest/portfolio call
+MAX_PORTFOLIO_SYMBOLS = 500
+# Upper bound on Monte Carlo paths per backtest
+MAX_MONTE_CARLO_SIMULATIONS = 100_000
+
 
 class StrategyGenerationRequest(BaseModel):
     symbol: str
@@ -30,6 +50,16 @@ class StrategyGenerationRequest(BaseModel):
     end_date: str
     risk_tolerance: str = "medium"
     market_conditions: dict[str, Any] | None = None
+    candidates: int = 1  # LLM candidates generated concurrently and ranked by a quick backtest
+    budget_s: float | None = None  # LLM latency budget (default and cap: LLM_BUDGET_S)
+
+
+class MonteCarloOptions(BaseModel):
+    simulations: int = 1000
+    method: str = "returns"  # returns | trades
+    block_size: int = 1
+    confidence: float = 0.95
+    seed: int | None = None
 
 
 class BacktestRequest(BaseModel):
@@ -38,6 +68,51 @@ class BacktestRequest(BaseModel):
     start_date: str
     end_date: str
     initial_capital: float = 100_000
+    sentiment_source: str = "news"  # news (daily history, if NEWS_API_KEY is set) | neutral
+    monte_carlo: MonteCarloOptions | None = None
+    max_points: int | None = None  # LTTB-downsample equity_curve to this many points (>= 3)
+
+
+class BatchBacktestRequest(BaseModel):
+    strategies: list[dict[str, Any]]
+    symbol: str
+    start_date: str
+    end_date: str
+    initial_capital: float = 100_000
+    sentiment_source: str = "news"
+
+
+class PortfolioBacktestRequest(BaseModel):
+    strategy: dict[str, Any]
+    symbols: list[str]
+    start_date: str
+    end_date: str
+    initial_capital: float = 100_000
+    max_points: int | None = None  # LTTB-downsample equity_curve and exposure (>= 3)
+
+
+class OptimizeRequest(BaseModel):
+    strategy: dict[str, Any]
+    symbol: str
+    start_date: str
+    end_date: str
+    target_metric: str = "sharpe_ratio"
+    method: str = "grid"  # grid | random
+    steps: int = 5
+    span: float = 0.5  # +/- fraction around each base value
+    max_candidates: int = 200
+    max_workers: int | None = None
+    time_budget_s: float | None = None
+    seed: int | None = None
+    initial_capital: float = 100_000
+
+
+class WalkForwardRequest(OptimizeRequest):
+    train_bars: int = 252
+    test_bars: int = 63
+    step_bars: int | None = None
+    anchored: bool = False
+    max_candidates: int = 50
 
 
 class SignalCheckRequest(BaseModel):
@@ -46,30 +121,34 @@ class SignalCheckRequest(BaseModel):
     emails: list[str] | None = None  # override default recipients
 
 
+class SignalSubscriptionRequest(BaseModel):
+    strategy: dict[str, Any]
+    symbols: list[str]
+    emails: list[str] | None = None  # override default recipients
+
+
 @router.post("/strategies/generate")
-async def generate_strategy(req: StrategyGenerationRequest) -> dict[str, Any]:
+async def generate_strategy(
+    req: StrategyGenerationRequest,
+    services: ServiceContainer = Depends(get_service_container),
+) -> dict[str, Any]:
     """Generate a trading strategy using data + RAG + optional LLM."""
-    settings = Settings()
+    settings = services.settings
     market_svc = MarketDataService()
-    raw = await market_svc.fetch_ohlcv(req.symbol, req.start_date, req.end_date)
-    if not raw["data"]:
+    news_svc = NewsService(settings)
+    # Market data and news are independent; fetch both at once
+    df, news = await asyncio.gather(
+        market_svc.fetch_ohlcv_frame(req.symbol, req.start_date, req.end_date),
+        news_svc.fetch_news(query=req.symbol, from_date=req.start_date, to_date=req.end_date),
+    )
+    if df.empty:
         raise HTTPException(status_code=400, detail="No market data for symbol/date range")
-    df = pd.DataFrame(raw["data"])
-    if "Date" in df.columns:
-        df = df.set_index("Date")
-    elif "date" in df.columns:
-        df = df.set_index("date")
-    df.index = pd.to_datetime(df.index)
     tech = TechnicalFeatures()
-    data_with_features = tech.calculate_all_features(df)
+    data_with_features = await run_cpu(tech.calculate_all_features, df)
 
-    news_svc = NewsService(settings)
-    news = await news_svc.fetch_news(query=req.symbol, from_date=req.start_date, to_date=req.end_date)
-    sentiment_analyzer = FinancialSentimentAnalyzer(use_finbert=False)
-    sentiment = sentiment_analyzer.aggregate_news_sentiment(news)
+    # FinBERT inference releases the GIL; keep it off the event loop
+    sentiment = await run_io(services.sentiment.aggregate_news_sentiment, news)
 
-    kb = StrategyKnowledgeBase(settings.chroma_persist_dir)
-    generator = StrategyGenerator(knowledge_base=kb, settings=settings)
     latest = data_with_features.iloc[-1]
     tech_indicators = {
         "rsi": latest.get("rsi"),
@@ -77,64 +156,316 @@ async def generate_strategy(req: StrategyGenerationRequest) -> dict[str, Any]:
         "bb_position": latest.get("price_position"),
         "volume_ratio": latest.get("volume_ratio"),
     }
-    strategy = generator.generate_strategy(
+
+    # The first access loads the embedding model if warm-up has not finished; keep that off the loop
+    generator = await run_io(lambda: services.generator)
+    budget_s = settings.llm_budget_s if req.budget_s is None else min(max(req.budget_s, 0.0), settings.llm_budget_s)
+    result = await generator.agenerate_strategy(
         market_data=data_with_features,
         sentiment_data=sentiment,
         technical_indicators=tech_indicators,
         risk_tolerance=req.risk_tolerance,
+        candidates=max(1, min(req.candidates, settings.llm_max_candidates)),
+        budget_s=budget_s,
     )
+    generation = asdict(result)
+    generation.pop("strategy")
     return {
         "strategy_id": str(uuid.uuid4()),
-        "strategy": strategy,
+        "strategy": result.strategy,
+        "generation": generation,
         "generation_timestamp": datetime.utcnow().isoformat() + "Z",
     }
 
 
-@router.post("/backtest/run")
-async def run_backtest(req: BacktestRequest) -> dict[str, Any]:
-    """Run backtest for a given strategy."""
+def _range_key(kind: str, symbol: str, start_date: str, end_date: str, *extra: Any) -> str:
+    start, end = pd.Timestamp(start_date).date(), pd.Timestamp(end_date).date()
+    return cache_key(kind, symbol.upper(), "1d", start, end, *extra)
+
+
+def _strategy_rules(*strategies: dict[str, Any]) -> list[str]:
+    return [r for s in strategies for r in (s.get("entry_rules") or []) + (s.get("exit_rules") or [])]
+
+
+async def _load_features(
+    symbol: str,
+    start_date: str,
+    end_date: str,
+    rules: list[str] | None = None,
+) -> pd.DataFrame:
+    """Fetch OHLCV for one symbol and compute technical features (shared-cached).
+
+    With ``rules``, only the indicator columns those rules read are computed
+    instead of the full default set.
+    """
+    indicators = required_indicators(rules) if rules is not None else None
+    cache = get_shared_cache()
+    variant = [] if indicators is None else [",".join(indicators)]
+    key = _range_key("features", symbol, start_date, end_date, *variant)
+    # Redis round trips block, so both tiers are read and written on the I/O pool
+    hit = await run_io(cache.get, key)
+    if isinstance(hit, pd.DataFrame):
+        return hit
     market_svc = MarketDataService()
-    raw = await market_svc.fetch_ohlcv(req.symbol, req.start_date, req.end_date)
-    if not raw["data"]:
+    df = await market_svc.fetch_ohlcv_frame(symbol, start_date, end_date)
+    if df.empty:
         raise HTTPException(status_code=400, detail="No market data")
-    df = pd.DataFrame(raw["data"])
-    if "Date" in df.columns:
-        df = df.set_index("Date")
-    elif "date" in df.columns:
-        df = df.set_index("date")
-    df.index = pd.to_datetime(df.index)
     tech = TechnicalFeatures()
-    data_with_features = tech.calculate_all_features(df)
-    sentiment_df = pd.DataFrame(
-        {"sentiment": [0.5] * len(data_with_features)},
-        index=data_with_features.index,
+    features = await run_cpu(tech.calculate_all_features, df, indicators)
+    await run_io(cache.set, key, features, cache.ttl_for(end_date))
+    return features
+
+
+def _sentiment_source(services: ServiceContainer, requested: str, rules: list[str]) -> str:
+    """``neutral`` unless news sentiment is requested, available and read by the rules."""
+    if requested not in ("news", "neutral"):
+        raise HTTPException(status_code=400, detail="sentiment_source must be 'news' or 'neutral'")
+    history = services.sentiment_history
+    if requested == "neutral" or not uses_sentiment(rules) or not history.available:
+        return "neutral"
+    return history.source
+
+
+async def _load_sentiment(
+    services: ServiceContainer,
+    source: str,
+    symbol: str,
+    start_date: str,
+    end_date: str,
+    bars: pd.DatetimeIndex,
+) -> pd.DataFrame:
+    if source == "neutral":
+        return pd.DataFrame({"sentiment": [NEUTRAL_SENTIMENT] * len(bars)}, index=bars)
+    daily = await services.sentiment_history.daily_sentiment(symbol, start_date, end_date)
+    return bar_sentiment(daily, bars)
+
+
+def _check_max_points(max_points: int | None) -> None:
+    if max_points is not None and max_points < 3:
+        raise HTTPException(status_code=400, detail="max_points must be at least 3")
+
+
+async def _encoded(request: Request, payload: dict[str, Any]) -> Response:
+    # Rendering and compressing a multi-megabyte curve is CPU work; keep it off the event loop
+    return await run_io(
+        encode_response,
+        payload,
+        accept=request.headers.get("accept", ""),
+        accept_encoding=request.headers.get("accept-encoding", ""),
+        min_size=Settings().response_compress_min_bytes,
     )
+
+
+async def _backtest(
+    req: BacktestRequest,
+    services: ServiceContainer,
+    stream: ProgressStream | None = None,
+) -> dict[str, Any]:
+    _check_max_points(req.max_points)
     engine = BacktestEngine(initial_capital=req.initial_capital)
-    results = engine.run_backtest(
-        strategy=req.strategy,
-        market_data=data_with_features,
-        sentiment_data=sentiment_df,
+    rules = _strategy_rules(req.strategy)
+    source = _sentiment_source(services, req.sentiment_source, rules)
+    cache = get_shared_cache()
+    key = _range_key(
+        "backtest", req.symbol, req.start_date, req.end_date,
+        strategy_hash(req.strategy), req.initial_capital, engine.commission, engine.slippage, source,
     )
-    settings = Settings()
-    tracker = StrategyTracker(tracking_uri=settings.mlflow_tracking_uri)
-    tracker.log_strategy(req.strategy, results)
+    results = await run_io(cache.get, key)
+    if not isinstance(results, dict):
+        if stream is not None:
+            stream.emit("progress", {"stage": "loading_data"})
+        data_with_features = await _load_features(req.symbol, req.start_date, req.end_date, rules)
+        sentiment_df = await _load_sentiment(
+            services, source, req.symbol, req.start_date, req.end_date, data_with_features.index
+        )
+        try:
+            if stream is None:
+                results = await run_cpu(
+                    engine.run_backtest,
+                    strategy=req.strategy,
+                    market_data=data_with_features,
+                    sentiment_data=sentiment_df,
+                )
+            else:
+                # Callbacks and the cancel event cannot cross into the process pool, so streamed runs use a thread
+                bars = len(data_with_features)
+                stream.emit("progress", {"stage": "simulating", "bars": bars})
+                results = await run_io(
+                    engine.run_backtest,
+                    strategy=req.strategy,
+                    market_data=data_with_features,
+                    sentiment_data=sentiment_df,
+                    on_chunk=lambda offset, values: stream.emit(
+                        "equity", {"offset": offset, "values": values, "progress": (offset + len(values)) / bars}
+                    ),
+                    chunk_bars=Settings().stream_chunk_bars,
+                    cancel_event=stream.cancel_event,
+                )
+        except ValueError as e:
+            # Malformed risk parameters (stop_loss, asset_allocation, ...)
+            raise HTTPException(status_code=400, detail=str(e))
+        await run_io(
+            cache.set,
+            key,
+            {k: results[k] for k in ("metrics", "equity_curve", "trades")},
+            cache.ttl_for(req.end_date),
+        )
+        # Logged once per computed run by a background worker; a slow or down MLflow never delays the
+        # response. On the I/O pool: the first call builds the queue, and a full queue appends to its journal.
+        params = {"symbol": req.symbol.upper(), "start_date": req.start_date, "end_date": req.end_date}
+        await run_io(lambda: services.mlflow_queue.enqueue(req.strategy, results, params))
+    response = {
+        "backtest_id": str(uuid.uuid4()),
+        "sentiment_source": source,
+        "metrics": results["metrics"],
+        "equity_curve": results["equity_curve"],
+        "trades": results["trades"],
+    }
+    if req.monte_carlo is not None:
+        if stream is not None:
+            stream.emit("progress", {"stage": "monte_carlo"})
+        mc = req.monte_carlo
+        try:
+            response["monte_carlo"] = await run_cpu(
+                run_monte_carlo,
+                results,
+                simulations=min(mc.simulations, MAX_MONTE_CARLO_SIMULATIONS),
+                method=mc.method,
+                block_size=mc.block_size,
+                confidence=mc.confidence,
+                seed=mc.seed,
+                initial_capital=req.initial_capital,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return downsample_series(response, ("equity_curve",), req.max_points)
+
+
+def _event_stream(stream: ProgressStream, job: Awaitable[Any]) -> StreamingResponse:
+    return StreamingResponse(
+        stream.events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Stream-Id": stream.stream_id},
+    )
+
+
+@router.post("/backtest/run")
+async def run_backtest(
+    req: BacktestRequest,
+    request: Request,
+    services: ServiceContainer = Depends(get_service_container),
+) -> Response:
+    """Run backtest for a given strategy.
+
+    ``max_points`` downsamples the returned equity curve; the response is
+    Arrow IPC when requested via ``Accept`` (see ``response_encoding``).
+    """
+    return await _encoded(request, await _backtest(req, services))
+
+
+@router.post("/backtest/run/stream")
+async def run_backtest_stream(
+    req: BacktestRequest,
+    services: ServiceContainer = Depends(get_service_container),
+) -> StreamingResponse:
+    """``/backtest/run`` as server-sent events: ``progress``, ``equity`` chunks, then ``result``.
+
+    Closing the connection (or ``DELETE /streams/{stream_id}``) stops the simulation.
+    """
+    _check_max_points(req.max_points)  # before the 200 and the event stream start
+    stream = ProgressStream()
+    return _event_stream(stream, _backtest(req, services, stream))
+
+
+@router.post("/backtest/batch")
+async def run_backtest_batch(
+    req: BatchBacktestRequest,
+    services: ServiceContainer = Depends(get_service_container),
+) -> dict[str, Any]:
+    """Run many strategies on one symbol; data is fetched and featurized once."""
+    if not req.strategies:
+        raise HTTPException(status_code=400, detail="No strategies")
+    if len(req.strategies) > MAX_BATCH_STRATEGIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_STRATEGIES} strategies per batch")
+    rules = _strategy_rules(*req.strategies)
+    source = _sentiment_source(services, req.sentiment_source, rules)
+    data_with_features = await _load_features(req.symbol, req.start_date, req.end_date, rules)
+    sentiment_df = await _load_sentiment(
+        services, source, req.symbol, req.start_date, req.end_date, data_with_features.index
+    )
+    engine = BacktestEngine(initial_capital=req.initial_capital)
+    results = await run_cpu(engine.run_batch, req.strategies, data_with_features, sentiment_df)
     return {
+        "batch_id": str(uuid.uuid4()),
+        "symbol": req.symbol,
+        "sentiment_source": source,
+        "results": [
+            {
+                "index": i,
+                "name": strategy.get("name", "Unnamed"),
+                "metrics": result.get("metrics"),
+                "error": result.get("error"),
+            }
+            for i, (strategy, result) in enumerate(zip(req.strategies, results))
+        ],
+    }
+
+
+@router.post("/backtest/portfolio")
+async def run_portfolio_backtest(req: PortfolioBacktestRequest, request: Request) -> Response:
+    """Run one strategy across many symbols with shared capital and position limits."""
+    _check_max_points(req.max_points)
+    symbols = list(dict.fromkeys(s.strip().upper() for s in req.symbols if s.strip()))
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No symbols")
+    if len(symbols) > MAX_PORTFOLIO_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PORTFOLIO_SYMBOLS} symbols per portfolio")
+    market_svc = MarketDataService()
+    panel = await market_svc.fetch_multiple_symbols(symbols, req.start_date, req.end_date)
+    if panel is None or panel.empty:
+        raise HTTPException(status_code=400, detail="No market data")
+    engine = PortfolioBacktestEngine(initial_capital=req.initial_capital)
+    try:
+        results = await run_cpu(engine.run_portfolio, req.strategy, panel)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response = {
         "backtest_id": str(uuid.uuid4()),
+        "symbols": results["symbols"],
         "metrics": results["metrics"],
         "equity_curve": results["equity_curve"],
+        "exposure": results["exposure"],
         "trades": results["trades"],
     }
+    return await _encoded(request, downsample_series(response, ("equity_curve", "exposure"), req.max_points))
 
 
 @router.get("/strategies/top")
-async def get_top_strategies(limit: int = 10, order_by: str = "sharpe_ratio") -> dict[str, Any]:
-    """Return top strategies from MLflow (runs logged from backtests)."""
-    settings = Settings()
-    strategies = get_top_strategies_from_mlflow(
-        tracking_uri=settings.mlflow_tracking_uri,
-        limit=min(limit, 50),
-        order_by_metric=order_by if order_by in ("sharpe_ratio", "total_return", "win_rate") else "sharpe_ratio",
-    )
+async def get_top_strategies(
+    limit: int = 10,
+    order_by: str = "sharpe_ratio",
+    symbol: str | None = None,
+    regime: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    services: ServiceContainer = Depends(get_service_container),
+) -> dict[str, Any]:
+    """Return top logged backtest runs from the local leaderboard (kept in sync with MLflow).
+
+    Optional filters: ``symbol``, market ``regime``, and logged date range ``since`` / ``until``.
+    """
+    try:
+        strategies = await run_io(
+            services.leaderboard.top,
+            limit=min(limit, 50),
+            order_by=order_by,
+            symbol=symbol,
+            regime=regime,
+            since=since,
+            until=until,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {"top_strategies": strategies}
 
 
@@ -152,9 +483,9 @@ async def check_signals_and_notify(req: SignalCheckRequest) -> dict[str, Any]:
     exit_email_sent = False
     if settings.smtp_host and settings.smtp_user and settings.smtp_password:
         if entry_matched:
-            entry_email_sent = send_entry_signal(strategy_name, req.symbol, to_emails=to_emails)
+            entry_email_sent = await run_io(send_entry_signal, strategy_name, req.symbol, to_emails=to_emails)
         if exit_matched:
-            exit_email_sent = send_exit_signal(strategy_name, req.symbol, to_emails=to_emails)
+            exit_email_sent = await run_io(send_exit_signal, strategy_name, req.symbol, to_emails=to_emails)
     return {
         "entry_matched": entry_matched,
         "exit_matched": exit_matched,
@@ -166,13 +497,203 @@ async def check_signals_and_notify(req: SignalCheckRequest) -> dict[str, Any]:
     }
 
 
+@router.post("/signals/subscriptions")
+async def create_signal_subscription(req: SignalSubscriptionRequest) -> dict[str, Any]:
+    """Watch a strategy on a list of symbols; the background scanner alerts on new entry/exit matches."""
+    try:
+        sub = get_signal_scanner().subscribe(req.strategy, req.symbols, req.emails)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"subscription_id": sub.subscription_id, "symbols": sub.symbols}
+
+
+@router.get("/signals/subscriptions")
+async def list_signal_subscriptions() -> dict[str, Any]:
+    return {
+        "subscriptions": [
+            {
+                "subscription_id": sub.subscription_id,
+                "name": sub.strategy.get("name", "Unnamed"),
+                "symbols": sub.symbols,
+            }
+            for sub in get_signal_scanner().subscriptions()
+        ]
+    }
+
+
+@router.delete("/signals/subscriptions/{subscription_id}")
+async def delete_signal_subscription(subscription_id: str) -> dict[str, Any]:
+    if not get_signal_scanner().unsubscribe(subscription_id):
+        raise HTTPException(status_code=404, detail="Subscription not found")
+    return {"deleted": subscription_id}
+
+
+@router.post("/signals/scan")
+async def run_signal_scan() -> dict[str, Any]:
+    """Run one scan cycle now and return its timing stats and new events."""
+    stats, events = await get_signal_scanner().scan_once()
+    return {"cycle": asdict(stats), "events": [asdict(e) for e in events]}
+
+
+@router.get("/signals/scanner")
+async def signal_scanner_status() -> dict[str, Any]:
+    """Scanner state, recent cycle timings and recent events."""
+    return get_signal_scanner().status()
+
+
+def _check_search(req: OptimizeRequest) -> None:
+    if req.target_metric not in TARGET_METRICS:
+        raise HTTPException(status_code=400, detail=f"target_metric must be one of {list(TARGET_METRICS)}")
+    if req.method not in SEARCH_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {list(SEARCH_METHODS)}")
+    try:
+        check_strategy(req.strategy)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _run_sweep(fn: Any, *args: Any, time_budget_s: float, **kwargs: Any) -> dict[str, Any]:
+    """Run an optimizer or walk-forward sweep on the I/O pool once a sweep slot is free.
+
+    Time spent waiting for the slot counts against ``time_budget_s``; 503 if
+    no slot frees up within it.
+    """
+    started = time.monotonic()
+    cancel_event = kwargs.setdefault("cancel_event", threading.Event())
+    try:
+        async with sweep_slot(time_budget_s):
+            remaining = max(0.0, time_budget_s - (time.monotonic() - started))
+            return await run_io(fn, *args, time_budget_s=remaining, **kwargs)
+    except SweepsBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except asyncio.CancelledError:
+        # Request went away: stop the sweep thread (and its workers) too
+        cancel_event.set()
+        raise
+
+
+def _search_limits(req: OptimizeRequest) -> tuple[int, int, float]:
+    """(max_workers, max_candidates, time_budget_s) from the request, clamped to the optimizer settings."""
+    settings = Settings()
+    max_workers = min(req.max_workers or settings.optimizer_max_workers, settings.optimizer_max_workers)
+    max_candidates = max(1, min(req.max_candidates, settings.optimizer_max_candidates))
+    time_budget_s = min(req.time_budget_s or settings.optimizer_time_budget_s, settings.optimizer_time_budget_s)
+    return max_workers, max_candidates, time_budget_s
+
+
+async def _optimize(req: OptimizeRequest, stream: ProgressStream | None = None) -> dict[str, Any]:
+    _check_search(req)
+    max_workers, max_candidates, time_budget_s = _search_limits(req)
+    data_with_features = await _load_features(
+        req.symbol, req.start_date, req.end_date, _strategy_rules(req.strategy)
+    )
+    optimizer = StrategyOptimizer(data_with_features, initial_capital=req.initial_capital, max_workers=max_workers)
+    hooks: dict[str, Any] = {}
+    if stream is not None:
+        hooks = {
+            "cancel_event": stream.cancel_event,
+            "on_result": lambda rows, evaluated, total: stream.emit(
+                "candidates", {"results": rows, "evaluated": evaluated, "total": total}
+            ),
+        }
+    try:
+        result = await _run_sweep(
+            optimizer.optimize,
+            req.strategy,
+            target_metric=req.target_metric,
+            method=req.method,
+            steps=max(2, min(req.steps, 11)),
+            span=req.span,
+            max_candidates=max_candidates,
+            time_budget_s=time_budget_s,
+            seed=req.seed,
+            **hooks,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"optimization_id": str(uuid.uuid4()), **result}
+
+
 @router.post("/optimize/strategy")
-async def optimize_strategy(strategy: dict[str, Any], target_metric: str = "sharpe_ratio") -> dict[str, Any]:
-    """Placeholder: optimize strategy parameters."""
-    return {"optimized_strategy": strategy, "target_metric": target_metric}
+async def optimize_strategy(req: OptimizeRequest) -> dict[str, Any]:
+    """Sweep rule thresholds and risk settings; return the best configuration by target_metric."""
+    return await _optimize(req)
+
+
+@router.post("/optimize/strategy/stream")
+async def optimize_strategy_stream(req: OptimizeRequest) -> StreamingResponse:
+    """``/optimize/strategy`` as server-sent events: ``candidates`` per finished chunk, then ``result``.
+
+    Cancelling (disconnect or ``DELETE /streams/{stream_id}``) stops dispatching
+    candidates and returns the best found so far with ``cancelled: true``.
+    """
+    _check_search(req)  # before the 200 and the event stream start
+    stream = ProgressStream()
+    return _event_stream(stream, _optimize(req, stream))
+
+
+@router.delete("/streams/{stream_id}")
+async def cancel_stream(stream_id: str) -> dict[str, Any]:
+    """Cancel a running stream on this worker (for clients whose proxy hides disconnects)."""
+    stream = get_stream(stream_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    stream.cancel()
+    return {"stream_id": stream_id, "cancelled": True}
+
+
+@router.post("/optimize/walk-forward")
+async def walk_forward(req: WalkForwardRequest) -> dict[str, Any]:
+    """Walk-forward analysis: optimize per train window, report stitched out-of-sample results."""
+    _check_search(req)
+    max_workers, max_candidates, time_budget_s = _search_limits(req)
+    data_with_features = await _load_features(
+        req.symbol, req.start_date, req.end_date, _strategy_rules(req.strategy)
+    )
+    analyzer = WalkForwardAnalyzer(data_with_features, initial_capital=req.initial_capital, max_workers=max_workers)
+    try:
+        result = await _run_sweep(
+            analyzer.run,
+            req.strategy,
+            train_bars=req.train_bars,
+            test_bars=req.test_bars,
+            step_bars=req.step_bars,
+            anchored=req.anchored,
+            target_metric=req.target_metric,
+            method=req.method,
+            steps=max(2, min(req.steps, 11)),
+            span=req.span,
+            max_candidates=max_candidates,
+            seed=req.seed,
+            time_budget_s=time_budget_s,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"walk_forward_id": str(uuid.uuid4()), **result}
+
+
+@router.get("/cache/stats")
+async def cache_stats(services: ServiceContainer = Depends(get_service_container)) -> dict[str, Any]:
+    """Hit/miss counters and sizes of the shared, embedding, retrieval and sentiment caches (for tuning)."""
+    return {"shared": dict(get_shared_cache().stats), **services.cache_stats()}
 
 
 @router.get("/health")
-async def health() -> dict[str, str]:
-    """Health check."""
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat() + "Z"}
+async def health(services: ServiceContainer = Depends(get_service_container)) -> dict[str, Any]:
+    """Liveness: the process is up. ``ready`` reports whether startup warm-up has finished."""
+    return {
+        "status": "healthy",
+        "ready": services.ready,
+        "services": services.status(),
+        "mlflow_queue": services.mlflow_queue_status(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+
+
+@router.get("/health/ready")
+async def readiness(services: ServiceContainer = Depends(get_service_container)) -> JSONResponse:
+    """Readiness: 503 until the knowledge base, LLM chain and tracker have been warmed up."""
+    return JSONResponse(
+        status_code=200 if services.ready else 503,
+        content={"ready": services.ready, "services": services.status()},
+    )
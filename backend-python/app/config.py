@@ -14,13 +14,77 @@ class Settings(BaseSettings):
     default_days_back: int = 365
     # External APIs (optional)
     news_api_key: Optional[str] = os.getenv("NEWS_API_KEY")
+    news_api_base_url: str = os.getenv("NEWS_API_BASE_URL", "https://newsapi.org/v2")  # point at a stub offline
+    news_max_concurrent_pages: int = int(os.getenv("NEWS_MAX_CONCURRENT_PAGES", "4"))
+    news_max_retries: int = int(os.getenv("NEWS_MAX_RETRIES", "3"))
+    news_backoff_s: float = float(os.getenv("NEWS_BACKOFF_S", "1.0"))
+    news_cache_ttl_s: float = float(os.getenv("NEWS_CACHE_TTL_S", "3600"))  # 0 disables the disk cache
+    news_cache_historical_ttl_s: float = float(os.getenv("NEWS_CACHE_HISTORICAL_TTL_S", "604800"))
     anthropic_api_key: Optional[str] = os.getenv("ANTHROPIC_API_KEY")
+    # Strategy generation: per-request LLM latency budget, max concurrent candidates, answer cache TTL
+    llm_budget_s: float = float(os.getenv("LLM_BUDGET_S", "30"))
+    llm_max_candidates: int = int(os.getenv("LLM_MAX_CANDIDATES", "5"))
+    llm_cache_ttl_s: float = float(os.getenv("LLM_CACHE_TTL_S", "3600"))
     # MLflow
     mlflow_tracking_uri: Optional[str] = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
+    # Backtest runs are logged by a background queue; failures spill to DATA_DIR/mlflow/journal.jsonl
+    mlflow_queue_size: int = int(os.getenv("MLFLOW_QUEUE_SIZE", "1000"))
+    mlflow_max_retries: int = int(os.getenv("MLFLOW_MAX_RETRIES", "3"))
+    mlflow_backoff_s: float = float(os.getenv("MLFLOW_BACKOFF_S", "1.0"))
+    # After a failed connect, the tracker is not rebuilt (set_experiment and its HTTP retries) for this long
+    mlflow_retry_after_s: float = float(os.getenv("MLFLOW_RETRY_AFTER_S", "30"))
+    # /strategies/top reads DATA_DIR/leaderboard.sqlite3, reconciled with MLflow this often
+    leaderboard_reconcile_s: float = float(os.getenv("LEADERBOARD_RECONCILE_S", "300"))
     # Redis (caching)
     redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    cache_ttl_s: float = float(os.getenv("CACHE_TTL_S", "86400"))
+    cache_live_ttl_s: float = float(os.getenv("CACHE_LIVE_TTL_S", "300"))  # ranges that reach today
+    cache_local_max_mb: float = float(os.getenv("CACHE_LOCAL_MAX_MB", "128"))
+    cache_max_item_mb: float = float(os.getenv("CACHE_MAX_ITEM_MB", "32"))
+    # Streaming endpoints send the equity curve in slices of this many bars
+    stream_chunk_bars: int = int(os.getenv("STREAM_CHUNK_BARS", "500"))
+    # Responses at least this large are compressed (zstd when accepted for backtests, else gzip)
+    response_compress_min_bytes: int = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+    # In-process memo of computed indicator series (per worker process)
+    feature_memo_max_mb: float = float(os.getenv("FEATURE_MEMO_MAX_MB", "256"))
     # Chroma
     chroma_persist_dir: str = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
+    # Local on-disk stores (OHLCV cache, ...)
+    data_dir: str = os.getenv("DATA_DIR", "./data")
+    # RAG caches: query/document embeddings (EMBEDDING_CACHE_DIR="" keeps them in memory only) and search results
+    embedding_cache_size: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+    embedding_cache_dir: str = os.getenv("EMBEDDING_CACHE_DIR", os.path.join(os.getenv("DATA_DIR", "./data"), "embeddings"))
+    retrieval_cache_size: int = int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))
+    retrieval_cache_ttl_s: float = float(os.getenv("RETRIEVAL_CACHE_TTL_S", "300"))
+
+    # News sentiment: FinBERT (needs transformers + torch) or the rule-based fallback
+    use_finbert: bool = os.getenv("USE_FINBERT", "false").lower() in ("true", "1", "yes")
+    finbert_max_batch_size: int = int(os.getenv("FINBERT_MAX_BATCH_SIZE", "32"))
+    finbert_max_batch_tokens: int = int(os.getenv("FINBERT_MAX_BATCH_TOKENS", "8192"))
+    finbert_num_threads: int = int(os.getenv("FINBERT_NUM_THREADS", "0"))  # 0 = torch default
+    sentiment_cache_size: int = int(os.getenv("SENTIMENT_CACHE_SIZE", "20000"))
+    sentiment_lexicon_path: str = os.getenv("SENTIMENT_LEXICON_PATH", "")  # JSON {"word or phrase": weight}
+    # Historical daily sentiment for backtests (news fetched per day, persisted under DATA_DIR/sentiment)
+    sentiment_fetch_concurrency: int = int(os.getenv("SENTIMENT_FETCH_CONCURRENCY", "8"))
+    sentiment_articles_per_day: int = int(os.getenv("SENTIMENT_ARTICLES_PER_DAY", "20"))
+
+    # Build the knowledge base, LLM chain and MLflow tracker at startup (/health/ready waits for it)
+    warm_up_services: bool = os.getenv("WARM_UP_SERVICES", "true").lower() in ("true", "1", "yes")
+
+    # Worker pools: CPU-bound stages run in processes, blocking I/O in threads (CPU_WORKERS=0 uses threads)
+    cpu_workers: int = int(os.getenv("CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+    io_workers: int = int(os.getenv("IO_WORKERS", "32"))
+
+    # Strategy optimizer (per-request caps so one sweep cannot take over a node, and a cap on concurrent sweeps)
+    optimizer_max_workers: int = int(os.getenv("OPTIMIZER_MAX_WORKERS", "4"))
+    optimizer_max_candidates: int = int(os.getenv("OPTIMIZER_MAX_CANDIDATES", "500"))
+    optimizer_time_budget_s: float = float(os.getenv("OPTIMIZER_TIME_BUDGET_S", "30"))
+    optimizer_max_sweeps: int = int(os.getenv("OPTIMIZER_MAX_SWEEPS", "2"))
+
+    # Background signal scanner (subscriptions are checked every interval)
+    signal_scanner_enabled: bool = os.getenv("SIGNAL_SCANNER_ENABLED", "false").lower() in ("true", "1", "yes")
+    signal_scan_interval_s: float = float(os.getenv("SIGNAL_SCAN_INTERVAL_S", "60"))
+    signal_scan_concurrency: int = int(os.getenv("SIGNAL_SCAN_CONCURRENCY", "32"))
 
     # Email notifications (optional; set for entry/exit alerts)
     smtp_host: Optional[str] = os.getenv("SMTP_HOST")
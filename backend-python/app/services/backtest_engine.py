@@ -1,13 +1,15 @@
 """Pillar 4: Backtesting engine."""
 from __future__ import annotations
 
-import re
+import threading
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Callable
 
 import numpy as np
 import pandas as pd
 
+from app.services.rule_compiler import evaluate_rule_row, rules_mask, rules_mask_matrix
+
 
 @dataclass
 class Trade:
@@ -32,18 +34,112 @@ class Trade:
         }
 
 
+ENGINE_MODES = ("array", "reference")
+
+
+def _position_params(strategy: dict[str, Any]) -> tuple[float, float | None, float | None]:
+    """Position size, stop-loss and take-profit from a strategy; falsy risk limits are disabled."""
+    alloc = strategy.get("asset_allocation", {}) or {}
+    if not isinstance(alloc, dict):
+        raise ValueError("asset_allocation must be an object")
+    try:
+        size = float(alloc.get("max_position_size", 0.2))
+        stop_loss = float(strategy["stop_loss"]) if strategy.get("stop_loss") else None
+        take_profit = float(strategy["take_profit"]) if strategy.get("take_profit") else None
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid strategy risk parameters: {e}") from e
+    return size, stop_loss, take_profit
+
+
+def _first_exit(
+    close: np.ndarray,
+    exit_signal: np.ndarray,
+    start: int,
+    entry_price: float,
+    stop_loss: float | None,
+    take_profit: float | None,
+) -> int | None:
+    """First bar at or after ``start`` where the open position exits, scanning in growing chunks."""
+    n = len(close)
+    chunk = 64
+    while start < n:
+        stop = min(n, start + chunk)
+        hit = exit_signal[start:stop].copy()
+        if stop_loss is not None or take_profit is not None:
+            pnl_pct = (close[start:stop] - entry_price) / entry_price
+            if stop_loss is not None:
+                hit |= pnl_pct <= -stop_loss
+            if take_profit is not None:
+                hit |= pnl_pct >= take_profit
+        if hit.any():
+            return start + int(np.argmax(hit))
+        start = stop
+        chunk *= 2
+    return None
+
+
+class BacktestCancelled(Exception):
+    """Raised inside a simulation when its ``cancel_event`` is set."""
+
+
+class _Checkpoints:
+    """Progress and cancellation hook for the simulation loops.
+
+    The loops only compare the bar index with ``next`` (infinity when no hook
+    is set); every ``every`` bars the finished slice of the equity curve is
+    handed to ``on_chunk(offset, values)`` and ``cancel_event`` is checked.
+    """
+
+    def __init__(
+        self,
+        every: int = 0,
+        on_chunk: Callable[[int, list[float]], None] | None = None,
+        cancel_event: threading.Event | None = None,
+    ) -> None:
+        active = every > 0 and (on_chunk is not None or cancel_event is not None)
+        self.every = every
+        self.on_chunk = on_chunk
+        self.cancel_event = cancel_event
+        self.next = every if active else float("inf")
+        self.sent = 0
+
+    def reached(self, i: int, equity: Any) -> None:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise BacktestCancelled()
+        self._send(i, equity)
+        self.next = i + self.every
+
+    def finish(self, equity: Any) -> None:
+        if self.next != float("inf"):
+            self._send(len(equity), equity)
+
+    def _send(self, i: int, equity: Any) -> None:
+        if self.on_chunk is not None and i > self.sent:
+            self.on_chunk(self.sent, [float(v) for v in equity[self.sent:i]])
+            self.sent = i
+
+
 class BacktestEngine:
-    """Vectorized-style backtest with slippage and commission."""
+    """Vectorized-style backtest with slippage and commission.
+
+    ``mode="array"`` runs the position state machine over plain NumPy arrays;
+    ``mode="reference"`` keeps the original per-bar ``iloc`` loop for comparison.
+    Both produce identical results.
+    """
 
     def __init__(
         self,
         initial_capital: float = 100_000,
         commission: float = 0.001,
         slippage: float = 0.0005,
+        mode: str = "array",
     ) -> None:
+        if mode not in ENGINE_MODES:
+            raise ValueError(f"Unknown engine mode {mode!r}; expected one of {ENGINE_MODES}")
         self.initial_capital = initial_capital
         self.commission = commission
         self.slippage = slippage
+        self.mode = mode
         self.trades: list[Trade] = []
         self.equity_curve: list[float] = []
 
@@ -52,9 +148,72 @@ class BacktestEngine:
         strategy: dict[str, Any],
         market_data: pd.DataFrame,
         sentiment_data: pd.DataFrame | None = None,
+        on_chunk: Callable[[int, list[float]], None] | None = None,
+        chunk_bars: int = 0,
+        cancel_event: threading.Event | None = None,
+    ) -> dict[str, Any]:
+        """Run backtest; market_data must have Close and indicators.
+
+        With ``chunk_bars``, finished equity-curve slices are passed to
+        ``on_chunk(offset, values)`` as the simulation advances, and setting
+        ``cancel_event`` stops it with ``BacktestCancelled``.
+        """
+        data = self._prepare_data(market_data, sentiment_data)
+        # Rules are compiled once and evaluated over whole columns, not per bar.
+        entry_signal = rules_mask(strategy.get("entry_rules", []), data)
+        exit_signal = rules_mask(strategy.get("exit_rules", []), data)
+        ticks = _Checkpoints(chunk_bars, on_chunk, cancel_event)
+        return self._simulate(strategy, data, entry_signal, exit_signal, ticks)
+
+    def run_batch(
+        self,
+        strategies: list[dict[str, Any]],
+        market_data: pd.DataFrame,
+        sentiment_data: pd.DataFrame | None = None,
+    ) -> list[dict[str, Any]]:
+        """Run many strategies against one shared feature frame.
+
+        Entry/exit masks for all strategies are built as (bars x strategies)
+        matrices in one pass; a strategy with invalid parameters gets an
+        ``error`` entry instead of failing the whole batch.
+        """
+        data = self._prepare_data(market_data, sentiment_data)
+        entry_matrix = rules_mask_matrix([s.get("entry_rules", []) for s in strategies], data)
+        exit_matrix = rules_mask_matrix([s.get("exit_rules", []) for s in strategies], data)
+        results: list[dict[str, Any]] = []
+        for k, strategy in enumerate(strategies):
+            try:
+                results.append(self._simulate(strategy, data, entry_matrix[:, k], exit_matrix[:, k]))
+            except ValueError as e:
+                results.append({"error": str(e), "strategy": strategy})
+        return results
+
+    def _simulate(
+        self,
+        strategy: dict[str, Any],
+        data: pd.DataFrame,
+        entry_signal: np.ndarray,
+        exit_signal: np.ndarray,
+        ticks: _Checkpoints | None = None,
     ) -> dict[str, Any]:
-        """Run backtest; market_data must have Close and indicators."""
         self.trades = []
+        ticks = ticks or _Checkpoints()
+        if self.mode == "reference":
+            equity = self._run_reference(strategy, data, entry_signal, exit_signal, ticks)
+        else:
+            equity = self._run_arrays(strategy, data, entry_signal, exit_signal, ticks)
+        ticks.finish(equity)
+        self.equity_curve = equity
+        metrics = self._calculate_metrics(equity, data)
+        return {
+            "metrics": metrics,
+            "trades": [t.to_dict() for t in self.trades],
+            "equity_curve": equity,
+            "strategy": strategy,
+        }
+
+    @staticmethod
+    def _prepare_data(market_data: pd.DataFrame, sentiment_data: pd.DataFrame | None) -> pd.DataFrame:
         data = market_data.copy()
         data.columns = [c.lower() for c in data.columns]
         if sentiment_data is not None and not sentiment_data.empty:
@@ -65,39 +224,114 @@ class BacktestEngine:
                 data["sentiment"] = data["sentiment"].ffill()
         if "sentiment" not in data.columns:
             data["sentiment"] = 0.5
-        data = data.dropna(subset=["close"])
+        return data.dropna(subset=["close"])
+
+    def _run_reference(
+        self,
+        strategy: dict[str, Any],
+        data: pd.DataFrame,
+        entry_signal: np.ndarray,
+        exit_signal: np.ndarray,
+        ticks: _Checkpoints,
+    ) -> list[float]:
+        """Original per-bar loop over pandas rows; kept as the reference implementation.
+
+        Risk parameters are validated up front as in array mode, so errors
+        inside the loop surface instead of silently skipping bars.
+        """
+        _position_params(strategy)
         capital = self.initial_capital
         position: dict[str, Any] | None = None
         equity = [capital]
-
         for i in range(1, len(data)):
+            if i >= ticks.next:
+                ticks.reached(i, equity)
             current = data.iloc[i]
             prev = data.iloc[i - 1]
-            try:
-                if position is None and self._check_entry(current, prev, strategy):
-                    position = self._enter_position(current, capital, strategy)
-                    capital -= position["cost"]
-                elif position is not None and self._check_exit(current, prev, strategy, position):
-                    trade = self._exit_position(current, position)
-                    self.trades.append(trade)
-                    capital += trade.pnl + position["cost"]
-                    position = None
-            except Exception:
-                pass
+            if position is None and entry_signal[i]:
+                position = self._enter_position(current, capital, strategy)
+                capital -= position["cost"]
+            elif position is not None and self._check_exit(
+                current, prev, strategy, position, rule_hit=bool(exit_signal[i])
+            ):
+                trade = self._exit_position(current, position)
+                self.trades.append(trade)
+                capital += trade.pnl + position["cost"]
+                position = None
             if position is not None:
                 unrealized = (current["close"] - position["entry_price"]) * position["shares"]
                 equity.append(capital + position["cost"] + unrealized)
             else:
                 equity.append(capital)
+        return equity
 
-        self.equity_curve = equity
-        metrics = self._calculate_metrics(equity, data)
-        return {
-            "metrics": metrics,
-            "trades": [t.to_dict() for t in self.trades],
-            "equity_curve": equity,
-            "strategy": strategy,
-        }
+    def _run_arrays(
+        self,
+        strategy: dict[str, Any],
+        data: pd.DataFrame,
+        entry_signal: np.ndarray,
+        exit_signal: np.ndarray,
+        ticks: _Checkpoints,
+    ) -> list[float]:
+        """Position state machine over contiguous arrays.
+
+        Flat stretches jump straight to the next entry bar and holding stretches
+        to the first stop-loss / take-profit / rule-exit bar, so Python work is
+        per trade rather than per bar. Arithmetic mirrors ``_run_reference``
+        operation for operation, so equity and trades are bit-identical.
+        """
+        size, stop_loss, take_profit = _position_params(strategy)
+        close = np.ascontiguousarray(data["close"].to_numpy(dtype=float))
+        n = len(close)
+        capital = float(self.initial_capital)
+        equity = np.empty(max(n, 1))
+        equity[0] = capital
+        entries = np.flatnonzero(entry_signal[1:]) + 1
+        exits = np.ascontiguousarray(exit_signal, dtype=bool)
+        fills: list[tuple[int, int, float, float, int, float, float]] = []
+        i = 1
+        while i < n:
+            if i >= ticks.next:
+                ticks.reached(i, equity)
+            k = int(np.searchsorted(entries, i))
+            if k == len(entries):
+                equity[i:] = capital
+                break
+            e = int(entries[k])
+            equity[i:e] = capital
+            entry_price = close[e] * (1 + self.slippage)
+            if entry_price <= 0:
+                # Reference path raised ZeroDivisionError here and stayed flat
+                equity[e] = capital
+                i = e + 1
+                continue
+            shares = int(capital * size / entry_price)
+            if shares <= 0:
+                shares = 1
+            cost = shares * entry_price * (1 + self.commission)
+            capital -= cost
+            held = capital + cost
+            j = _first_exit(close, exits, e + 1, entry_price, stop_loss, take_profit)
+            stop = n if j is None else j
+            equity[e:stop] = held + (close[e:stop] - entry_price) * shares
+            if j is None:
+                break
+            exit_price = close[j] * (1 - self.slippage)
+            net = shares * exit_price * (1 - self.commission)
+            pnl = net - cost
+            fills.append((e, j, float(entry_price), float(exit_price), shares, float(pnl), float(pnl / cost)))
+            capital += pnl + cost
+            equity[j] = capital
+            i = j + 1
+        if fills:
+            # Box index labels in two vectorized takes instead of once per trade
+            positions = np.array([(f[0], f[1]) for f in fills])
+            entry_dates = list(data.index[positions[:, 0]])
+            exit_dates = list(data.index[positions[:, 1]])
+            self.trades.extend(
+                Trade(entry_dates[t], exit_dates[t], *fill[2:]) for t, fill in enumerate(fills)
+            )
+        return equity.tolist()
 
     def _check_entry(self, current: pd.Series, prev: pd.Series, strategy: dict) -> bool:
         # Entry when ANY rule is true (OR logic) so multiple signals can trigger trades
@@ -109,7 +343,14 @@ class BacktestEngine:
                 return True
         return False
 
-    def _check_exit(self, current: pd.Series, prev: pd.Series, strategy: dict, position: dict) -> bool:
+    def _check_exit(
+        self,
+        current: pd.Series,
+        prev: pd.Series,
+        strategy: dict,
+        position: dict,
+        rule_hit: bool | None = None,
+    ) -> bool:
         if strategy.get("stop_loss"):
             pnl_pct = (current["close"] - position["entry_price"]) / position["entry_price"]
             if pnl_pct <= -float(strategy["stop_loss"]):
@@ -118,28 +359,16 @@ class BacktestEngine:
             pnl_pct = (current["close"] - position["entry_price"]) / position["entry_price"]
             if pnl_pct >= float(strategy["take_profit"]):
                 return True
+        if rule_hit is not None:
+            return rule_hit
         for rule in strategy.get("exit_rules", []):
             if self._evaluate_rule(rule, current, prev):
                 return True
         return False
 
     def _evaluate_rule(self, rule: str, current: pd.Series, prev: pd.Series) -> bool:
-        try:
-            r = rule.lower()
-            # Substitute indicator values; use safe defaults for NaN so eval doesn't break
-            for key in ["rsi", "macd", "macd_signal", "macd_diff", "sma_20", "sma_50", "bb_high", "bb_low", "volume_ratio"]:
-                if key in r and key in current:
-                    val = current[key]
-                    if pd.isna(val):
-                        val = 50.0 if key == "rsi" else 0.0  # skip entry on invalid data
-                    r = re.sub(rf"\b{key}\b", str(float(val)), r, flags=re.I)
-            if "sentiment_score" in r:
-                s = current.get("sentiment", 0.5)
-                s = 0.5 if pd.isna(s) else float(s)
-                r = r.replace("sentiment_score", str(s))
-            return bool(eval(r))
-        except Exception:
-            return False
+        # Compiled (and cached) expression tree; NaN indicators fall back to safe defaults
+        return evaluate_rule_row(rule, current)
 
     def _enter_position(self, current: pd.Series, capital: float, strategy: dict) -> dict:
         alloc = strategy.get("asset_allocation", {}) or {}
@@ -178,7 +407,9 @@ class BacktestEngine:
         returns = eq.pct_change().dropna()
         total_return = (equity[-1] / equity[0]) - 1 if equity[0] else 0
         years = max(len(data) / 252, 1 / 252)
-        annual_return = (1 + total_return) ** (1 / years) - 1
+        # Equity can end at or below zero (a forced one-share entry can overdraw cash); a negative
+        # base to a fractional power would be complex, and the whole stake is gone anyway
+        annual_return = (1 + total_return) ** (1 / years) - 1 if total_return > -1 else -1.0
         sharpe = (returns.mean() / returns.std() * np.sqrt(252)) if returns.std() and returns.std() > 0 else 0.0
         cummax = eq.cummax()
         drawdown = (eq - cummax) / cummax.replace(0, np.nan)
@@ -0,0 +1,223 @@
+"""Pillar 1: Shared cache tier for market data, features and backtest results (Redis + in-process LRU)."""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+
+from app.config import Settings
+
+_KEY_PREFIX = "sf:v1"
+_FRAME = b"F"
+_RECORD = b"R"
+# Descriptive strategy fields that never change a backtest, so they stay out of the hash
+_COSMETIC_FIELDS = ("name", "description")
+_IPC_OPTIONS = pa.ipc.IpcWriteOptions(compression="lz4")
+
+
+def cache_key(kind: str, *parts: Any) -> str:
+    """Namespaced key, e.g. ``sf:v1:ohlcv:AAPL:1d:2020-01-01:2021-01-01``."""
+    return ":".join([_KEY_PREFIX, kind, *(str(p) for p in parts)])
+
+
+def strategy_hash(strategy: dict[str, Any]) -> str:
+    """Stable hash of a strategy: key order and cosmetic fields do not matter."""
+    canonical = {k: v for k, v in strategy.items() if k not in _COSMETIC_FIELDS}
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def encode_value(value: pd.DataFrame | dict[str, Any]) -> bytes:
+    """LZ4-compressed Arrow IPC stream for a DataFrame (index kept) or a JSON-like dict."""
+    if isinstance(value, pd.DataFrame):
+        tag, table = _FRAME, pa.Table.from_pandas(value, preserve_index=True)
+    elif isinstance(value, dict):
+        # One-row table: lists become Arrow lists, nested dicts become structs
+        tag, table = _RECORD, pa.Table.from_pylist([value])
+    else:
+        raise TypeError(f"Cannot cache values of type {type(value).__name__}")
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema, options=_IPC_OPTIONS) as writer:
+        writer.write_table(table)
+    return tag + sink.getvalue().to_pybytes()
+
+
+def decode_value(blob: bytes) -> pd.DataFrame | dict[str, Any]:
+    """Inverse of encode_value."""
+    tag = blob[:1]
+    table = pa.ipc.open_stream(pa.py_buffer(memoryview(blob)[1:])).read_all()
+    if tag == _FRAME:
+        return table.to_pandas()
+    if tag == _RECORD:
+        return table.to_pylist()[0]
+    raise ValueError(f"Unknown cache payload tag {tag!r}")
+
+
+class LocalLRU:
+    """Thread-safe in-process LRU bounded by total payload bytes, with per-entry expiry."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                self._pop(key)
+                return None
+            self._items.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, blob: bytes, ttl_s: float) -> None:
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(key)
+            self._items[key] = (time.monotonic() + ttl_s, blob)
+            self.nbytes += len(blob)
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.nbytes -= len(evicted)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def _pop(self, key: str) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.nbytes -= len(item[1])
+
+
+class SharedCache:
+    """Two-level cache: a small in-process LRU in front of Redis shared by all replicas.
+
+    Values are stored as Arrow IPC bytes (see encode_value). Payloads larger
+    than ``max_item_bytes`` are not cached anywhere; Redis itself should run
+    with a ``maxmemory`` limit and an LRU eviction policy. When Redis errors
+    or times out it is skipped for ``retry_after_s`` and the in-process LRU
+    serves alone, so a Redis outage only costs hit rate.
+    """
+
+    def __init__(
+        self,
+        redis_url: str | None = None,
+        ttl_s: float = 86_400,
+        live_ttl_s: float = 300,
+        local_max_bytes: int = 128 * 1024 * 1024,
+        local_ttl_s: float = 300,
+        max_item_bytes: int = 32 * 1024 * 1024,
+        retry_after_s: float = 30.0,
+        socket_timeout_s: float = 0.25,
+    ) -> None:
+        self.ttl_s = ttl_s
+        self.live_ttl_s = live_ttl_s
+        self.local_ttl_s = local_ttl_s
+        self.max_item_bytes = max_item_bytes
+        self.retry_after_s = retry_after_s
+        self.local = LocalLRU(local_max_bytes)
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "redis_errors": 0, "oversize": 0}
+        self._redis = None
+        self._redis_down_until = 0.0
+        if redis_url:
+            try:
+                import redis
+
+                self._redis = redis.Redis.from_url(
+                    redis_url,
+                    socket_timeout=socket_timeout_s,
+                    socket_connect_timeout=socket_timeout_s,
+                )
+            except Exception:
+                self._redis = None
+
+    @property
+    def redis_available(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_down_until
+
+    def ttl_for(self, end_date: str | pd.Timestamp) -> float:
+        """Short TTL when the range reaches today (bars still changing), long TTL otherwise."""
+        today = pd.Timestamp.now(tz="UTC").tz_localize(None).normalize()
+        return self.live_ttl_s if pd.Timestamp(end_date) >= today else self.ttl_s
+
+    def get(self, key: str) -> Any | None:
+        blob = self.local.get(key)
+        if blob is not None:
+            self.stats["local_hits"] += 1
+        elif self.redis_available:
+            try:
+                blob = self._redis.get(key)
+            except Exception:
+                self._redis_failed()
+            if blob is not None:
+                self.stats["redis_hits"] += 1
+                self.local.set(key, blob, self.local_ttl_s)
+        if blob is None:
+            self.stats["misses"] += 1
+            return None
+        try:
+            return decode_value(blob)
+        except (pa.ArrowInvalid, ValueError):
+            self.delete(key)
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: pd.DataFrame | dict[str, Any], ttl_s: float | None = None) -> bool:
+        """Store a value in both tiers; False if it cannot be encoded or is too large."""
+        try:
+            blob = encode_value(value)
+        except (pa.ArrowException, TypeError, ValueError):
+            return False
+        if len(blob) > self.max_item_bytes:
+            self.stats["oversize"] += 1
+            return False
+        ttl = self.ttl_s if ttl_s is None else ttl_s
+        if self.redis_available:
+            try:
+                self._redis.set(key, blob, px=max(1, int(ttl * 1000)))
+            except Exception:
+                self._redis_failed()
+        # Local copies are short-lived while Redis holds the shared one
+        self.local.set(key, blob, min(ttl, self.local_ttl_s) if self.redis_available else ttl)
+        return True
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        if self.redis_available:
+            try:
+                self._redis.delete(key)
+            except Exception:
+                self._redis_failed()
+
+    def _redis_failed(self) -> None:
+        self.stats["redis_errors"] += 1
+        self._redis_down_until = time.monotonic() + self.retry_after_s
+
+
+@lru_cache(maxsize=1)
+def get_shared_cache() -> SharedCache:
+    """Process-wide cache built from Settings."""
+    settings = Settings()
+    mb = 1024 * 1024
+    return SharedCache(
+        redis_url=settings.redis_url or None,
+        ttl_s=settings.cache_ttl_s,
+        live_ttl_s=settings.cache_live_ttl_s,
+        local_max_bytes=int(settings.cache_local_max_mb * mb),
+        max_item_bytes=int(settings.cache_max_item_mb * mb),
+    )
@@ -0,0 +1,196 @@
+"""Application-lifetime services: heavy objects built once per worker and shared by routes."""
+from __future__ import annotations
+
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable
+
+from app.config import Settings
+from app.services.embedding_cache import EmbeddingCache, RetrievalCache
+from app.services.leaderboard import StrategyLeaderboard
+from app.services.mlflow_tracking import MlflowLogQueue, StrategyTracker
+from app.services.sentiment_analysis import FinancialSentimentAnalyzer, LexiconScorer
+from app.services.sentiment_history import SentimentHistoryService
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+# Built lazily on first access, and in this order by warm_up
+SERVICES = (
+    "knowledge_base", "generator", "tracker", "leaderboard", "mlflow_queue", "sentiment", "sentiment_history",
+)
+
+
+class ServiceContainer:
+    """Knowledge base, strategy generator, MLflow tracker and sentiment services.
+
+    Each service is built on first use (or by ``warm_up`` at startup) and then
+    reused, so requests stop paying for loading the embedding model, reopening
+    Chroma, rebuilding the LLM chain or calling ``mlflow.set_experiment``.
+    Builds are guarded by a per-service lock; a failed build is recorded in
+    ``status`` and retried on the next access, or, for services built with a
+    ``retry_after_s`` cooldown, on the first access after it.
+    """
+
+    def __init__(self, settings: Settings | None = None) -> None:
+        self.settings = settings or Settings()
+        self._services: dict[str, Any] = {}
+        self._status: dict[str, dict[str, Any]] = {name: {"state": PENDING} for name in SERVICES}
+        self._locks = {name: threading.Lock() for name in self._status}
+        # monotonic time before which a failed build is not retried
+        self._retry_at: dict[str, float] = {}
+        self.warmed_up = False
+
+    def _get(self, name: str, build: Callable[[], Any], retry_after_s: float = 0.0) -> Any:
+        service = self._services.get(name)
+        if service is not None:
+            return service
+        self._check_cooldown(name)
+        with self._locks[name]:
+            service = self._services.get(name)
+            if service is not None:
+                return service
+            # Another thread may have failed the build while this one waited for the lock
+            self._check_cooldown(name)
+            self._status[name] = {"state": LOADING}
+            t0 = time.perf_counter()
+            try:
+                service = build()
+            except Exception as e:
+                self._status[name] = {"state": FAILED, "error": str(e)}
+                if retry_after_s > 0:
+                    self._retry_at[name] = time.monotonic() + retry_after_s
+                raise
+            self._services[name] = service
+            self._status[name] = {"state": READY, "load_s": round(time.perf_counter() - t0, 3)}
+            return service
+
+    def _check_cooldown(self, name: str) -> None:
+        if time.monotonic() < self._retry_at.get(name, 0.0):
+            raise RuntimeError(f"{name} unavailable: {self._status[name].get('error', 'build failed')}")
+
+    @property
+    def knowledge_base(self):
+        def _build():
+            # Imported here: loads LangChain, Chroma and sentence-transformers
+            from app.services.vector_db import StrategyKnowledgeBase
+
+            s = self.settings
+            return StrategyKnowledgeBase(
+                s.chroma_persist_dir,
+                embedding_cache=EmbeddingCache(s.embedding_cache_size, s.embedding_cache_dir or None),
+                retrieval_cache=RetrievalCache(s.retrieval_cache_size, s.retrieval_cache_ttl_s),
+            )
+
+        return self._get("knowledge_base", _build)
+
+    @property
+    def generator(self):
+        def _build():
+            from app.services.strategy_generator import StrategyGenerator
+
+            return StrategyGenerator(knowledge_base=self.knowledge_base, settings=self.settings)
+
+        return self._get("generator", _build)
+
+    @property
+    def tracker(self) -> StrategyTracker:
+        def _build():
+            tracker = StrategyTracker(tracking_uri=self.settings.mlflow_tracking_uri)
+            if not tracker.active:
+                # Not cached, so a request after the cooldown retries once MLflow is reachable
+                raise RuntimeError("MLflow unavailable")
+            return tracker
+
+        return self._get("tracker", _build, retry_after_s=self.settings.mlflow_retry_after_s)
+
+    @property
+    def leaderboard(self) -> StrategyLeaderboard:
+        s = self.settings
+        return self._get("leaderboard", lambda: StrategyLeaderboard(
+            Path(s.data_dir) / "leaderboard.sqlite3", reconcile_interval_s=s.leaderboard_reconcile_s
+        ))
+
+    @property
+    def mlflow_queue(self) -> MlflowLogQueue:
+        s = self.settings
+
+        def _build():
+            leaderboard = self.leaderboard
+            mlflow_queue = MlflowLogQueue(
+                lambda: self.tracker,
+                Path(s.data_dir) / "mlflow" / "journal.jsonl",
+                max_queue=s.mlflow_queue_size,
+                max_retries=s.mlflow_max_retries,
+                backoff_s=s.mlflow_backoff_s,
+                on_logged=leaderboard.record,
+                idle_tasks=[lambda: leaderboard.reconcile_if_due(lambda since: self.tracker.recent_runs(since))],
+            )
+            mlflow_queue.start()
+            return mlflow_queue
+
+        return self._get("mlflow_queue", _build)
+
+    @property
+    def sentiment(self) -> FinancialSentimentAnalyzer:
+        s = self.settings
+        return self._get("sentiment", lambda: FinancialSentimentAnalyzer(
+            use_finbert=s.use_finbert,
+            max_batch_size=s.finbert_max_batch_size,
+            max_batch_tokens=s.finbert_max_batch_tokens,
+            num_threads=s.finbert_num_threads or None,
+            cache_size=s.sentiment_cache_size,
+            lexicon=LexiconScorer.from_file(s.sentiment_lexicon_path) if s.sentiment_lexicon_path else None,
+        ))
+
+    @property
+    def sentiment_history(self) -> SentimentHistoryService:
+        return self._get("sentiment_history", lambda: SentimentHistoryService(self.sentiment, settings=self.settings))
+
+    def warm_up(self) -> dict[str, dict[str, Any]]:
+        """Build every service now (blocking); failures are recorded, not raised."""
+        for name in self._status:
+            try:
+                getattr(self, name)
+            except Exception:
+                pass
+        self.warmed_up = True
+        return self.status()
+
+    @property
+    def ready(self) -> bool:
+        """True once warm-up has finished, or when it is disabled (services then load on demand)."""
+        return self.warmed_up or not self.settings.warm_up_services
+
+    def status(self) -> dict[str, dict[str, Any]]:
+        return {name: dict(s) for name, s in self._status.items()}
+
+    def cache_stats(self) -> dict[str, Any]:
+        """RAG and sentiment cache counters, for the services built so far."""
+        kb = self._services.get("knowledge_base")
+        stats = kb.cache_stats() if kb is not None else {}
+        sentiment = self._services.get("sentiment")
+        if sentiment is not None:
+            stats["sentiment"] = sentiment.cache.info()
+        return stats
+
+    def mlflow_queue_status(self) -> dict[str, Any] | None:
+        """MLflow log queue counters, or None if the queue has not been built (never builds it)."""
+        mlflow_queue = self._services.get("mlflow_queue")
+        return mlflow_queue.status() if mlflow_queue is not None else None
+
+    def close(self) -> None:
+        mlflow_queue = self._services.get("mlflow_queue")
+        if mlflow_queue is not None:
+            mlflow_queue.stop()
+        self._services.clear()
+
+
+@lru_cache(maxsize=1)
+def get_service_container() -> ServiceContainer:
+    """Process-wide container; use as a FastAPI dependency."""
+    return ServiceContainer()
@@ -0,0 +1,214 @@
+"""Pillar 3: Embedding and retrieval caches for the RAG knowledge base."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and lowercase (MiniLM's tokenizer is uncased, so the embedding is unchanged)."""
+    return " ".join((text or "").split()).lower()
+
+
+def text_key(text: str, model_name: str = "") -> str:
+    return hashlib.blake2b(f"{model_name}\0{normalize_text(text)}".encode(), digest_size=16).hexdigest()
+
+
+class EmbeddingCache:
+    """LRU of text embeddings keyed by normalized-text hash, optionally persisted to disk.
+
+    With ``persist_dir`` each vector is also written as a small ``.npy`` file
+    (temp file plus atomic rename), so embeddings survive restarts and are
+    shared by workers on the same volume.
+    """
+
+    def __init__(self, max_entries: int = 4096, persist_dir: str | Path | None = None) -> None:
+        self.max_entries = max_entries
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        if self.persist_dir is not None:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self._items: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _path(self, key: str) -> Path:
+        return self.persist_dir / f"{key}.npy"
+
+    def get(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            vector = self._items.get(key)
+            if vector is not None:
+                self._items.move_to_end(key)
+                self.stats["hits"] += 1
+                return vector
+        if self.persist_dir is not None:
+            try:
+                vector = np.load(self._path(key))
+            except (OSError, ValueError):
+                vector = None
+            if vector is not None:
+                self.stats["disk_hits"] += 1
+                self._remember(key, vector)
+                return vector
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        vector = np.asarray(vector, dtype=np.float32)
+        self._remember(key, vector)
+        if self.persist_dir is not None:
+            fd, tmp = tempfile.mkstemp(dir=self.persist_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as sink:
+                    np.save(sink, vector)
+                os.replace(tmp, self._path(key))
+            except OSError:
+                Path(tmp).unlink(missing_ok=True)
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._items[key] = vector
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def info(self) -> dict[str, Any]:
+        return {**self.stats, "size": len(self), "max_entries": self.max_entries, "persistent": self.persist_dir is not None}
+
+
+class CachedEmbeddings:
+    """LangChain embeddings wrapper (``embed_documents`` / ``embed_query``) backed by an EmbeddingCache."""
+
+    def __init__(self, base: Any, cache: EmbeddingCache, model_name: str = "") -> None:
+        self.base = base
+        self.cache = cache
+        self.model_name = model_name
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [text_key(t, self.model_name) for t in texts]
+        vectors: list[np.ndarray | None] = [self.cache.get(k) for k in keys]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            # One batched model call for every text not cached yet
+            computed = self.base.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = np.asarray(vector, dtype=np.float32)
+                self.cache.put(keys[i], vectors[i])
+        return [v.tolist() for v in vectors]
+
+    def embed_query(self, text: str) -> list[float]:
+        key = text_key(text, self.model_name)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = np.asarray(self.base.embed_query(text), dtype=np.float32)
+            self.cache.put(key, vector)
+        return vector.tolist()
+
+
+class RetrievalCache:
+    """Similarity-search results keyed by (embedding bucket, k, metadata filter).
+
+    The bucket is a random-hyperplane hash of the query embedding, so nearly
+    identical contexts land in the same bucket; a hit also requires the cached
+    query to be within ``min_similarity`` cosine of the new one. ``invalidate``
+    drops everything (call it after writing to the collection); ``ttl_s``
+    bounds staleness from writes made by other workers.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_s: float = 300.0,
+        bucket_bits: int = 16,
+        min_similarity: float = 0.995,
+        seed: int = 0,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.bucket_bits = bucket_bits
+        self.min_similarity = min_similarity
+        self.seed = seed
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self.generation = 0
+        self._planes: np.ndarray | None = None
+        self._items: OrderedDict[tuple, tuple[float, np.ndarray, list[dict[str, Any]]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def bucket(self, embedding: np.ndarray) -> int:
+        if self._planes is None or self._planes.shape[1] != embedding.shape[0]:
+            rng = np.random.default_rng(self.seed)
+            self._planes = rng.standard_normal((self.bucket_bits, embedding.shape[0]))
+        bits = (self._planes @ embedding) > 0
+        return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+    @staticmethod
+    def _key(bucket: int, k: int, metadata_filter: dict[str, Any] | None) -> tuple:
+        # Chroma filters can nest ($and / $or), so key on their canonical JSON
+        return bucket, k, json.dumps(metadata_filter or {}, sort_keys=True, default=str)
+
+    def get(
+        self,
+        embedding: list[float] | np.ndarray,
+        k: int,
+        metadata_filter: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]] | None:
+        query = _unit(embedding)
+        key = self._key(self.bucket(query), k, metadata_filter)
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] > time.monotonic() and float(item[1] @ query) >= self.min_similarity:
+                self._items.move_to_end(key)
+                self.stats["hits"] += 1
+                return list(item[2])
+            self.stats["misses"] += 1
+            return None
+
+    def put(
+        self,
+        embedding: list[float] | np.ndarray,
+        k: int,
+        metadata_filter: dict[str, Any] | None,
+        results: list[dict[str, Any]],
+        generation: int | None = None,
+    ) -> None:
+        """Store results; pass the ``generation`` read before searching so a search that
+        raced with an invalidation is not cached."""
+        query = _unit(embedding)
+        key = self._key(self.bucket(query), k, metadata_filter)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._items[key] = (time.monotonic() + self.ttl_s, query, results)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.generation += 1
+            self.stats["invalidations"] += 1
+
+    def info(self) -> dict[str, Any]:
+        return {**self.stats, "size": len(self), "max_entries": self.max_entries}
+
+
+def _unit(vector: list[float] | np.ndarray) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float64)
+    norm = np.linalg.norm(v)
+    return v / norm if norm > 0 else v
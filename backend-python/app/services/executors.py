@@ -0,0 +1,117 @@
+"""Shared worker pools so route handlers never block the event loop.
+
+CPU-bound stages (feature computation, backtests, sentiment scoring) go to a
+process pool; blocking I/O (yfinance, Chroma, LLM calls, MLflow, SMTP) goes to
+a thread pool. Sizes come from Settings (CPU_WORKERS, IO_WORKERS). Parameter
+sweeps get their own short-lived pools (``sweep_pool``), at most
+OPTIMIZER_MAX_SWEEPS at a time (``sweep_slot``).
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from functools import partial
+from multiprocessing.pool import Pool
+from typing import Any, AsyncIterator, Callable, Iterator, TypeVar
+
+from app.config import Settings
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_pools: dict[str, Executor] = {}
+# (loop, semaphore): asyncio primitives belong to one event loop
+_sweeps: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+
+
+def _io_pool(settings: Settings) -> Executor:
+    # Caller holds _lock
+    pool = _pools.get("io")
+    if pool is None:
+        pool = _pools["io"] = ThreadPoolExecutor(max_workers=max(1, settings.io_workers), thread_name_prefix="io")
+    return pool
+
+
+def _pool(kind: str) -> Executor:
+    with _lock:
+        pool = _pools.get(kind)
+        if pool is None:
+            settings = Settings()
+            if kind == "cpu" and settings.cpu_workers > 0:
+                # spawn: forking a process that already runs threads can copy held locks
+                pool = ProcessPoolExecutor(
+                    max_workers=min(settings.cpu_workers, os.cpu_count() or 1),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                # CPU_WORKERS=0 runs CPU stages on the I/O threads (tests, single-core dev boxes)
+                pool = _io_pool(settings)
+            _pools[kind] = pool
+        return pool
+
+
+async def run_cpu(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a picklable, module-level callable in the process pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_pool("cpu"), partial(fn, *args, **kwargs))
+
+
+async def run_io(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking call in the I/O thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_pool("io"), partial(fn, *args, **kwargs))
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Stop both pools (application shutdown); they are recreated on next use."""
+    with _lock:
+        pools = list(dict.fromkeys(_pools.values()))
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def _sweep_slots() -> asyncio.Semaphore:
+    global _sweeps
+    loop = asyncio.get_running_loop()
+    if _sweeps is None or _sweeps[0] is not loop:
+        _sweeps = (loop, asyncio.Semaphore(max(1, Settings().optimizer_max_sweeps)))
+    return _sweeps[1]
+
+
+class SweepsBusy(RuntimeError):
+    """No sweep slot became free in time."""
+
+
+@asynccontextmanager
+async def sweep_slot(timeout_s: float) -> AsyncIterator[None]:
+    """Hold one of OPTIMIZER_MAX_SWEEPS slots; SweepsBusy if none frees up within ``timeout_s``."""
+    slots = _sweep_slots()
+    try:
+        await asyncio.wait_for(slots.acquire(), max(0.0, timeout_s))
+    except TimeoutError:
+        raise SweepsBusy(f"No optimizer slot free within {timeout_s:.1f}s") from None
+    try:
+        yield
+    finally:
+        slots.release()
+
+
+@contextmanager
+def sweep_pool(processes: int, initializer: Callable[..., None], initargs: tuple) -> Iterator[Pool]:
+    """A spawn-context process pool for one sweep, terminated on exit.
+
+    Terminating (rather than shutting down) kills chunks that are still
+    running, so a sweep that runs out of budget or is cancelled stops using
+    CPU immediately.
+    """
+    pool = multiprocessing.get_context("spawn").Pool(processes, initializer, initargs)
+    try:
+        yield pool
+    finally:
+        pool.terminate()
+        pool.join()
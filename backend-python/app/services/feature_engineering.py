@@ -1,25 +1,193 @@
 """Pillar 2: Technical feature extraction."""
 from __future__ import annotations
 
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable
+
 import numpy as np
 import pandas as pd
 from ta.momentum import RSIIndicator
 from ta.trend import MACD, SMAIndicator
 from ta.volatility import BollingerBands
 
+from app.config import Settings
+
+_Resolver = Callable[[str], pd.Series]
+
+
+def _rsi(get: _Resolver, window: int) -> pd.Series:
+    # Wilder smoothing, as ta.momentum.RSIIndicator
+    diff = get("close").diff(1)
+    ema_up = diff.where(diff > 0, 0.0).ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    ema_down = (-diff.where(diff < 0, 0.0)).ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    return (100 - (100 / (1 + ema_up / ema_down))).mask(ema_down == 0, 100.0)
+
+
+def _ema(get: _Resolver, window: int) -> pd.Series:
+    return get("close").ewm(span=window, min_periods=window, adjust=False).mean()
+
+
+def _sma(get: _Resolver, window: int) -> pd.Series:
+    return get("close").rolling(window=window, min_periods=window).mean()
+
+
+def _ratio(num: pd.Series, den: pd.Series) -> pd.Series:
+    return num / den.replace(0, np.nan)
+
+
+# Indicators usable as <family>_<window> (rsi_7, sma_200, ema_50); bare "rsi" is rsi_14.
+WINDOWED_INDICATORS: dict[str, Callable[[_Resolver, int], pd.Series]] = {
+    "rsi": _rsi,
+    "sma": _sma,
+    "ema": _ema,
+}
+_DEFAULT_WINDOWS = {"rsi": 14}
+_MAX_WINDOW = 1000
+_WINDOWED_RE = re.compile(r"(%s)_(\d+)" % "|".join(WINDOWED_INDICATORS))
+
+# Fixed-name columns of calculate_all_features. Each one pulls what it needs
+# through ``get``, so dependencies are computed on demand and shared.
+_INDICATORS: dict[str, Callable[[_Resolver], pd.Series]] = {
+    "returns": lambda get: get("close").pct_change(),
+    "log_returns": lambda get: np.log(get("close") / get("close").shift(1)),
+    "macd": lambda get: get("ema_12") - get("ema_26"),
+    "macd_signal": lambda get: get("macd").ewm(span=9, min_periods=9, adjust=False).mean(),
+    "macd_diff": lambda get: get("macd") - get("macd_signal"),
+    "_bb_std": lambda get: get("close").rolling(window=20, min_periods=20).std(ddof=0),
+    "bb_mid": lambda get: get("sma_20"),
+    "bb_high": lambda get: get("sma_20") + 2 * get("_bb_std"),
+    "bb_low": lambda get: get("sma_20") - 2 * get("_bb_std"),
+    "bb_width": lambda get: get("bb_high") - get("bb_low"),
+    "volume_sma": lambda get: get("volume").rolling(window=20).mean(),
+    "volume_ratio": lambda get: _ratio(get("volume"), get("volume_sma")),
+    "price_position": lambda get: _ratio(get("close") - get("bb_low"), get("bb_width")),
+}
+
+
+def parse_indicator(name: str) -> tuple[str, int | None] | None:
+    """(indicator, window) for a feature column name, or None if it is not one we compute."""
+    if name in _INDICATORS and not name.startswith("_"):
+        return name, None
+    if name in _DEFAULT_WINDOWS:
+        return name, _DEFAULT_WINDOWS[name]
+    match = _WINDOWED_RE.fullmatch(name)
+    if match and 1 <= int(match.group(2)) <= _MAX_WINDOW:
+        return match.group(1), int(match.group(2))
+    return None
+
+
+class _IndicatorMemo:
+    """LRU of computed indicator series keyed by (data fingerprint, indicator, window), bounded in bytes.
+
+    Only the values are counted; a series shares its index with the frame it
+    was computed from. A series larger than the whole budget is not kept.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20) -> None:
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items: OrderedDict[tuple, pd.Series] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> pd.Series | None:
+        with self._lock:
+            series = self._items.get(key)
+            if series is not None:
+                self._items.move_to_end(key)
+            return series
+
+    def put(self, key: tuple, series: pd.Series) -> None:
+        size = series.to_numpy().nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old.to_numpy().nbytes
+            self._items[key] = series
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.bytes -= evicted.to_numpy().nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+
+_MEMO = _IndicatorMemo(int(Settings().feature_memo_max_mb * 2**20))
+
+
+def _fingerprint(close: pd.Series, volume: pd.Series) -> str:
+    hashed = pd.util.hash_pandas_object(pd.DataFrame({"close": close, "volume": volume}), index=True)
+    return hashlib.blake2b(hashed.to_numpy().tobytes(), digest_size=16).hexdigest()
+
 
 class TechnicalFeatures:
     """Compute technical indicators for strategy and backtest."""
 
     @staticmethod
-    def calculate_all_features(df: pd.DataFrame) -> pd.DataFrame:
-        """Calculate technical indicators. Expects columns: Open, High, Low, Close, Volume (case-insensitive)."""
-        df = df.copy()
-        # Normalize column names
-        col_map = {c: c.lower() for c in df.columns}
-        df = df.rename(columns=col_map)
+    def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+        df = df.rename(columns={c: c.lower() for c in df.columns})
         if "close" not in df.columns:
             raise ValueError("DataFrame must contain 'Close' column")
+        return df
+
+    @staticmethod
+    def calculate_features(df: pd.DataFrame, indicators: Iterable[str]) -> pd.DataFrame:
+        """Add only the named indicator columns, computing their dependencies on demand.
+
+        Names are calculate_all_features columns or windowed variants such as
+        ``rsi_7`` and ``sma_200``. Columns already in ``df`` are kept as-is.
+        Every computed series is memoized per (data fingerprint, indicator,
+        window), so repeat calls on the same bars are lookups.
+        """
+        df = TechnicalFeatures._normalize(df)
+        wanted = [n for n in dict.fromkeys(indicators) if n not in df.columns]
+        unknown = [n for n in wanted if parse_indicator(n) is None]
+        if unknown:
+            raise ValueError(f"Unknown indicators: {unknown}")
+        if not wanted:
+            return df
+        close = df["close"]
+        volume = df["volume"] if "volume" in df.columns else pd.Series(1.0, index=df.index)
+        fingerprint = _fingerprint(close, volume)
+        resolved: dict[str, pd.Series] = {"close": close, "volume": volume}
+
+        def get(name: str) -> pd.Series:
+            series = resolved.get(name)
+            if series is None:
+                indicator, window = parse_indicator(name) or (name, None)
+                key = (fingerprint, indicator, window)
+                series = _MEMO.get(key)
+                if series is None:
+                    if window is None:
+                        series = _INDICATORS[indicator](get)
+                    else:
+                        series = WINDOWED_INDICATORS[indicator](get, window)
+                    _MEMO.put(key, series)
+                resolved[name] = series
+            return series
+
+        new = {name: get(name).to_numpy(copy=True) for name in wanted}
+        return pd.concat([df, pd.DataFrame(new, index=df.index)], axis=1)
+
+    @staticmethod
+    def calculate_all_features(df: pd.DataFrame, indicators: Iterable[str] | None = None) -> pd.DataFrame:
+        """Calculate technical indicators. Expects columns: Open, High, Low, Close, Volume (case-insensitive).
+
+        With ``indicators``, only those columns (and what they depend on) are
+        computed; see calculate_features.
+        """
+        if indicators is not None:
+            return TechnicalFeatures.calculate_features(df, indicators)
+        df = df.copy()
+        # Normalize column names
+        df = TechnicalFeatures._normalize(df)
         close = df["close"]
         volume = df["volume"] if "volume" in df.columns else pd.Series(1.0, index=df.index)
 
@@ -58,3 +226,88 @@ class TechnicalFeatures:
         df["price_position"] = (close - df["bb_low"]) / bb_range.replace(0, np.nan)
 
         return df
+
+    @staticmethod
+    def calculate_panel_features(
+        close: pd.DataFrame,
+        volume: pd.DataFrame | None = None,
+        indicators: Iterable[str] = (),
+    ) -> dict[str, pd.DataFrame]:
+        """Same indicators as calculate_all_features over a (dates x symbols) panel.
+
+        Each indicator is computed once for every symbol column-wise, using the
+        same formulas as the ``ta`` classes. Bars before a symbol's first close
+        stay NaN, so late listings warm up exactly as they would on their own.
+        ``indicators`` adds windowed columns such as ``rsi_7`` or ``sma_200``
+        (e.g. ``required_indicators(rules)``); unknown names raise ValueError.
+        """
+        extra = [n for n in dict.fromkeys(indicators) if n not in _PANEL_COLUMNS]
+        unknown = [n for n in extra if parse_indicator(n) is None or parse_indicator(n)[1] is None]
+        if unknown:
+            raise ValueError(f"Unknown indicators: {unknown}")
+        close = close.astype(float)
+        if volume is None:
+            volume = pd.DataFrame(1.0, index=close.index, columns=close.columns)
+        else:
+            volume = volume.reindex(index=close.index, columns=close.columns).astype(float)
+        listed = close.notna()
+        out: dict[str, pd.DataFrame] = {"close": close, "volume": volume}
+
+        # Returns
+        out["returns"] = close.pct_change(fill_method=None)
+        out["log_returns"] = np.log(close / close.shift(1))
+
+        # Momentum (RSI: Wilder smoothing; MACD 12/26/9)
+        out["rsi"] = _panel_rsi(close, listed, 14)
+        ema_fast = close.ewm(span=12, min_periods=12, adjust=False).mean()
+        ema_slow = close.ewm(span=26, min_periods=26, adjust=False).mean()
+        out["macd"] = ema_fast - ema_slow
+        out["macd_signal"] = out["macd"].ewm(span=9, min_periods=9, adjust=False).mean()
+        out["macd_diff"] = out["macd"] - out["macd_signal"]
+
+        # Trend
+        out["sma_20"] = close.rolling(window=20, min_periods=20).mean()
+        out["sma_50"] = close.rolling(window=50, min_periods=50).mean()
+
+        # Volatility
+        std_20 = close.rolling(window=20, min_periods=20).std(ddof=0)
+        out["bb_mid"] = out["sma_20"]
+        out["bb_high"] = out["sma_20"] + 2 * std_20
+        out["bb_low"] = out["sma_20"] - 2 * std_20
+        out["bb_width"] = out["bb_high"] - out["bb_low"]
+
+        # Volume
+        vol_sma = volume.rolling(window=20).mean()
+        out["volume_sma"] = vol_sma
+        out["volume_ratio"] = volume / vol_sma.replace(0, np.nan)
+
+        # Price position in BB
+        bb_range = out["bb_high"] - out["bb_low"]
+        out["price_position"] = (close - out["bb_low"]) / bb_range.replace(0, np.nan)
+
+        # Windowed variants the rules ask for
+        for name in extra:
+            indicator, window = parse_indicator(name)
+            if indicator == "rsi":
+                out[name] = _panel_rsi(close, listed, window)
+            else:
+                out[name] = WINDOWED_INDICATORS[indicator](out.__getitem__, window)
+
+        return out
+
+
+def _panel_rsi(close: pd.DataFrame, listed: pd.DataFrame, window: int) -> pd.DataFrame:
+    # _rsi column-wise, keeping bars before a listing NaN so its warm-up starts at the first close
+    diff = close.diff(1)
+    up = diff.where(diff > 0, 0.0).where(listed)
+    down = (-diff.where(diff < 0, 0.0)).where(listed)
+    ema_up = up.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    ema_down = down.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    return (100 - (100 / (1 + ema_up / ema_down))).mask(ema_down == 0, 100.0)
+
+
+# Columns calculate_panel_features always returns
+_PANEL_COLUMNS = frozenset((
+    "close", "volume", "returns", "log_returns", "rsi", "macd", "macd_signal", "macd_diff", "sma_20", "sma_50",
+    "bb_mid", "bb_high", "bb_low", "bb_width", "volume_sma", "volume_ratio", "price_position",
+))
@@ -0,0 +1,148 @@
+"""Pillar 5: Local strategy leaderboard, materialized from logged backtest runs."""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+
+from app.services.mlflow_tracking import summarize_run
+
+ORDER_BY = ("sharpe_ratio", "total_return", "win_rate")
+RECONCILE_OVERLAP_MS = 60_000
+
+_COLUMNS = (
+    "run_id", "name", "position_sizing", "max_positions", "symbol", "market_regime", "start_date", "end_date",
+    "total_return", "annual_return", "sharpe_ratio", "max_drawdown", "win_rate", "profit_factor", "total_trades",
+    "logged_at",
+)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    name TEXT, position_sizing TEXT, max_positions TEXT,
+    symbol TEXT, market_regime TEXT, start_date TEXT, end_date TEXT,
+    total_return REAL, annual_return REAL, sharpe_ratio REAL, max_drawdown REAL,
+    win_rate REAL, profit_factor REAL, total_trades REAL,
+    logged_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_sharpe ON runs (sharpe_ratio DESC);
+CREATE INDEX IF NOT EXISTS runs_return ON runs (total_return DESC);
+CREATE INDEX IF NOT EXISTS runs_win_rate ON runs (win_rate DESC);
+CREATE INDEX IF NOT EXISTS runs_symbol_sharpe ON runs (symbol, sharpe_ratio DESC);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+"""
+
+
+class StrategyLeaderboard:
+    """Top-N backtest runs from a local SQLite index instead of MLflow ``search_runs``.
+
+    Runs are added as they are logged (``record``) and ``reconcile`` pulls in
+    runs started since the last reconcile, e.g. logged by other workers or
+    before this index existed. Queries use the per-metric indexes and take
+    milliseconds whether or not MLflow is reachable.
+    """
+
+    def __init__(self, path: str | Path, reconcile_interval_s: float = 300.0) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.reconcile_interval_s = reconcile_interval_s
+        self.last_reconcile: float | None = None
+        self._reconcile_lock = threading.Lock()
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call: callers run on the I/O pool and the MLflow worker
+        db = sqlite3.connect(self.path, timeout=10.0)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def upsert(self, runs: list[dict[str, Any]]) -> int:
+        if not runs:
+            return 0
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with closing(self._connect()) as db, db:
+            db.executemany(
+                f"INSERT OR REPLACE INTO runs ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                [_row(run) for run in runs],
+            )
+        return len(runs)
+
+    def record(self, run_id: str, job: dict[str, Any]) -> None:
+        """``MlflowLogQueue.on_logged`` hook: index a run as soon as MLflow accepts it."""
+        self.upsert([summarize_run(run_id, job["strategy"], job["results"], job.get("params"))])
+
+    def top(
+        self,
+        limit: int = 10,
+        order_by: str = "sharpe_ratio",
+        symbol: str | None = None,
+        regime: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Best runs by ``order_by``, optionally for one symbol or regime and logged within [since, until]."""
+        if order_by not in ORDER_BY:
+            order_by = "sharpe_ratio"
+        where, args = [f"{order_by} IS NOT NULL"], []
+        if symbol:
+            where.append("symbol = ?")
+            args.append(symbol.upper())
+        if regime:
+            where.append("market_regime = ?")
+            args.append(regime)
+        if since:
+            where.append("logged_at >= ?")
+            args.append(_epoch_ms(since))
+        if until:
+            where.append("logged_at < ?")
+            args.append(_epoch_ms(until, end_of_day=True))
+        sql = f"SELECT * FROM runs WHERE {' AND '.join(where)} ORDER BY {order_by} DESC LIMIT ?"
+        with closing(self._connect()) as db:
+            return [dict(row) for row in db.execute(sql, (*args, max(0, limit)))]
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as db:
+            return db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def reconcile(self, fetch_runs: Callable[[int], list[dict[str, Any]]]) -> int:
+        """Upsert runs from ``fetch_runs(since_ms)`` (``StrategyTracker.recent_runs``); returns how many."""
+        with self._reconcile_lock:
+            with closing(self._connect()) as db:
+                row = db.execute("SELECT value FROM meta WHERE key = 'reconciled_through'").fetchone()
+            since = row[0] if row else 0
+            # Overlap a minute so runs that started just before the last reconcile but finished after are seen
+            runs = fetch_runs(max(0, since - RECONCILE_OVERLAP_MS))
+            self.upsert(runs)
+            through = max([since, *(int(r["logged_at"] or 0) for r in runs)])
+            with closing(self._connect()) as db, db:
+                db.execute("INSERT OR REPLACE INTO meta VALUES ('reconciled_through', ?)", (through,))
+            self.last_reconcile = time.monotonic()
+            return len(runs)
+
+    def reconcile_if_due(self, fetch_runs: Callable[[int], list[dict[str, Any]]]) -> int:
+        if self.last_reconcile is not None and time.monotonic() - self.last_reconcile < self.reconcile_interval_s:
+            return 0
+        return self.reconcile(fetch_runs)
+
+    def info(self) -> dict[str, Any]:
+        return {"runs": len(self), "reconcile_interval_s": self.reconcile_interval_s, "last_reconcile": self.last_reconcile}
+
+
+def _row(run: dict[str, Any]) -> tuple:
+    run = {**run, "symbol": (run.get("symbol") or "").upper()}
+    return tuple(run.get(c) for c in _COLUMNS)
+
+
+def _epoch_ms(date: str, end_of_day: bool = False) -> int:
+    ts = pd.Timestamp(date)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    if end_of_day and ts == ts.normalize():
+        ts += pd.Timedelta(days=1)
+    return int(ts.timestamp() * 1000)
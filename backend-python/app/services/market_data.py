@@ -1,18 +1,109 @@
 """Pillar 1: Market data ingestion (Yahoo Finance)."""
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Any
 
 import pandas as pd
 import yfinance as yf
 
+from app.config import Settings
+from app.services.cache import SharedCache, cache_key, get_shared_cache
+from app.services.executors import run_io
+from app.services.ohlcv_store import OHLCVStore
+
+
+def _normalize_history(data: pd.DataFrame) -> pd.DataFrame:
+    """Lowercase columns and a tz-naive DatetimeIndex named ``date``."""
+    if data is None or data.empty:
+        return pd.DataFrame()
+    data = data.rename(columns=str.lower)
+    index = pd.to_datetime(data.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    data.index = index
+    data.index.name = "date"
+    return data
+
 
 class MarketDataService:
-    """Fetch OHLCV and multi-symbol data."""
+    """Fetch OHLCV and multi-symbol data.
+
+    Single-symbol bars go through a local ``OHLCVStore``: a request reads the
+    cached range and downloads only the missing head or tail, so repeat
+    backtests on the same symbol never touch the network. The exact requested
+    range is also kept in the shared cache so other replicas skip both.
+    """
+
+    def __init__(
+        self,
+        store: OHLCVStore | None = None,
+        settings: Settings | None = None,
+        cache: SharedCache | None = None,
+    ) -> None:
+        if store is None:
+            settings = settings or Settings()
+            store = OHLCVStore(Path(settings.data_dir) / "ohlcv")
+        self.store = store
+        self.cache = cache if cache is not None else get_shared_cache()
+
+    def _download(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp, interval: str) -> pd.DataFrame:
+        ticker = yf.Ticker(symbol)
+        return _normalize_history(
+            ticker.history(start=start.strftime("%Y-%m-%d"), end=end.strftime("%Y-%m-%d"), interval=interval)
+        )
 
-    def __init__(self) -> None:
-        self._cache: dict[str, Any] = {}
+    async def fetch_ohlcv_frame(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        interval: str = "1d",
+    ) -> pd.DataFrame:
+        """OHLCV for one symbol over [start_date, end_date), indexed by date with lowercase columns."""
+        start = pd.Timestamp(start_date).normalize()
+        end = pd.Timestamp(end_date).normalize()
+        if end <= start:
+            return pd.DataFrame()
+        key = cache_key("ohlcv", symbol.upper(), interval, start.date(), end.date())
+        # Redis round trips block as well; keep them off the event loop
+        hit = await run_io(self.cache.get, key)
+        if isinstance(hit, pd.DataFrame):
+            return hit
+        cached, covered = await run_io(self.store.read, symbol, interval)
+        gaps: list[tuple[pd.Timestamp, pd.Timestamp]] = []
+        if covered is None:
+            gaps.append((start, end))
+        else:
+            if start < covered[0]:
+                gaps.append((start, covered[0]))
+            if end > covered[1]:
+                gaps.append((covered[1], end))
+        if gaps:
+            # Today's bar is still forming, so coverage never extends past today
+            today = pd.Timestamp.now(tz="UTC").tz_localize(None).normalize()
+            new_start, new_end = covered if covered is not None else (None, None)
+            frames = [cached] if not cached.empty else []
+            for gap_start, gap_end in gaps:
+                # yfinance is blocking; keep the event loop free for concurrent fetches
+                fetched = await run_io(self._download, symbol, gap_start, gap_end, interval)
+                if fetched.empty:
+                    # Could be a transient failure; leave the gap uncovered so it is retried
+                    continue
+                frames.append(fetched)
+                new_start = gap_start if new_start is None else min(new_start, gap_start)
+                new_end = min(gap_end, today) if new_end is None else max(new_end, min(gap_end, today))
+            if frames:
+                merged = pd.concat(frames)
+                cached = merged[~merged.index.duplicated(keep="last")].sort_index()
+                if new_start is not None and new_end is not None and new_end > new_start:
+                    await run_io(self.store.write, symbol, interval, cached, (new_start, new_end))
+        if cached.empty:
+            return cached
+        data = cached.loc[(cached.index >= start) & (cached.index < end)]
+        if not data.empty:
+            await run_io(self.cache.set, key, data, self.cache.ttl_for(end))
+        return data
 
     async def fetch_ohlcv(
         self,
@@ -20,17 +111,14 @@ class MarketDataService:
         start_date: str,
         end_date: str,
     ) -> dict[str, Any]:
-        """Fetch OHLCV for one symbol."""
-        ticker = yf.Ticker(symbol)
-        data = ticker.history(start=start_date, end=end_date)
+        """Fetch OHLCV for one symbol as JSON-style records (internal callers use fetch_ohlcv_frame)."""
+        data = await self.fetch_ohlcv_frame(symbol, start_date, end_date)
         if data.empty:
             return {
                 "symbol": symbol,
                 "data": [],
                 "metadata": {"rows": 0, "start": start_date, "end": end_date},
             }
-        # Ensure column names for downstream
-        data = data.rename(columns=str.lower)
         records = data.reset_index().to_dict("records")
         for r in records:
             if "date" in r and hasattr(r["date"], "isoformat"):
@@ -52,4 +140,6 @@ class MarketDataService:
         end_date: str,
     ) -> pd.DataFrame:
         """Fetch data for multiple symbols."""
-        return yf.download(symbols, start=start_date, end=end_date, group_by="ticker", progress=False)
+        return await run_io(
+            yf.download, symbols, start=start_date, end=end_date, group_by="ticker", progress=False
+        )
@@ -1,7 +1,56 @@
 """Pillar 5: MLflow experiment tracking."""
 from __future__ import annotations
 
-from typing import Any
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+# Params and metrics recorded for every backtest run
+_PARAMS = (("strategy_name", "name", ""), ("position_sizing", "position_sizing", ""),
+           ("max_positions", "max_positions", 5), ("stop_loss", "stop_loss", ""), ("take_profit", "take_profit", ""))
+_METRICS = ("total_return", "annual_return", "sharpe_ratio", "max_drawdown", "win_rate", "profit_factor", "total_trades")
+# Where and when the backtest ran: passed per run (``params``), except the regime, read from the strategy
+_CONTEXT_PARAMS = ("symbol", "market_regime", "start_date", "end_date")
+# A failed log_run is retried as a new run, so partial runs left behind must never be listed
+_FINISHED = "attributes.status = 'FINISHED'"
+
+
+def _run_summary(run: Any) -> dict[str, Any]:
+    params = run.data.params
+    metrics = run.data.metrics
+    return {
+        "run_id": run.info.run_id,
+        "name": params.get("strategy_name", "Unnamed"),
+        "position_sizing": params.get("position_sizing", ""),
+        "max_positions": params.get("max_positions", 5),
+        **{k: params.get(k, "") for k in _CONTEXT_PARAMS},
+        **{k: metrics.get(k) for k in _METRICS},
+        "logged_at": run.info.start_time,
+    }
+
+
+def summarize_run(
+    run_id: str,
+    strategy: dict[str, Any],
+    backtest_results: dict[str, Any],
+    params: dict[str, Any] | None = None,
+    logged_at: int | None = None,
+) -> dict[str, Any]:
+    """The summary ``recent_runs`` would return for a run just logged with these inputs."""
+    metrics = backtest_results.get("metrics") or {}
+    context = _context(strategy, params)
+    return {
+        "run_id": run_id,
+        "name": str(strategy.get("name", "Unnamed")),
+        "position_sizing": str(strategy.get("position_sizing", "")),
+        "max_positions": str(strategy.get("max_positions", 5)),
+        **{k: str(context.get(k, "")) for k in _CONTEXT_PARAMS},
+        **{k: float(metrics.get(k) or 0) for k in _METRICS},
+        "logged_at": logged_at if logged_at is not None else int(time.time() * 1000),
+    }
 
 
 def get_top_strategies_from_mlflow(
@@ -22,74 +71,326 @@ def get_top_strategies_from_mlflow(
             return []
         runs = client.search_runs(
             experiment_ids=[exp.experiment_id],
+            filter_string=_FINISHED,
             order_by=[f"metrics.{order_by_metric} DESC"],
             max_results=limit,
         )
-        if not runs:
-            return []
-        out = []
-        for r in runs:
-            params = r.data.params
-            metrics = r.data.metrics
-            out.append({
-                "run_id": r.info.run_id,
-                "name": params.get("strategy_name", "Unnamed"),
-                "position_sizing": params.get("position_sizing", ""),
-                "max_positions": params.get("max_positions", 5),
-                "sharpe_ratio": metrics.get("sharpe_ratio"),
-                "total_return": metrics.get("total_return"),
-                "annual_return": metrics.get("annual_return"),
-                "max_drawdown": metrics.get("max_drawdown"),
-                "win_rate": metrics.get("win_rate"),
-                "profit_factor": metrics.get("profit_factor"),
-                "total_trades": metrics.get("total_trades"),
-            })
-        return out
+        return [_run_summary(r) for r in runs]
     except Exception:
         return []
 
 
 class StrategyTracker:
-    """Log strategies and backtest results to MLflow."""
+    """Log strategies and backtest results to MLflow.
+
+    A run costs four requests: create the run, one ``log_batch`` with every
+    param and metric, one JSON artifact with the strategy, equity curve and
+    trades, and close the run.
+    """
 
     def __init__(self, experiment_name: str = "trading_strategies", tracking_uri: str | None = None) -> None:
         try:
             import mlflow
+            from mlflow.tracking import MlflowClient
             if tracking_uri:
                 mlflow.set_tracking_uri(tracking_uri)
-            mlflow.set_experiment(experiment_name)
+            experiment = mlflow.set_experiment(experiment_name)
+            self._experiment_id = experiment.experiment_id
+            self._client = MlflowClient(tracking_uri=tracking_uri)
             self._mlflow = mlflow
             self._active = True
         except Exception:
             self._mlflow = None
             self._active = False
 
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    def log_run(
+        self,
+        strategy: dict[str, Any],
+        backtest_results: dict[str, Any],
+        model_artifacts: dict[str, str] | None = None,
+        params: dict[str, Any] | None = None,
+    ) -> str:
+        """Log one backtest as a run and return its id; raises on MLflow errors.
+
+        ``params`` adds run context (symbol, start_date, end_date) to the strategy params.
+        """
+        from mlflow.entities import Metric, Param
+
+        if not self._active:
+            raise RuntimeError("MLflow unavailable")
+        client = self._client
+        run_id = client.create_run(self._experiment_id).info.run_id
+        try:
+            now = int(time.time() * 1000)
+            metrics = backtest_results.get("metrics") or {}
+            client.log_batch(
+                run_id,
+                metrics=[Metric(k, float(metrics.get(k) or 0), now, 0) for k in _METRICS],
+                params=[Param(name, str(strategy.get(key, default))) for name, key, default in _PARAMS]
+                + [Param(k, str(v)) for k, v in _context(strategy, params).items()],
+            )
+            client.log_dict(
+                run_id,
+                {
+                    "strategy": strategy,
+                    "equity_curve": backtest_results.get("equity_curve", []),
+                    "trades": backtest_results.get("trades", []),
+                },
+                "backtest.json",
+            )
+            for name, path in (model_artifacts or {}).items():
+                client.log_artifact(run_id, path, name)
+        except Exception:
+            # The retry logs a fresh run: drop this partial one, or at least mark it FAILED
+            try:
+                client.delete_run(run_id)
+            except Exception:
+                try:
+                    client.set_terminated(run_id, "FAILED")
+                except Exception:
+                    pass
+            raise
+        client.set_terminated(run_id)
+        return run_id
+
+    def recent_runs(self, since_ms: int = 0, page_size: int = 500) -> list[dict[str, Any]]:
+        """Summaries of every finished run started at or after ``since_ms`` (epoch ms), oldest first."""
+        if not self._active:
+            raise RuntimeError("MLflow unavailable")
+        out: list[dict[str, Any]] = []
+        token = None
+        while True:
+            page = self._client.search_runs(
+                experiment_ids=[self._experiment_id],
+                filter_string=f"attributes.start_time >= {int(since_ms)} AND {_FINISHED}",
+                order_by=["attributes.start_time ASC"],
+                max_results=page_size,
+                page_token=token,
+            )
+            out.extend(_run_summary(r) for r in page)
+            token = page.token
+            if not token:
+                return out
+
     def log_strategy(
         self,
         strategy: dict[str, Any],
         backtest_results: dict[str, Any],
         model_artifacts: dict[str, str] | None = None,
     ) -> None:
-        """Log strategy params and backtest metrics."""
-        if not self._active or self._mlflow is None:
+        """Log strategy params and backtest metrics (best-effort)."""
+        if not self._active:
             return
         try:
-            with self._mlflow.start_run():
-                self._mlflow.log_param("strategy_name", strategy.get("name", ""))
-                self._mlflow.log_param("position_sizing", strategy.get("position_sizing", ""))
-                self._mlflow.log_param("max_positions", strategy.get("max_positions", 5))
-                self._mlflow.log_param("stop_loss", strategy.get("stop_loss", ""))
-                self._mlflow.log_param("take_profit", strategy.get("take_profit", ""))
-                metrics = backtest_results.get("metrics", {})
-                self._mlflow.log_metric("total_return", metrics.get("total_return", 0))
-                self._mlflow.log_metric("annual_return", metrics.get("annual_return", 0))
-                self._mlflow.log_metric("sharpe_ratio", metrics.get("sharpe_ratio", 0))
-                self._mlflow.log_metric("max_drawdown", metrics.get("max_drawdown", 0))
-                self._mlflow.log_metric("win_rate", metrics.get("win_rate", 0))
-                self._mlflow.log_metric("profit_factor", metrics.get("profit_factor", 0))
-                self._mlflow.log_metric("total_trades", metrics.get("total_trades", 0))
-                if model_artifacts:
-                    for name, path in model_artifacts.items():
-                        self._mlflow.log_artifact(path, name)
+            self.log_run(strategy, backtest_results, model_artifacts)
         except Exception:
             pass
+
+
+def _context(strategy: dict[str, Any], params: dict[str, Any] | None) -> dict[str, Any]:
+    merged = {"market_regime": strategy.get("market_regime"), **(params or {})}
+    return {k: merged[k] for k in _CONTEXT_PARAMS if merged.get(k) not in (None, "")}
+
+
+class MlflowLogQueue:
+    """Background MLflow logging so backtests never wait on the tracking server.
+
+    ``enqueue`` returns at once; a worker thread logs each run with
+    ``StrategyTracker.log_run`` and retries with exponential backoff. Runs
+    that still fail, or arrive while the queue is full, are appended to a
+    JSON-lines journal on disk and replayed once MLflow answers again.
+    ``on_logged(run_id, job)`` is called after each successful log, and
+    ``idle_tasks`` run (with the replay) every ``replay_interval_s`` while
+    the queue is empty.
+    """
+
+    def __init__(
+        self,
+        tracker_factory: Callable[[], StrategyTracker],
+        journal_path: str | Path,
+        max_queue: int = 1000,
+        max_retries: int = 3,
+        backoff_s: float = 1.0,
+        replay_interval_s: float = 60.0,
+        on_logged: Callable[[str, dict[str, Any]], None] | None = None,
+        idle_tasks: list[Callable[[], Any]] | None = None,
+    ) -> None:
+        self.tracker_factory = tracker_factory
+        self.journal_path = Path(journal_path)
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.replay_interval_s = replay_interval_s
+        self.on_logged = on_logged
+        self.idle_tasks = list(idle_tasks or [])
+        self.stats = {"logged": 0, "retries": 0, "journaled": 0, "replayed": 0, "dropped": 0}
+        self._queue: queue.Queue[dict[str, Any] | None] = queue.Queue(maxsize=max_queue)
+        self._journal_lock = threading.Lock()
+        # Lines in the journal file, counted once here and then kept up to date
+        self._journal_lines = self._count_journal()
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def enqueue(
+        self,
+        strategy: dict[str, Any],
+        backtest_results: dict[str, Any],
+        params: dict[str, Any] | None = None,
+    ) -> None:
+        job = {
+            "strategy": strategy,
+            "results": {k: backtest_results.get(k) for k in ("metrics", "equity_curve", "trades")},
+            "params": params or {},
+            "queued_at": time.time(),
+        }
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._journal([job])
+
+    def start(self) -> None:
+        """Start the worker now rather than on the first ``enqueue`` (so idle tasks run from startup)."""
+        self._ensure_started()
+
+    def _ensure_started(self) -> None:
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="mlflow-log", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        next_replay = 0.0
+        while True:
+            try:
+                job = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                if time.monotonic() >= next_replay:
+                    next_replay = time.monotonic() + self.replay_interval_s
+                    self.replay_journal()
+                    for task in self.idle_tasks:
+                        try:
+                            task()
+                        except Exception:
+                            pass
+                continue
+            if job is None:
+                return
+            if not self._log_with_retries(job):
+                self._journal([job])
+
+    def _log_with_retries(self, job: dict[str, Any]) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._log(job)
+                self.stats["logged"] += 1
+                return True
+            except Exception:
+                if attempt == self.max_retries or self._stopping.is_set():
+                    return False
+                self.stats["retries"] += 1
+                time.sleep(self.backoff_s * 2 ** attempt)
+        return False
+
+    def _log(self, job: dict[str, Any]) -> None:
+        run_id = self.tracker_factory().log_run(job["strategy"], job["results"], params=job.get("params"))
+        if self.on_logged is not None:
+            try:
+                self.on_logged(run_id, job)
+            except Exception:
+                pass
+
+    def _journal(self, jobs: list[dict[str, Any]], count: bool = True) -> None:
+        try:
+            with self._journal_lock:
+                self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.journal_path, "a", encoding="utf-8") as f:
+                    for job in jobs:
+                        f.write(json.dumps(job, default=str) + "\n")
+                self._journal_lines += len(jobs)
+            if count:
+                self.stats["journaled"] += len(jobs)
+        except OSError:
+            self.stats["dropped"] += len(jobs)
+
+    def _count_journal(self) -> int:
+        try:
+            with open(self.journal_path, encoding="utf-8") as f:
+                return sum(1 for _ in f)
+        except OSError:
+            return 0
+
+    def journal_depth(self) -> int:
+        return self._journal_lines
+
+    def replay_journal(self) -> int:
+        """Re-log journaled runs; the ones that fail again stay journaled. Returns how many were logged."""
+        replaying = self.journal_path.with_suffix(".replaying")
+        lines: list[str] = []
+        with self._journal_lock:
+            # A .replaying file left by an interrupted replay is picked up again first
+            for path in (replaying, self.journal_path):
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        lines.extend(f)
+                except OSError:
+                    continue
+            if not lines:
+                return 0
+            with open(replaying, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+            self.journal_path.unlink(missing_ok=True)
+            self._journal_lines = 0
+        jobs = []
+        for line in lines:
+            try:
+                jobs.append(json.loads(line))
+            except ValueError:
+                continue
+        logged = 0
+        for i, job in enumerate(jobs):
+            try:
+                self._log(job)
+            except Exception:
+                # Still down: keep this and the rest for the next replay
+                self._journal(jobs[i:], count=False)
+                break
+            logged += 1
+        self.stats["replayed"] += logged
+        replaying.unlink(missing_ok=True)
+        return logged
+
+    def stop(self, timeout_s: float = 5.0) -> None:
+        """Drain the queue for up to ``timeout_s``, then journal whatever is left."""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+            thread.join(timeout_s)
+        leftover = []
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                leftover.append(job)
+        if leftover:
+            self._journal(leftover)
+
+    def status(self) -> dict[str, Any]:
+        return {**self.stats, "queue_depth": self.depth, "journal_depth": self.journal_depth()}
@@ -0,0 +1,121 @@
+"""Pillar 4: Monte Carlo robustness analysis of backtest results."""
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+MONTE_CARLO_METHODS = ("returns", "trades")
+_METRICS = ("total_return", "max_drawdown", "sharpe_ratio")
+
+
+def _path_metrics(returns: np.ndarray, periods_per_year: float) -> dict[str, np.ndarray]:
+    """total_return, max_drawdown and sharpe_ratio for every row of a (paths x steps) return matrix."""
+    growth = np.add(returns, 1.0)
+    np.cumprod(growth, axis=1, out=growth)
+    total_return = growth[:, -1] - 1.0
+    # Running peak includes the starting equity (1.0), as in _calculate_metrics
+    ratio = np.maximum.accumulate(growth, axis=1)
+    np.maximum(ratio, 1.0, out=ratio)
+    np.divide(growth, ratio, out=ratio)
+    del growth
+    drawdown = np.minimum(ratio.min(axis=1) - 1.0, 0.0)
+    del ratio
+    if returns.shape[1] > 1:
+        std = returns.std(axis=1, ddof=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe = np.where(std > 0, returns.mean(axis=1) / std * np.sqrt(periods_per_year), 0.0)
+    else:
+        sharpe = np.zeros(len(returns))
+    return {"total_return": total_return, "max_drawdown": drawdown, "sharpe_ratio": sharpe}
+
+
+def _summary(values: np.ndarray, confidence: float) -> dict[str, float]:
+    lower = (1.0 - confidence) / 2.0
+    lo, median, hi = np.quantile(values, [lower, 0.5, 1.0 - lower])
+    return {
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "median": float(median),
+        "ci_lower": float(lo),
+        "ci_upper": float(hi),
+    }
+
+
+def run_monte_carlo(
+    backtest: dict[str, Any],
+    simulations: int = 1000,
+    method: str = "returns",
+    block_size: int = 1,
+    confidence: float = 0.95,
+    seed: int | None = None,
+    chunk_size: int | None = None,
+    max_memory_mb: float = 256.0,
+    initial_capital: float | None = None,
+) -> dict[str, Any]:
+    """Confidence intervals for total_return, max_drawdown and sharpe_ratio.
+
+    ``method="returns"`` bootstraps daily equity returns (moving blocks of
+    ``block_size`` bars); ``method="trades"`` resamples the trade list with
+    replacement. Each chunk of paths is drawn and scored as one 2-D array.
+    ``chunk_size`` defaults to what fits in ``max_memory_mb``. Results for a
+    given seed do not depend on the chunk size.
+    """
+    if method not in MONTE_CARLO_METHODS:
+        raise ValueError(f"Unknown Monte Carlo method {method!r}; expected one of {MONTE_CARLO_METHODS}")
+    if simulations < 1:
+        raise ValueError("simulations must be positive")
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+    equity = np.asarray(backtest.get("equity_curve") or [], dtype=float)
+    years = max(len(equity) / 252, 1 / 252)
+    if method == "returns":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sample = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.empty(0)
+        sample = sample[np.isfinite(sample)]
+        periods_per_year = 252.0
+        block = max(1, min(int(block_size), len(sample) or 1))
+    else:
+        capital = float(initial_capital if initial_capital is not None else (equity[0] if len(equity) else 0.0))
+        pnl = np.array([t["pnl"] for t in backtest.get("trades", [])], dtype=float)
+        # Each trade's P&L as a return on starting capital, compounded in resampled order
+        sample = pnl / capital if capital > 0 else np.empty(0)
+        periods_per_year = max(len(sample) / years, 1.0)
+        block = 1
+    steps = len(sample)
+    if steps == 0:
+        zero = {"mean": 0.0, "std": 0.0, "median": 0.0, "ci_lower": 0.0, "ci_upper": 0.0}
+        return {
+            "method": method,
+            "simulations": 0,
+            "confidence": confidence,
+            "block_size": block,
+            "metrics": {m: dict(zero) for m in _METRICS},
+            "probability_of_loss": 0.0,
+        }
+
+    if chunk_size is None:
+        # Up to 4 (paths x steps) 8-byte arrays are alive at once: indices, returns and two work arrays
+        chunk_size = int(max_memory_mb * 1024 * 1024 / (steps * 8 * 4))
+    chunk_size = max(1, min(int(chunk_size), simulations))
+    n_blocks = -(-steps // block)
+    offsets = np.arange(block)
+    rng = np.random.default_rng(seed)
+    results = {m: np.empty(simulations) for m in _METRICS}
+    for start in range(0, simulations, chunk_size):
+        rows = min(chunk_size, simulations - start)
+        starts = rng.integers(0, steps - block + 1, size=(rows, n_blocks))
+        idx = (starts[:, :, None] + offsets).reshape(rows, -1)[:, :steps]
+        paths = sample[idx]
+        del idx
+        for name, values in _path_metrics(paths, periods_per_year).items():
+            results[name][start:start + rows] = values
+
+    return {
+        "method": method,
+        "simulations": simulations,
+        "confidence": confidence,
+        "block_size": block,
+        "metrics": {name: _summary(values, confidence) for name, values in results.items()},
+        "probability_of_loss": float((results["total_return"] < 0).mean()),
+    }
@@ -1,18 +1,135 @@
 """Pillar 1: News data ingestion (NewsAPI)."""
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
+import math
+import os
+import tempfile
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from pathlib import Path
 from typing import Any
+from urllib.parse import urlsplit
 
 import httpx
+import pandas as pd
 from app.config import Settings
 
+# NewsAPI's largest page
+MAX_PAGE_SIZE = 100
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = weakref.WeakKeyDictionary()
+# Process-wide: after a 429 every request waits until this monotonic time
+_rate_limited_until = 0.0
+
+
+def get_news_client() -> httpx.AsyncClient:
+    """Keep-alive client shared by all NewsService calls on the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient(
+            timeout=15.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return client
+
+
+async def close_news_client() -> None:
+    """Close the running loop's shared client (application shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _normalize_article(a: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "title": a.get("title") or "",
+        "description": a.get("description") or "",
+        "content": a.get("content") or "",
+        "published_at": a.get("publishedAt") or "",
+        "source": (a.get("source") or {}).get("name", ""),
+        "url": a.get("url") or "",
+    }
+
+
+def dedupe_articles(articles: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Drop syndicated copies: same URL (ignoring scheme, query and fragment) or same normalized title."""
+    seen: set[str] = set()
+    out = []
+    for a in articles:
+        keys = []
+        if a.get("url"):
+            parts = urlsplit(a["url"])
+            keys.append("u:" + (parts.netloc.lower().removeprefix("www.") + parts.path.rstrip("/")))
+        title = " ".join((a.get("title") or "").lower().split())
+        if title:
+            keys.append("t:" + hashlib.blake2b(title.encode(), digest_size=12).hexdigest())
+        if any(k in seen for k in keys):
+            continue
+        seen.update(keys)
+        out.append(a)
+    return out
+
+
+class _ResponseCache:
+    """On-disk JSON cache of deduplicated article lists with per-entry expiry."""
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: tuple) -> Path:
+        digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+        return self.root / f"{digest}.json"
+
+    def get(self, key: tuple) -> dict[str, Any] | None:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("expires_at", 0) > time.time() else None
+
+    def set(self, key: tuple, entry: dict[str, Any], ttl_s: float) -> None:
+        entry = {**entry, "expires_at": time.time() + ttl_s}
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            Path(tmp).unlink(missing_ok=True)
+
 
 class NewsService:
-    """Fetch news articles for sentiment."""
+    """Fetch news articles for sentiment.
+
+    Requests share one keep-alive client, extra pages are fetched
+    concurrently (at most ``news_max_concurrent_pages`` at a time), and
+    syndicated copies are dropped. Results are cached on disk per
+    (query, from, to, language). A 429 or 5xx is retried with exponential
+    backoff that honors ``Retry-After``; a 429 also pauses every other
+    request in the process for that long.
+    """
 
-    def __init__(self, settings: Settings | None = None) -> None:
+    def __init__(self, settings: Settings | None = None, client: httpx.AsyncClient | None = None) -> None:
         self.settings = settings or Settings()
-        self.base_url = "https://newsapi.org/v2"
+        self.base_url = self.settings.news_api_base_url.rstrip("/")
+        self._client = client
+        s = self.settings
+        self.cache = _ResponseCache(Path(s.data_dir) / "news") if s.news_cache_ttl_s > 0 else None
+
+    def _ttl_for(self, to_date: str) -> float:
+        # Ranges that end before yesterday rarely gain articles
+        yesterday = pd.Timestamp.now(tz="UTC").tz_localize(None).normalize() - pd.Timedelta(days=1)
+        historical = pd.Timestamp(to_date).normalize() < yesterday
+        s = self.settings
+        return s.news_cache_historical_ttl_s if historical else s.news_cache_ttl_s
 
     async def fetch_news(
         self,
@@ -21,33 +138,89 @@ class NewsService:
         to_date: str,
         language: str = "en",
         page_size: int = 20,
+        max_articles: int | None = None,
     ) -> list[dict[str, Any]]:
-        """Fetch news articles for a query and date range."""
+        """Fetch up to ``max_articles`` (default ``page_size``) deduplicated articles for a query and range."""
         if not self.settings.news_api_key:
             return []
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        wanted = max(1, max_articles or page_size)
+        key = (query, from_date, to_date, language)
+        if self.cache is not None:
+            entry = self.cache.get(key)
+            # A cached list serves any request it fully answers (enough articles, or all there were)
+            if entry is not None and (entry.get("requested", 0) >= wanted or entry.get("complete")):
+                return entry["articles"][:wanted]
+        per_page = min(MAX_PAGE_SIZE, wanted)
+        params = {
+            "q": query,
+            "from": from_date,
+            "to": to_date,
+            "sortBy": "relevancy",
+            "language": language,
+            "pageSize": per_page,
+        }
+        first = await self._get_page(params, 1)
+        articles = list(first.get("articles", []))
+        total = int(first.get("totalResults") or len(articles))
+        pages = max(1, math.ceil(min(total, wanted) / per_page))
+        pages_ok = True
+        if pages > 1:
+            semaphore = asyncio.Semaphore(max(1, self.settings.news_max_concurrent_pages))
+
+            async def _page(n: int) -> dict[str, Any] | None:
+                async with semaphore:
+                    try:
+                        return await self._get_page(params, n)
+                    except httpx.HTTPError:
+                        return None
+
+            for data in await asyncio.gather(*(_page(n) for n in range(2, pages + 1))):
+                if data is None:
+                    pages_ok = False
+                else:
+                    articles.extend(data.get("articles", []))
+        result = dedupe_articles([_normalize_article(a) for a in articles])[:wanted]
+        if self.cache is not None and pages_ok:
+            self.cache.set(
+                key,
+                {"requested": wanted, "complete": total <= pages * per_page, "articles": result},
+                self._ttl_for(to_date),
+            )
+        return result
+
+    async def _get_page(self, params: dict[str, Any], page: int) -> dict[str, Any]:
+        global _rate_limited_until
+        client = self._client or get_news_client()
+        s = self.settings
+        for attempt in range(s.news_max_retries + 1):
+            wait = _rate_limited_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
             r = await client.get(
                 f"{self.base_url}/everything",
-                params={
-                    "q": query,
-                    "from": from_date,
-                    "to": to_date,
-                    "sortBy": "relevancy",
-                    "language": language,
-                    "pageSize": page_size,
-                    "apiKey": self.settings.news_api_key,
-                },
+                params={**params, "page": page},
+                headers={"X-Api-Key": s.news_api_key},
             )
-            r.raise_for_status()
-            data = r.json()
-        articles = data.get("articles", [])
-        return [
-            {
-                "title": a.get("title") or "",
-                "description": a.get("description") or "",
-                "content": a.get("content") or "",
-                "published_at": a.get("publishedAt") or "",
-                "source": (a.get("source") or {}).get("name", ""),
-            }
-            for a in articles
-        ]
+            if r.status_code not in _RETRY_STATUS or attempt == s.news_max_retries:
+                r.raise_for_status()
+                return r.json()
+            delay = _retry_after(r) or s.news_backoff_s * 2 ** attempt
+            if r.status_code == 429:
+                _rate_limited_until = max(_rate_limited_until, time.monotonic() + delay)
+            else:
+                await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
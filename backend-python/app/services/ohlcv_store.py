@@ -0,0 +1,77 @@
+"""Pillar 1: Persistent columnar OHLCV store (one Arrow IPC file per symbol and interval)."""
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+_COVERED_START = b"covered_start"
+_COVERED_END = b"covered_end"
+
+
+class OHLCVStore:
+    """Local on-disk OHLCV cache.
+
+    Each file stores the bars plus the contiguous ``[covered_start, covered_end)``
+    range that has been downloaded, so holidays and weekends at the edges of a
+    request do not look like gaps. Files are uncompressed Arrow IPC and are read
+    through a memory map. Writes go to a temp file first and are then swapped in
+    atomically, so concurrent readers never see a partial file.
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, symbol: str, interval: str) -> Path:
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", f"{symbol.upper()}_{interval}")
+        return self.root / f"{safe}.arrow"
+
+    def read(self, symbol: str, interval: str = "1d") -> tuple[pd.DataFrame, tuple[pd.Timestamp, pd.Timestamp] | None]:
+        """Stored bars and covered range, or an empty frame and None."""
+        path = self.path(symbol, interval)
+        if not path.exists():
+            return pd.DataFrame(), None
+        try:
+            with pa.memory_map(str(path), "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+        except (OSError, pa.ArrowInvalid):
+            return pd.DataFrame(), None
+        meta = table.schema.metadata or {}
+        if _COVERED_START not in meta or _COVERED_END not in meta:
+            return pd.DataFrame(), None
+        covered = (pd.Timestamp(meta[_COVERED_START].decode()), pd.Timestamp(meta[_COVERED_END].decode()))
+        df = table.to_pandas()
+        if "date" in df.columns:
+            df = df.set_index("date")
+        return df, covered
+
+    def write(
+        self,
+        symbol: str,
+        interval: str,
+        data: pd.DataFrame,
+        covered: tuple[pd.Timestamp, pd.Timestamp],
+    ) -> None:
+        """Replace the stored bars and covered range for a symbol/interval."""
+        frame = data.copy()
+        frame.index.name = "date"
+        table = pa.Table.from_pandas(frame.reset_index(), preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            _COVERED_START: covered[0].isoformat().encode(),
+            _COVERED_END: covered[1].isoformat().encode(),
+        })
+        path = self.path(symbol, interval)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
@@ -0,0 +1,313 @@
+"""Pillar 4: Strategy parameter optimization (grid / random search over a process pool)."""
+from __future__ import annotations
+
+import ast
+import copy
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest_engine import BacktestEngine, _position_params
+from app.services.executors import sweep_pool
+from app.services.rule_compiler import RuleCompileError, compile_rule
+
+# Metrics the optimizer can rank by; all are "higher is better" (max_drawdown is negative)
+TARGET_METRICS = ("sharpe_ratio", "total_return", "annual_return", "max_drawdown", "win_rate", "profit_factor")
+SEARCH_METHODS = ("grid", "random")
+
+
+@dataclass(frozen=True)
+class ParamSpec:
+    """One tunable number in a strategy: a rule threshold or a risk setting."""
+    key: str
+    path: tuple[Any, ...]
+    value: float
+    lower: float | None = None
+    upper: float | None = None
+
+
+def _rule_constants(rule: str) -> list[tuple[int, int, float]]:
+    """(start, end, value) of numeric literals in a rule, left to right."""
+    # Lowercase like the rule compiler (``AND``), keeping one char per char so offsets map back
+    text = "".join(c if len(c.lower()) != 1 else c.lower() for c in rule.strip())
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError:
+        return []
+    # AST offsets count UTF-8 bytes; callers slice the str
+    encoded = text.encode()
+
+    def _char(offset: int) -> int:
+        return len(encoded[:offset].decode())
+
+    found = [
+        (_char(node.col_offset), _char(node.end_col_offset), float(node.value))
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Constant)
+        and isinstance(node.value, (int, float))
+        and not isinstance(node.value, bool)
+    ]
+    return sorted(found)
+
+
+def check_strategy(strategy: Any) -> None:
+    """Raise ValueError unless the strategy has entry rules, every rule compiles and its risk settings parse.
+
+    Sweeping an invalid strategy would tune literals of rules that never
+    match, or score every candidate as invalid.
+    """
+    if not isinstance(strategy, dict):
+        raise ValueError("strategy must be an object")
+    for field in ("entry_rules", "exit_rules"):
+        rules = strategy.get(field) or []
+        if not isinstance(rules, list):
+            raise ValueError(f"{field} must be a list of strings")
+        for rule in rules:
+            try:
+                compile_rule(rule)
+            except RuleCompileError as e:
+                raise ValueError(f"Invalid rule in {field}: {e}") from e
+    if not strategy.get("entry_rules"):
+        raise ValueError("entry_rules must not be empty")
+    _position_params(strategy)
+
+
+def extract_parameters(strategy: dict[str, Any]) -> list[ParamSpec]:
+    """Tunable parameters: non-zero rule thresholds, stop_loss, take_profit, max_position_size.
+
+    Zero thresholds (``macd_diff > 0``) are sign tests, not levels, and stay fixed.
+    """
+    specs: list[ParamSpec] = []
+    for field in ("entry_rules", "exit_rules"):
+        for i, rule in enumerate(strategy.get(field, []) or []):
+            for j, (_, _, value) in enumerate(_rule_constants(rule)):
+                if value != 0:
+                    specs.append(ParamSpec(f"{field}[{i}]#{j}", (field, i, j), value))
+    for field in ("stop_loss", "take_profit"):
+        try:
+            value = float(strategy.get(field) or 0)
+        except (TypeError, ValueError):
+            continue
+        if value > 0:
+            specs.append(ParamSpec(field, (field,), value, lower=1e-4))
+    alloc = strategy.get("asset_allocation") or {}
+    try:
+        size = float(alloc.get("max_position_size", 0.2)) if isinstance(alloc, dict) else 0.0
+    except (TypeError, ValueError):
+        size = 0.0
+    if size > 0:
+        specs.append(ParamSpec("max_position_size", ("asset_allocation", "max_position_size"), size, 0.01, 1.0))
+    return specs
+
+
+def _format_number(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(round(float(value), 6))
+
+
+def apply_parameters(strategy: dict[str, Any], specs: list[ParamSpec], values: dict[str, float]) -> dict[str, Any]:
+    """Copy of ``strategy`` with the given parameter values substituted."""
+    out = copy.deepcopy(strategy)
+    rule_edits: dict[tuple[str, int], dict[int, float]] = {}
+    for spec in specs:
+        if spec.key not in values:
+            continue
+        value = values[spec.key]
+        if spec.path[0] in ("entry_rules", "exit_rules"):
+            rule_edits.setdefault((spec.path[0], spec.path[1]), {})[spec.path[2]] = value
+        elif spec.path[0] == "asset_allocation":
+            out["asset_allocation"] = dict(out.get("asset_allocation") or {})
+            out["asset_allocation"][spec.path[1]] = value
+        else:
+            out[spec.path[0]] = value
+    for (field, i), edits in rule_edits.items():
+        text = out[field][i].strip()
+        # Replace right to left so earlier offsets stay valid
+        for j, (start, end, _) in reversed(list(enumerate(_rule_constants(text)))):
+            if j in edits:
+                text = text[:start] + _format_number(edits[j]) + text[end:]
+        out[field][i] = text
+    return out
+
+
+def _candidate_values(spec: ParamSpec, steps: int, span: float) -> np.ndarray:
+    values = spec.value * (1 + span * np.linspace(-1.0, 1.0, steps))
+    lower = -np.inf if spec.lower is None else spec.lower
+    upper = np.inf if spec.upper is None else spec.upper
+    return np.unique(np.clip(values, lower, upper).round(6))
+
+
+def build_search_space(
+    specs: list[ParamSpec],
+    method: str = "grid",
+    steps: int = 5,
+    span: float = 0.5,
+    max_candidates: int = 200,
+    seed: int | None = None,
+) -> list[dict[str, float]]:
+    """Candidate parameter sets; the unmodified strategy is always first.
+
+    A grid larger than ``max_candidates`` falls back to random sampling within
+    the same ranges.
+    """
+    if method not in SEARCH_METHODS:
+        raise ValueError(f"Unknown search method {method!r}; expected one of {SEARCH_METHODS}")
+    base = {s.key: s.value for s in specs}
+    if not specs or max_candidates <= 1:
+        return [base]
+    grids = [_candidate_values(s, steps, span) for s in specs]
+    grid_size = int(np.prod([len(g) for g in grids], dtype=float))
+    candidates = [base]
+    if method == "grid" and grid_size <= max_candidates:
+        for combo in itertools.product(*grids):
+            values = {s.key: float(v) for s, v in zip(specs, combo)}
+            if values != base:
+                candidates.append(values)
+        return candidates
+    rng = np.random.default_rng(seed)
+    lows = np.array([g.min() for g in grids])
+    highs = np.array([g.max() for g in grids])
+    draws = rng.uniform(lows, highs, size=(max_candidates - 1, len(specs))).round(6)
+    candidates.extend({s.key: float(v) for s, v in zip(specs, row)} for row in draws)
+    return candidates
+
+
+# Per-worker state, set once by the pool initializer so the feature frame is
+# pickled once per worker rather than once per task. Only pool processes set it.
+_WORKER: dict[str, Any] = {}
+
+
+def _init_worker(data: pd.DataFrame, initial_capital: float) -> None:
+    _WORKER["data"] = data
+    _WORKER["engine"] = BacktestEngine(initial_capital=initial_capital)
+
+
+def _chunk_metrics(
+    engine: BacktestEngine,
+    data: pd.DataFrame,
+    strategies: list[dict[str, Any]],
+) -> list[dict[str, Any] | None]:
+    """Metrics for each strategy in the chunk (None if its parameters were invalid)."""
+    return [r.get("metrics") for r in engine.run_batch(strategies, data)]
+
+
+def _evaluate_chunk(strategies: list[dict[str, Any]]) -> list[dict[str, Any] | None]:
+    """``_chunk_metrics`` on the pool worker's frame (pool processes only)."""
+    return _chunk_metrics(_WORKER["engine"], _WORKER["data"], strategies)
+
+
+def _evaluate_indexed(task: tuple[list[int], list[dict[str, Any]]]) -> tuple[list[int], list[dict[str, Any] | None]]:
+    chunk, strategies = task
+    return chunk, _evaluate_chunk(strategies)
+
+
+class StrategyOptimizer:
+    """Parallel parameter sweep of one strategy against a shared feature frame."""
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        initial_capital: float = 100_000,
+        max_workers: int = 1,
+        chunk_size: int = 16,
+    ) -> None:
+        self.data = data
+        self.initial_capital = initial_capital
+        self.max_workers = max(1, min(max_workers, os.cpu_count() or 1))
+        self.chunk_size = max(1, chunk_size)
+
+    def optimize(
+        self,
+        strategy: dict[str, Any],
+        target_metric: str = "sharpe_ratio",
+        method: str = "grid",
+        steps: int = 5,
+        span: float = 0.5,
+        max_candidates: int = 200,
+        time_budget_s: float = 30.0,
+        seed: int | None = None,
+        cancel_event: threading.Event | None = None,
+        on_result: Callable[[list[dict[str, Any]], int, int], None] | None = None,
+    ) -> dict[str, Any]:
+        """Evaluate candidates until done, out of time, or cancelled; return the best by target_metric.
+
+        ``on_result(rows, evaluated, total)`` is called from this thread after
+        each chunk with that chunk's ``{"candidate", "params", "metrics"}`` rows.
+        """
+        if target_metric not in TARGET_METRICS:
+            raise ValueError(f"Unknown target metric {target_metric!r}; expected one of {TARGET_METRICS}")
+        check_strategy(strategy)
+        started = time.monotonic()
+        specs = extract_parameters(strategy)
+        space = build_search_space(specs, method, steps, span, max_candidates, seed)
+        candidates = [apply_parameters(strategy, specs, values) for values in space]
+        chunks = [
+            list(range(i, min(i + self.chunk_size, len(candidates))))
+            for i in range(0, len(candidates), self.chunk_size)
+        ]
+        deadline = started + time_budget_s
+        metrics: dict[int, dict[str, Any] | None] = {}
+
+        def _stopped() -> bool:
+            return time.monotonic() >= deadline or (cancel_event is not None and cancel_event.is_set())
+
+        def _record(chunk: list[int], chunk_metrics: list[dict[str, Any] | None]) -> None:
+            metrics.update(zip(chunk, chunk_metrics))
+            if on_result is not None:
+                rows = [
+                    {"candidate": k, "params": space[k], "metrics": m}
+                    for k, m in zip(chunk, chunk_metrics)
+                    if m is not None
+                ]
+                on_result(rows, len(metrics), len(candidates))
+
+        if self.max_workers == 1:
+            # Inline on the caller's thread: local engine and frame, never the pool-worker globals,
+            # since other sweeps may run on other threads of this process
+            engine = BacktestEngine(initial_capital=self.initial_capital)
+            for chunk in chunks:
+                if _stopped():
+                    break
+                _record(chunk, _chunk_metrics(engine, self.data, [candidates[k] for k in chunk]))
+        else:
+            # Workers are terminated on exit, so chunks still running stop with the budget or cancel
+            with sweep_pool(self.max_workers, _init_worker, (self.data, self.initial_capital)) as pool:
+                results = pool.imap_unordered(
+                    _evaluate_indexed, [(chunk, [candidates[k] for k in chunk]) for chunk in chunks]
+                )
+                remaining = len(chunks)
+                while remaining and not _stopped():
+                    # Short waits so a cancel_event is noticed promptly
+                    try:
+                        chunk, chunk_metrics = results.next(timeout=min(0.25, max(0.0, deadline - time.monotonic())))
+                    except multiprocessing.TimeoutError:
+                        continue
+                    _record(chunk, chunk_metrics)
+                    remaining -= 1
+
+        rows = [
+            {"candidate": k, "params": space[k], "metrics": metrics[k]}
+            for k in sorted(metrics)
+            if metrics[k] is not None
+        ]
+        rows.sort(key=lambda r: r["metrics"].get(target_metric, float("-inf")), reverse=True)
+        best = rows[0] if rows else None
+        return {
+            "optimized_strategy": candidates[best["candidate"]] if best else strategy,
+            "best_params": best["params"] if best else {},
+            "best_metrics": best["metrics"] if best else None,
+            "baseline_metrics": metrics.get(0),
+            "target_metric": target_metric,
+            "parameters": [{"key": s.key, "value": s.value} for s in specs],
+            "results": rows,
+            "evaluated": len(metrics),
+            "candidates": len(candidates),
+            "cancelled": len(metrics) < len(candidates),
+            "elapsed_s": round(time.monotonic() - started, 3),
+        }
@@ -0,0 +1,213 @@
+"""Pillar 4: Multi-symbol portfolio backtesting on an aligned date index."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Mapping
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest_engine import BacktestEngine, Trade, _position_params
+from app.services.feature_engineering import TechnicalFeatures
+from app.services.rule_compiler import required_indicators, rules_mask_panel
+
+
+@dataclass
+class PortfolioTrade(Trade):
+    """Trade record tagged with its symbol."""
+    symbol: str = ""
+
+    def to_dict(self) -> dict[str, Any]:
+        d = super().to_dict()
+        d["symbol"] = self.symbol
+        return d
+
+
+def _panel_frames(ohlcv: pd.DataFrame | Mapping[str, pd.DataFrame]) -> tuple[pd.DataFrame, pd.DataFrame | None]:
+    """(dates x symbols) close and volume frames from a yf.download panel or a dict of OHLCV frames."""
+    if isinstance(ohlcv, pd.DataFrame):
+        if not isinstance(ohlcv.columns, pd.MultiIndex):
+            raise ValueError("Panel DataFrame must have (symbol, field) MultiIndex columns")
+        # yf.download(group_by="ticker") puts fields on level 1; group_by="column" on level 0
+        field_level = 1 if "close" in {str(v).lower() for v in ohlcv.columns.get_level_values(1)} else 0
+        panel = ohlcv.copy()
+        panel.columns = panel.columns.set_levels(
+            [str(v).lower() for v in panel.columns.levels[field_level]], level=field_level
+        )
+        close = panel.xs("close", axis=1, level=field_level)
+        volume = None
+        if "volume" in panel.columns.get_level_values(field_level):
+            volume = panel.xs("volume", axis=1, level=field_level)
+    else:
+        frames = {sym: df.rename(columns=str.lower) for sym, df in ohlcv.items()}
+        close = pd.DataFrame({sym: df["close"] for sym, df in frames.items()})
+        volume = pd.DataFrame({sym: df["volume"] for sym, df in frames.items() if "volume" in df.columns})
+        if volume.shape[1] != close.shape[1]:
+            volume = None
+    close = close.sort_index()
+    close.index = pd.to_datetime(close.index)
+    close = close.dropna(how="all")
+    if volume is not None:
+        volume.index = pd.to_datetime(volume.index)
+    return close, volume
+
+
+class PortfolioBacktestEngine(BacktestEngine):
+    """Run one strategy across a universe of symbols with shared capital.
+
+    All symbols share one aligned date index and every step of the state
+    machine is vectorized across symbols. Exits are processed before entries
+    on each bar. New positions are sized at ``max_position_size`` of current
+    equity, capped by ``max_positions``, available cash and
+    ``asset_allocation.max_total_exposure``. Candidates fill in universe order.
+    """
+
+    def run_portfolio(
+        self,
+        strategy: dict[str, Any],
+        ohlcv: pd.DataFrame | Mapping[str, pd.DataFrame],
+        sentiment_data: pd.DataFrame | None = None,
+    ) -> dict[str, Any]:
+        """Backtest a strategy over a panel; returns one portfolio equity curve."""
+        close_df, volume_df = _panel_frames(ohlcv)
+        if close_df.empty:
+            raise ValueError("No market data for any symbol")
+        rules = [*(strategy.get("entry_rules") or []), *(strategy.get("exit_rules") or [])]
+        features = TechnicalFeatures.calculate_panel_features(close_df, volume_df, required_indicators(rules))
+        if sentiment_data is not None and not sentiment_data.empty:
+            features["sentiment"] = sentiment_data.reindex(index=close_df.index, columns=close_df.columns).ffill()
+        shape = close_df.shape
+        entry_signal = rules_mask_panel(strategy.get("entry_rules", []), features, shape)
+        exit_signal = rules_mask_panel(strategy.get("exit_rules", []), features, shape)
+
+        self.trades = []
+        equity, exposure = self._run_panel(strategy, close_df, entry_signal, exit_signal)
+        self.equity_curve = equity
+        metrics = self._calculate_metrics(equity, close_df)
+        return {
+            "metrics": metrics,
+            "trades": [t.to_dict() for t in self.trades],
+            "equity_curve": equity,
+            "exposure": exposure,
+            "symbols": [str(c) for c in close_df.columns],
+            "strategy": strategy,
+        }
+
+    def _run_panel(
+        self,
+        strategy: dict[str, Any],
+        close_df: pd.DataFrame,
+        entry_signal: np.ndarray,
+        exit_signal: np.ndarray,
+    ) -> tuple[list[float], list[float]]:
+        size, stop_loss, take_profit = _position_params(strategy)
+        alloc = strategy.get("asset_allocation", {}) or {}
+        try:
+            max_positions = strategy.get("max_positions")
+            max_positions = 5 if max_positions is None else int(max_positions)
+            max_exposure = float(alloc.get("max_total_exposure", 1.0))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid portfolio limits: {e}") from e
+        if max_positions < 1:
+            raise ValueError(f"Invalid portfolio limits: max_positions must be at least 1, got {max_positions}")
+
+        price = close_df.to_numpy(dtype=float)
+        tradable = np.isfinite(price) & (price > 0)
+        # Mark held positions at their last known close through data gaps
+        mark = np.nan_to_num(close_df.ffill().to_numpy(dtype=float), nan=0.0)
+        n_bars, n_symbols = price.shape
+
+        cash = float(self.initial_capital)
+        shares = np.zeros(n_symbols, dtype=np.int64)
+        entry_price = np.zeros(n_symbols)
+        cost = np.zeros(n_symbols)
+        entry_bar = np.full(n_symbols, -1, dtype=np.int64)
+        equity = np.empty(n_bars)
+        exposure = np.zeros(n_bars)
+        equity[0] = cash
+        fills: list[tuple[np.ndarray, ...]] = []
+
+        for t in range(1, n_bars):
+            p = price[t]
+            held = shares > 0
+            exited = np.zeros(n_symbols, dtype=bool)
+            if held.any():
+                exited = held & tradable[t] & exit_signal[t]
+                if stop_loss is not None or take_profit is not None:
+                    with np.errstate(invalid="ignore", divide="ignore"):
+                        pnl_pct = (p - entry_price) / np.where(held, entry_price, np.nan)
+                    risk_hit = np.zeros(n_symbols, dtype=bool)
+                    if stop_loss is not None:
+                        risk_hit |= pnl_pct <= -stop_loss
+                    if take_profit is not None:
+                        risk_hit |= pnl_pct >= take_profit
+                    exited |= held & tradable[t] & risk_hit
+                if exited.any():
+                    idx = np.flatnonzero(exited)
+                    exit_price = p[idx] * (1 - self.slippage)
+                    net = shares[idx] * exit_price * (1 - self.commission)
+                    pnl = net - cost[idx]
+                    fills.append((idx, entry_bar[idx], np.full(idx.size, t), entry_price[idx],
+                                  exit_price, shares[idx], pnl, pnl / cost[idx]))
+                    cash += float(net.sum())
+                    shares[idx] = 0
+                    entry_price[idx] = 0.0
+                    cost[idx] = 0.0
+                    entry_bar[idx] = -1
+
+            slots = max_positions - int(np.count_nonzero(shares))
+            if slots > 0:
+                candidates = np.flatnonzero(entry_signal[t] & tradable[t] & (shares == 0) & ~exited)
+                if candidates.size:
+                    held_value = float(shares @ mark[t])
+                    equity_now = cash + held_value
+                    budget = min(cash, max_exposure * equity_now - held_value)
+                    if budget > 0:
+                        px = p[candidates] * (1 + self.slippage)
+                        qty = np.floor(equity_now * size / px).astype(np.int64)
+                        spend = qty * px * (1 + self.commission)
+                        # Greedy in symbol order: names that buy no whole share or no longer fit are
+                        # skipped, so they neither take a slot nor block the candidates after them
+                        accept = np.zeros(candidates.size, dtype=bool)
+                        for i in np.flatnonzero(qty > 0):
+                            if spend[i] <= budget:
+                                accept[i] = True
+                                budget -= spend[i]
+                                slots -= 1
+                                if slots == 0:
+                                    break
+                        if accept.any():
+                            idx = candidates[accept]
+                            shares[idx] = qty[accept]
+                            entry_price[idx] = px[accept]
+                            cost[idx] = spend[accept]
+                            entry_bar[idx] = t
+                            cash -= float(spend[accept].sum())
+
+            held_value = float(shares @ mark[t])
+            equity[t] = cash + held_value
+            exposure[t] = held_value / equity[t] if equity[t] > 0 else 0.0
+
+        self._record_trades(close_df, fills)
+        return equity.tolist(), exposure.tolist()
+
+    def _record_trades(self, close_df: pd.DataFrame, fills: list[tuple[np.ndarray, ...]]) -> None:
+        if not fills:
+            return
+        sym, entry_bar, exit_bar, entry_px, exit_px, qty, pnl, ret = (np.concatenate(c) for c in zip(*fills))
+        symbols = [str(s) for s in close_df.columns[sym]]
+        entry_dates = list(close_df.index[entry_bar])
+        exit_dates = list(close_df.index[exit_bar])
+        self.trades = [
+            PortfolioTrade(
+                entry_date=entry_dates[k],
+                exit_date=exit_dates[k],
+                entry_price=float(entry_px[k]),
+                exit_price=float(exit_px[k]),
+                shares=int(qty[k]),
+                pnl=float(pnl[k]),
+                return_pct=float(ret[k]),
+                symbol=symbols[k],
+            )
+            for k in range(len(symbols))
+        ]
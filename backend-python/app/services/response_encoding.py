@@ -0,0 +1,132 @@
+"""Compact API responses: LTTB downsampling, Arrow IPC encoding and zstd compression.
+
+JSON stays the default. A client sending ``Accept: application/vnd.apache.arrow.stream``
+gets a one-row Arrow table instead: numeric series as packed float32 (or int32)
+lists, record lists such as trades as list<struct> columns, and everything else
+as a JSON string column (field metadata ``encoding=json``). Bodies over
+``min_size`` bytes are zstd-compressed when the client accepts it; gzip is left
+to the app's GZipMiddleware.
+"""
+from __future__ import annotations
+
+import json
+from numbers import Integral, Real
+from typing import Any
+
+import numpy as np
+import pyarrow as pa
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+_JSON_FIELD = {b"encoding": b"json"}
+
+
+def lttb_indices(values: list[float] | np.ndarray, max_points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of ``max_points`` samples that keep the curve's shape.
+
+    The first and last points are always kept; each bucket in between keeps
+    the point forming the largest triangle with the previous pick and the
+    next bucket's mean, so peaks and drawdowns survive.
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    every = (n - 2) / (max_points - 2)
+    picks = np.empty(max_points, dtype=np.int64)
+    picks[0], picks[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = (end + next_end - 1) / 2
+        avg_y = y[end:next_end].mean()
+        xs = np.arange(start, end)
+        area = np.abs((a - avg_x) * (y[start:end] - y[a]) - (a - xs) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        picks[i + 1] = a
+    return picks
+
+
+def downsample_series(payload: dict[str, Any], keys: tuple[str, ...], max_points: int | None) -> dict[str, Any]:
+    """Downsample the per-bar series under ``keys`` at the points LTTB picks from the first one.
+
+    Adds ``<first key>_index`` with the original bar positions; a no-op when
+    ``max_points`` is unset or the series is already short enough.
+    """
+    series = payload.get(keys[0])
+    if not max_points or not series or len(series) <= max_points:
+        return payload
+    picks = lttb_indices(series, max_points)
+    out = dict(payload)
+    for key in keys:
+        if out.get(key) is not None and len(out[key]) == len(series):
+            out[key] = np.asarray(out[key])[picks].tolist()
+    out[f"{keys[0]}_index"] = picks.tolist()
+    return out
+
+
+def _column(value: Any) -> tuple[pa.Array, dict[bytes, bytes] | None]:
+    if isinstance(value, (list, tuple)) and all(isinstance(v, Real) and not isinstance(v, bool) for v in value):
+        kind = pa.int32() if value and all(isinstance(v, Integral) for v in value) else pa.float32()
+        return pa.array([value], type=pa.list_(kind)), None
+    if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+        try:
+            return pa.array([value]), None
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+    return pa.array([json.dumps(value)], type=pa.string()), _JSON_FIELD
+
+
+def encode_arrow(payload: dict[str, Any]) -> bytes:
+    payload = jsonable_encoder(payload)
+    fields, arrays = [], []
+    for key, value in payload.items():
+        array, metadata = _column(value)
+        fields.append(pa.field(key, array.type, metadata=metadata))
+        arrays.append(array)
+    table = pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_arrow(blob: bytes) -> dict[str, Any]:
+    """Inverse of ``encode_arrow`` (for Python clients and tests)."""
+    table = pa.ipc.open_stream(pa.py_buffer(blob)).read_all()
+    out = {}
+    for field, column in zip(table.schema, table.columns):
+        value = column[0].as_py()
+        out[field.name] = json.loads(value) if (field.metadata or {}).get(b"encoding") == b"json" else value
+    return out
+
+
+def _accepts(header: str, token: str) -> bool:
+    for part in header.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip() == token:
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+def encode_response(
+    payload: dict[str, Any],
+    accept: str = "",
+    accept_encoding: str = "",
+    min_size: int = 1024,
+) -> Response:
+    """JSON by default, Arrow IPC when accepted; zstd-compressed above ``min_size`` when accepted."""
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if _accepts(accept, ARROW_STREAM):
+        body, media_type = encode_arrow(payload), ARROW_STREAM
+    else:
+        rendered = JSONResponse(jsonable_encoder(payload))
+        body, media_type = rendered.body, rendered.media_type
+    if len(body) >= min_size and _accepts(accept_encoding, "zstd"):
+        body = pa.Codec("zstd").compress(body, asbytes=True)
+        headers["Content-Encoding"] = "zstd"
+    return Response(body, media_type=media_type, headers=headers)
@@ -0,0 +1,381 @@
+"""Pillar 4: Compile strategy rule strings into vectorized boolean masks."""
+from __future__ import annotations
+
+import ast
+import operator
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from app.services.feature_engineering import parse_indicator
+
+# Rule variable -> (feature column, default when NaN, default when the column is missing).
+# A missing-column default of None makes the rule false, as an unknown name did under eval.
+RULE_VARIABLES: dict[str, tuple[str, float, float | None]] = {
+    "rsi": ("rsi", 50.0, None),
+    "macd": ("macd", 0.0, None),
+    "macd_signal": ("macd_signal", 0.0, None),
+    "macd_diff": ("macd_diff", 0.0, None),
+    "sma_20": ("sma_20", 0.0, None),
+    "sma_50": ("sma_50", 0.0, None),
+    "bb_high": ("bb_high", 0.0, None),
+    "bb_low": ("bb_low", 0.0, None),
+    "volume_ratio": ("volume_ratio", 0.0, None),
+    "sentiment_score": ("sentiment", 0.5, 0.5),
+}
+
+
+def rule_variable(name: str) -> tuple[str, float, float | None] | None:
+    """RULE_VARIABLES entry, or one for a windowed indicator such as ``rsi_7`` or ``sma_200``."""
+    spec = RULE_VARIABLES.get(name)
+    if spec is None:
+        parsed = parse_indicator(name)
+        if parsed is not None and parsed[1] is not None:
+            spec = (name, 50.0 if parsed[0] == "rsi" else 0.0, None)
+    return spec
+
+_COMPARE_OPS: dict[type, Callable[[Any, Any], Any]] = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+_BIN_OPS: dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+_FUNCTIONS = ("abs", "min", "max")
+
+# A compiled node maps resolved columns to (values, invalid rows or None).
+# Invalid rows are those where the old eval path raised (division by zero,
+# non-finite indicator values) and therefore evaluated to False.
+_Node = Callable[[Mapping[str, np.ndarray]], "tuple[Any, np.ndarray | None]"]
+
+
+class RuleCompileError(ValueError):
+    """Rule text is not a supported expression."""
+
+
+def _merge(a: np.ndarray | None, b: np.ndarray | None) -> np.ndarray | None:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a | b
+
+
+def _truthy(value: Any) -> Any:
+    return np.asarray(value) != 0
+
+
+def _compile_node(node: ast.AST, names: set[str]) -> _Node:
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body, names)
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise RuleCompileError(f"Unsupported literal: {node.value!r}")
+        const = float(node.value)
+        return lambda cols: (const, None)
+    if isinstance(node, ast.Name):
+        if rule_variable(node.id) is None:
+            raise RuleCompileError(f"Unknown indicator: {node.id}")
+        name = node.id
+        names.add(name)
+
+        def _load(cols: Mapping[str, np.ndarray]) -> tuple[Any, np.ndarray | None]:
+            values = cols[name]
+            bad = ~np.isfinite(values)
+            return values, bad if bad.any() else None
+
+        return _load
+    if isinstance(node, ast.UnaryOp):
+        inner = _compile_node(node.operand, names)
+        if isinstance(node.op, ast.UAdd):
+            return inner
+        if not isinstance(node.op, (ast.Not, ast.USub)):
+            raise RuleCompileError(f"Unsupported unary operator: {type(node.op).__name__}")
+        negate = isinstance(node.op, ast.Not)
+
+        def _unary(cols: Mapping[str, np.ndarray]) -> tuple[Any, np.ndarray | None]:
+            value, invalid = inner(cols)
+            if negate:
+                return ~_truthy(value), invalid
+            return -np.asarray(value, dtype=float), invalid
+
+        return _unary
+    if isinstance(node, ast.BinOp):
+        op = _BIN_OPS.get(type(node.op))
+        if op is None:
+            raise RuleCompileError(f"Unsupported operator: {type(node.op).__name__}")
+        left = _compile_node(node.left, names)
+        right = _compile_node(node.right, names)
+        is_div = isinstance(node.op, ast.Div)
+
+        def _binop(cols: Mapping[str, np.ndarray]) -> tuple[Any, np.ndarray | None]:
+            lv, linv = left(cols)
+            rv, rinv = right(cols)
+            lv = np.asarray(lv, dtype=float)
+            rv = np.asarray(rv, dtype=float)
+            invalid = _merge(linv, rinv)
+            if is_div:
+                zero = rv == 0
+                if np.any(zero):
+                    invalid = _merge(invalid, np.broadcast_to(zero, np.broadcast(lv, rv).shape))
+            with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                return op(lv, rv), invalid
+
+        return _binop
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_node(v, names) for v in node.values]
+        is_and = isinstance(node.op, ast.And)
+
+        def _boolop(cols: Mapping[str, np.ndarray]) -> tuple[Any, np.ndarray | None]:
+            # Python short-circuits and returns the deciding operand; mirror both.
+            value, invalid = parts[0](cols)
+            for part in parts[1:]:
+                truth = _truthy(value)
+                reached = truth if is_and else ~truth
+                if invalid is not None:
+                    reached = reached & ~invalid
+                nxt, ninv = part(cols)
+                value = np.where(reached, nxt, value)
+                if ninv is not None:
+                    invalid = _merge(invalid, reached & ninv)
+            return value, invalid
+
+        return _boolop
+    if isinstance(node, ast.Compare):
+        first = _compile_node(node.left, names)
+        ops = []
+        for op_node, comp in zip(node.ops, node.comparators):
+            op = _COMPARE_OPS.get(type(op_node))
+            if op is None:
+                raise RuleCompileError(f"Unsupported comparison: {type(op_node).__name__}")
+            ops.append((op, _compile_node(comp, names)))
+
+        def _compare(cols: Mapping[str, np.ndarray]) -> tuple[Any, np.ndarray | None]:
+            left, invalid = first(cols)
+            result: Any = True
+            alive: Any = True if invalid is None else ~invalid
+            for op, comp in ops:
+                right, rinv = comp(cols)
+                if rinv is not None:
+                    invalid = _merge(invalid, alive & rinv)
+                hit = op(left, right)
+                result = result & hit
+                alive = alive & hit if rinv is None else alive & hit & ~rinv
+                left = right
+            return np.asarray(result), invalid
+
+        return _compare
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS or node.keywords:
+            raise RuleCompileError("Only abs(), min() and max() calls are supported")
+        args = [_compile_node(a, names) for a in node.args]
+        func = node.func.id
+        if (func == "abs" and len(args) != 1) or (func != "abs" and len(args) < 2):
+            raise RuleCompileError(f"Wrong number of arguments to {func}()")
+
+        def _call(cols: Mapping[str, np.ndarray]) -> tuple[Any, np.ndarray | None]:
+            evaluated = [a(cols) for a in args]
+            invalid = None
+            for _, inv in evaluated:
+                invalid = _merge(invalid, inv)
+            values = [np.asarray(v, dtype=float) for v, _ in evaluated]
+            if func == "abs":
+                return np.abs(values[0]), invalid
+            reducer = np.minimum if func == "min" else np.maximum
+            return reducer.reduce(np.broadcast_arrays(*values)), invalid
+
+        return _call
+    raise RuleCompileError(f"Unsupported expression: {type(node).__name__}")
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """A parsed rule that evaluates over whole feature columns at once."""
+
+    source: str
+    names: frozenset[str]
+    _root: _Node
+
+    def evaluate(self, columns: Mapping[str, np.ndarray | None], shape: int | tuple[int, ...]) -> np.ndarray:
+        """Boolean mask of bars (or a bars x symbols panel) where the rule holds."""
+        if any(columns.get(n) is None for n in self.names):
+            return np.zeros(shape, dtype=bool)
+        value, invalid = self._root(columns)  # type: ignore[arg-type]
+        mask = np.broadcast_to(_truthy(value), shape).copy()
+        if invalid is not None:
+            mask &= ~np.broadcast_to(invalid, shape)
+        return mask
+
+
+def compile_rule(rule: str) -> CompiledRule:
+    """Parse a rule once into a safe expression tree (cached by rule text)."""
+    # Checked before the cache: lists and dicts are unhashable, numbers have no .strip()
+    if rule is not None and not isinstance(rule, str):
+        raise RuleCompileError(f"Rule must be a string, got {type(rule).__name__}")
+    return _compile_text(rule)
+
+
+@lru_cache(maxsize=2048)
+def _compile_text(rule: str | None) -> CompiledRule:
+    text = (rule or "").strip().lower()
+    if not text:
+        raise RuleCompileError("Empty rule")
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError as e:
+        raise RuleCompileError(f"Invalid rule syntax: {rule!r}") from e
+    names: set[str] = set()
+    root = _compile_node(tree, names)
+    return CompiledRule(source=rule, names=frozenset(names), _root=root)
+
+
+def _try_compile(rule: str) -> CompiledRule | None:
+    try:
+        return compile_rule(rule)
+    except RuleCompileError:
+        return None
+
+
+def feature_columns(data: pd.DataFrame, names: Iterable[str]) -> dict[str, np.ndarray | None]:
+    """Resolve rule variables to float arrays with the rule NaN defaults applied."""
+    cols: dict[str, np.ndarray | None] = {}
+    for name in names:
+        column, nan_default, missing_default = rule_variable(name)
+        if column in data.columns:
+            values = data[column].to_numpy(dtype=float, na_value=np.nan)
+            cols[name] = np.where(np.isnan(values), nan_default, values)
+        elif missing_default is not None:
+            cols[name] = np.full(len(data), missing_default)
+        else:
+            cols[name] = None
+    return cols
+
+
+def row_columns(row: pd.Series, names: Iterable[str]) -> dict[str, np.ndarray | None]:
+    """Resolve rule variables for a single bar (used by live signal checks)."""
+    cols: dict[str, np.ndarray | None] = {}
+    for name in names:
+        column, nan_default, missing_default = rule_variable(name)
+        if column in row.index:
+            val = row[column]
+            try:
+                val = nan_default if pd.isna(val) else float(val)
+            except (TypeError, ValueError):
+                cols[name] = None
+                continue
+            cols[name] = np.array([val])
+        elif missing_default is not None:
+            cols[name] = np.array([missing_default])
+        else:
+            cols[name] = None
+    return cols
+
+
+def required_indicators(rules: Iterable[str]) -> list[str]:
+    """Feature columns the valid rules read, for TechnicalFeatures.calculate_features."""
+    names: set[str] = set()
+    for compiled in (_try_compile(r) for r in rules or []):
+        if compiled is not None:
+            names |= compiled.names
+    columns = {rule_variable(n)[0] for n in names}
+    columns.discard("sentiment")
+    return sorted(columns)
+
+
+def uses_sentiment(rules: Iterable[str]) -> bool:
+    """True if any valid rule reads ``sentiment_score``."""
+    return any(
+        compiled is not None and any(rule_variable(n)[0] == "sentiment" for n in compiled.names)
+        for compiled in (_try_compile(r) for r in rules or [])
+    )
+
+
+def evaluate_rule_row(rule: str, row: pd.Series) -> bool:
+    """Evaluate one rule on one bar; unsupported rules are false."""
+    compiled = _try_compile(rule)
+    if compiled is None:
+        return False
+    return bool(compiled.evaluate(row_columns(row, compiled.names), 1)[0])
+
+
+def rules_mask(rules: Iterable[str], data: pd.DataFrame) -> np.ndarray:
+    """OR of all rules over every bar of the feature frame."""
+    compiled = [c for c in (_try_compile(r) for r in rules or []) if c is not None]
+    mask = np.zeros(len(data), dtype=bool)
+    if not compiled:
+        return mask
+    names: set[str] = set().union(*(c.names for c in compiled))
+    cols = feature_columns(data, names)
+    for c in compiled:
+        mask |= c.evaluate(cols, len(data))
+    return mask
+
+
+def rules_mask_matrix(rule_sets: list[list[str]], data: pd.DataFrame) -> np.ndarray:
+    """Stack the OR-mask of each rule set as a column: shape (bars, len(rule_sets)).
+
+    Feature columns are resolved once for the union of variables, and each
+    distinct rule text is evaluated once however many strategies share it.
+    """
+    n = len(data)
+    out = np.zeros((n, len(rule_sets)), dtype=bool, order="F")
+    compiled_sets = [[c for c in (_try_compile(r) for r in rules or []) if c is not None] for rules in rule_sets]
+    names: set[str] = set()
+    for compiled in compiled_sets:
+        for c in compiled:
+            names |= c.names
+    cols = feature_columns(data, names)
+    by_text: dict[str, np.ndarray] = {}
+    for k, compiled in enumerate(compiled_sets):
+        for c in compiled:
+            mask = by_text.get(c.source)
+            if mask is None:
+                mask = by_text[c.source] = c.evaluate(cols, n)
+            out[:, k] |= mask
+    return out
+
+
+def panel_columns(
+    features: Mapping[str, pd.DataFrame],
+    names: Iterable[str],
+    shape: tuple[int, int],
+) -> dict[str, np.ndarray | None]:
+    """Resolve rule variables to (dates x symbols) arrays from a panel of feature frames."""
+    cols: dict[str, np.ndarray | None] = {}
+    for name in names:
+        column, nan_default, missing_default = rule_variable(name)
+        if column in features:
+            values = features[column].to_numpy(dtype=float, na_value=np.nan)
+            cols[name] = np.where(np.isnan(values), nan_default, values)
+        elif missing_default is not None:
+            cols[name] = np.full(shape, missing_default)
+        else:
+            cols[name] = None
+    return cols
+
+
+def rules_mask_panel(
+    rules: Iterable[str],
+    features: Mapping[str, pd.DataFrame],
+    shape: tuple[int, int],
+) -> np.ndarray:
+    """OR of all rules over a (dates x symbols) panel of feature frames."""
+    compiled = [c for c in (_try_compile(r) for r in rules or []) if c is not None]
+    mask = np.zeros(shape, dtype=bool)
+    if not compiled:
+        return mask
+    names: set[str] = set().union(*(c.names for c in compiled))
+    cols = panel_columns(features, names, shape)
+    for c in compiled:
+        mask |= c.evaluate(cols, shape)
+    return mask
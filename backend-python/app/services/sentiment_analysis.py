@@ -1,78 +1,272 @@
 """Pillar 2: Sentiment analysis (FinBERT optional; fallback to rule-based)."""
 from __future__ import annotations
 
-from typing import Any
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Mapping
 
 import numpy as np
 
+FINBERT_MODEL = "ProsusAI/finbert"
+# Characters of each article that are scored (FinBERT truncates to 512 tokens anyway)
+MAX_TEXT_CHARS = 2000
+
+
+# Word (or phrase) -> weight; positive weights are bullish, negative bearish
+DEFAULT_FINANCIAL_LEXICON: dict[str, float] = {
+    **dict.fromkeys([
+        "surge", "surges", "surged", "surging", "gain", "gains", "gained", "rise", "rises", "rose", "rising",
+        "rally", "rallies", "rallied", "bull", "bulls", "bullish", "growth", "grow", "grows", "grew", "growing",
+        "beat", "beats", "profit", "profits", "profitable", "upgrade", "upgrades", "upgraded", "outperform",
+        "outperforms", "strong", "stronger", "rebound", "rebounds", "rebounded", "jump", "jumps", "jumped",
+        "buyback", "dividend", "raises guidance", "beat estimates", "tops estimates",
+    ], 1.0),
+    **dict.fromkeys(["soar", "soars", "soared", "record high", "all-time high"], 1.5),
+    **dict.fromkeys([
+        "fall", "falls", "fell", "falling", "drop", "drops", "dropped", "loss", "losses", "lose", "loses",
+        "bear", "bears", "bearish", "decline", "declines", "declined", "declining", "miss", "misses", "missed",
+        "cut", "cuts", "downgrade", "downgrades", "downgraded", "underperform", "weak", "weaker", "slump",
+        "slumps", "slumped", "lawsuit", "probe", "recall", "layoffs", "lowers guidance", "misses estimates",
+    ], -1.0),
+    **dict.fromkeys(["plunge", "plunges", "plunged", "crash", "crashes", "crashed", "bankruptcy", "default", "fraud"], -1.5),
+}
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+
+class LexiconScorer:
+    """Rule-based sentiment from a weighted lexicon in one tokenizing pass per text.
+
+    Text is split on word boundaries, so "cut" no longer matches inside
+    "execute". Multi-word entries ("beat estimates") are matched as phrases.
+    Scores keep the fallback's scale: positive and negative are each side's
+    share of the matched weight, compound is their difference.
+    """
+
+    def __init__(self, lexicon: Mapping[str, float] | None = None) -> None:
+        self.lexicon = {" ".join(_TOKEN.findall(k.lower())): float(v) for k, v in (lexicon or DEFAULT_FINANCIAL_LEXICON).items()}
+        self.lexicon.pop("", None)
+        # Token -> (single-word weight, phrases starting with it as token tuples, longest first)
+        self._entries: dict[str, tuple[float, list[tuple[tuple[str, ...], float]]]] = {}
+        for entry, weight in sorted(self.lexicon.items(), key=lambda kv: -len(kv[0].split())):
+            tokens = tuple(entry.split())
+            word_weight, phrases = self._entries.get(tokens[0], (0.0, []))
+            if len(tokens) == 1:
+                word_weight = weight
+            else:
+                phrases.append((tokens, weight))
+            self._entries[tokens[0]] = (word_weight, phrases)
+        self.name = "lexicon:" + hashlib.blake2b(
+            json.dumps(self.lexicon, sort_keys=True).encode(), digest_size=8
+        ).hexdigest()
+
+    @classmethod
+    def from_file(cls, path: str) -> LexiconScorer:
+        """Load a JSON object of ``{"word or phrase": weight}``."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def masses(self, texts: list[str]) -> np.ndarray:
+        """(n, 2) array of matched positive and negative weight per text."""
+        out: list[tuple[float, float]] = []
+        lookup, findall = self._entries.get, _TOKEN.findall
+        for text in texts:
+            tokens = findall((text or "").lower())
+            pos = neg = 0.0
+            skip_to = 0
+            for i, token in enumerate(tokens):
+                entry = lookup(token)
+                if entry is None or i < skip_to:
+                    continue
+                weight, phrases = entry
+                for phrase, phrase_weight in phrases:
+                    if tuple(tokens[i:i + len(phrase)]) == phrase:
+                        weight, skip_to = phrase_weight, i + len(phrase)
+                        break
+                if weight > 0:
+                    pos += weight
+                else:
+                    neg -= weight
+            out.append((pos, neg))
+        return np.array(out, dtype=float).reshape(len(texts), 2)
+
+    def compound(self, texts: list[str]) -> np.ndarray:
+        """Compound score per text in [-1, 1] (0 when nothing matched)."""
+        m = self.masses(texts)
+        return (m[:, 0] - m[:, 1]) / (m.sum(axis=1) + 1e-6)
+
+    def score_batch(self, texts: list[str]) -> list[dict[str, float]]:
+        m = self.masses(texts)
+        total = m.sum(axis=1) + 1e-6
+        pos, neg = m[:, 0] / total, m[:, 1] / total
+        return [
+            {"positive": float(p), "negative": float(n), "neutral": float(1 - p - n), "compound": float(p - n)}
+            for p, n in zip(pos, neg)
+        ]
+
+
+_DEFAULT_SCORER = LexiconScorer()
+
 
 def _rule_based_sentiment(text: str) -> dict[str, float]:
     """Simple rule-based sentiment when FinBERT not available."""
-    text_lower = (text or "").lower()
-    positive = sum(1 for w in ["surge", "gain", "rise", "bull", "growth", "beat", "profit"] if w in text_lower)
-    negative = sum(1 for w in ["fall", "drop", "loss", "bear", "decline", "miss", "cut"] if w in text_lower)
-    total = positive + negative + 1e-6
-    pos_score = positive / total
-    neg_score = negative / total
-    return {
-        "positive": float(pos_score),
-        "negative": float(neg_score),
-        "neutral": float(1 - pos_score - neg_score),
-        "compound": float(pos_score - neg_score),
-    }
+    return _DEFAULT_SCORER.score_batch([text])[0]
+
+
+def plan_batches(lengths: list[int], max_batch_size: int, max_batch_tokens: int) -> list[list[int]]:
+    """Group text indices into padded batches.
+
+    Texts are sorted by token length so each batch pads to a similar length;
+    a batch closes when it reaches ``max_batch_size`` texts or when padding
+    every member to its longest would exceed ``max_batch_tokens``.
+    """
+    batches: list[list[int]] = []
+    batch: list[int] = []
+    longest = 0
+    for i in sorted(range(len(lengths)), key=lambda j: lengths[j]):
+        width = max(longest, lengths[i])
+        if batch and (len(batch) >= max_batch_size or width * (len(batch) + 1) > max_batch_tokens):
+            batches.append(batch)
+            batch, width = [], lengths[i]
+        batch.append(i)
+        longest = width
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class _SentimentCache:
+    """Bounded LRU of scores keyed by a hash of the scored text."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0}
+        self._items: OrderedDict[str, dict[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict[str, float] | None:
+        with self._lock:
+            scores = self._items.get(key)
+            if scores is None:
+                self.stats["misses"] += 1
+                return None
+            self._items.move_to_end(key)
+            self.stats["hits"] += 1
+            return scores
+
+    def put(self, key: str, scores: dict[str, float]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._items[key] = scores
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def info(self) -> dict[str, Any]:
+        return {**self.stats, "size": len(self._items), "max_entries": self.max_entries}
 
 
 class FinancialSentimentAnalyzer:
-    """Analyze financial text sentiment. Uses FinBERT if available else rule-based."""
+    """Analyze financial text sentiment. Uses FinBERT if available else rule-based.
 
-    def __init__(self, use_finbert: bool = False) -> None:
+    FinBERT runs as padded batches (see ``plan_batches``) under
+    ``torch.inference_mode``. Scores are cached by text hash, so an article
+    seen in an earlier request (overlapping date ranges, other symbols) is
+    not scored again.
+    """
+
+    def __init__(
+        self,
+        use_finbert: bool = False,
+        max_batch_size: int = 32,
+        max_batch_tokens: int = 8192,
+        num_threads: int | None = None,
+        cache_size: int = 20_000,
+        lexicon: LexiconScorer | None = None,
+    ) -> None:
+        self.lexicon = lexicon or _DEFAULT_SCORER
         self._model = None
         self._tokenizer = None
         self._use_finbert = use_finbert
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_tokens = max(1, max_batch_tokens)
+        self.cache = _SentimentCache(cache_size)
         if use_finbert:
             try:
                 from transformers import AutoModelForSequenceClassification, AutoTokenizer
                 import torch
-                self._tokenizer = AutoTokenizer.from_pretrained("ProsusAI/finbert")
-                self._model = AutoModelForSequenceClassification.from_pretrained("ProsusAI/finbert")
+                if num_threads:
+                    # Cap intra-op threads so several workers on one node do not oversubscribe the CPU
+                    torch.set_num_threads(num_threads)
+                self._tokenizer = AutoTokenizer.from_pretrained(FINBERT_MODEL)
+                self._model = AutoModelForSequenceClassification.from_pretrained(FINBERT_MODEL)
                 self._model.eval()
                 self._torch = torch
+                id2label = getattr(self._model.config, "id2label", None) or {0: "positive", 1: "negative", 2: "neutral"}
+                self._labels = {str(label).lower(): int(i) for i, label in id2label.items()}
             except Exception:
                 self._use_finbert = False
 
+    @property
+    def scorer(self) -> str:
+        return FINBERT_MODEL if self._use_finbert and self._model is not None else self.lexicon.name
+
+    def _key(self, text: str) -> str:
+        return hashlib.blake2b(f"{self.scorer}\0{text}".encode(), digest_size=16).hexdigest()
+
     def analyze_sentiment(self, text: str) -> dict[str, float]:
         """Single text sentiment."""
-        if self._use_finbert and self._model is not None:
-            inputs = self._tokenizer(
-                text[:2000],
-                return_tensors="pt",
-                truncation=True,
-                max_length=512,
-            )
-            with self._torch.no_grad():
-                out = self._model(**inputs)
-                probs = self._torch.nn.functional.softmax(out.logits, dim=-1)
-            scores = probs[0].tolist()
-            return {
-                "positive": scores[0],
-                "negative": scores[1],
-                "neutral": scores[2],
-                "compound": scores[0] - scores[1],
-            }
-        return _rule_based_sentiment(text)
+        return self.analyze_batch([text])[0]
 
     def analyze_batch(self, texts: list[str]) -> list[dict[str, float]]:
-        """Batch sentiment."""
-        return [self.analyze_sentiment(t) for t in texts]
+        """Batch sentiment; cached texts and repeats within the batch are scored once."""
+        texts = [t or "" for t in texts]
+        keys = [self._key(t) for t in texts]
+        out: list[dict[str, float] | None] = [self.cache.get(k) for k in keys]
+        pending: dict[str, str] = {}
+        for key, text, scores in zip(keys, texts, out):
+            if scores is None:
+                pending.setdefault(key, text)
+        if pending:
+            if self.scorer == FINBERT_MODEL:
+                scored = self._finbert_batch(list(pending.values()))
+            else:
+                scored = self.lexicon.score_batch(list(pending.values()))
+            fresh = dict(zip(pending, scored))
+            for key, scores in fresh.items():
+                self.cache.put(key, scores)
+            out = [scores if scores is not None else fresh[key] for key, scores in zip(keys, out)]
+        return [dict(s) for s in out]
+
+    def _finbert_batch(self, texts: list[str]) -> list[dict[str, float]]:
+        encoded = self._tokenizer([t[:MAX_TEXT_CHARS] for t in texts], truncation=True, max_length=512)
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+        results: list[dict[str, float] | None] = [None] * len(texts)
+        pos, neg, neu = self._labels["positive"], self._labels["negative"], self._labels["neutral"]
+        for batch in plan_batches(lengths, self.max_batch_size, self.max_batch_tokens):
+            features = [{name: encoded[name][i] for name in encoded.keys()} for i in batch]
+            inputs = self._tokenizer.pad(features, padding=True, return_tensors="pt")
+            with self._torch.inference_mode():
+                probs = self._torch.nn.functional.softmax(self._model(**inputs).logits, dim=-1).tolist()
+            for i, p in zip(batch, probs):
+                results[i] = {
+                    "positive": p[pos],
+                    "negative": p[neg],
+                    "neutral": p[neu],
+                    "compound": p[pos] - p[neg],
+                }
+        return results
 
     def aggregate_news_sentiment(self, news_articles: list[dict[str, Any]]) -> dict[str, float]:
         """Aggregate sentiment from news list (each has title, description)."""
         if not news_articles:
             return {"positive": 0.33, "negative": 0.33, "neutral": 0.34, "compound": 0.0, "article_count": 0}
-        sentiments = [
-            self.analyze_sentiment(f"{a.get('title', '')}. {a.get('description', '')}")
-            for a in news_articles
-        ]
+        sentiments = self.analyze_batch(
+            [f"{a.get('title', '')}. {a.get('description', '')}" for a in news_articles]
+        )
         return {
             "positive": float(np.mean([s["positive"] for s in sentiments])),
             "negative": float(np.mean([s["negative"] for s in sentiments])),
@@ -0,0 +1,154 @@
+"""Pillar 2: Historical daily news sentiment per symbol, persisted for backtests."""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from app.config import Settings
+from app.services.executors import run_io
+from app.services.news_data import NewsService
+from app.services.ohlcv_store import OHLCVStore
+from app.services.sentiment_analysis import FinancialSentimentAnalyzer
+
+# Neutral value of the backtester's 0..1 ``sentiment`` column (what sentiment_score reads)
+NEUTRAL_SENTIMENT = 0.5
+
+
+def _article_text(article: dict[str, Any]) -> str:
+    return f"{article.get('title', '')}. {article.get('description', '')}"
+
+
+class SentimentHistoryService:
+    """Daily sentiment series: fetch news per day, score in batches, persist, reuse.
+
+    Series are kept in an ``OHLCVStore`` (one Arrow file per symbol and scorer,
+    with the contiguous covered range), so a later run only fetches and scores
+    days outside that range. Each day's ``sentiment`` is the mean compound
+    score of its articles mapped to 0..1; days without articles are NaN and
+    ``bar_sentiment`` carries the last value over them. Today is never marked covered, and a day
+    whose fetch fails ends the covered range so it is retried next time.
+    """
+
+    def __init__(
+        self,
+        analyzer: FinancialSentimentAnalyzer,
+        news: NewsService | None = None,
+        store: OHLCVStore | None = None,
+        settings: Settings | None = None,
+        concurrency: int | None = None,
+        articles_per_day: int | None = None,
+    ) -> None:
+        self.settings = settings or Settings()
+        self.analyzer = analyzer
+        self.news = news or NewsService(self.settings)
+        self.store = store or OHLCVStore(Path(self.settings.data_dir) / "sentiment")
+        self.concurrency = max(1, concurrency or self.settings.sentiment_fetch_concurrency)
+        self.articles_per_day = articles_per_day or self.settings.sentiment_articles_per_day
+
+    @property
+    def source(self) -> str:
+        """Identifies the series (scorer included) for cache keys and store files."""
+        return f"news:{self.analyzer.scorer}"
+
+    @property
+    def available(self) -> bool:
+        return bool(self.news.settings.news_api_key)
+
+    async def daily_sentiment(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """``sentiment`` and ``article_count`` per day over [start_date, end_date)."""
+        start = pd.Timestamp(start_date).normalize()
+        end = pd.Timestamp(end_date).normalize()
+        if end <= start or not self.available:
+            return pd.DataFrame(columns=["sentiment", "article_count"])
+        interval = f"1d-{self.analyzer.scorer}"
+        stored, covered = await run_io(self.store.read, symbol, interval)
+        gaps: list[tuple[pd.Timestamp, pd.Timestamp, bool]] = []  # (start, end, extends coverage backwards)
+        if covered is None:
+            gaps.append((start, end, False))
+        else:
+            if start < covered[0]:
+                gaps.append((start, covered[0], True))
+            if end > covered[1]:
+                gaps.append((covered[1], end, False))
+        if gaps:
+            today = pd.Timestamp.now(tz="UTC").tz_localize(None).normalize()
+            new_start, new_end = covered if covered is not None else (None, None)
+            frames = [stored] if not stored.empty else []
+            for gap_start, gap_end, backwards in gaps:
+                days = pd.date_range(gap_start, min(gap_end, today + pd.Timedelta(days=1)), freq="D", inclusive="left")
+                fetched, failed = await self._ingest(symbol, days)
+                if not fetched.empty:
+                    frames.append(fetched)
+                days = days[days < today]
+                if backwards:
+                    # Coverage must stay contiguous with what is stored: keep the days after the last failure
+                    ok = days[days > max(failed)] if failed else days
+                    if len(ok) and ok[-1] + pd.Timedelta(days=1) == new_start:
+                        new_start = ok[0]
+                else:
+                    ok = days[days < min(failed)] if failed else days
+                    if len(ok) and (new_end is None or ok[0] == new_end):
+                        new_start = ok[0] if new_start is None else new_start
+                        new_end = ok[-1] + pd.Timedelta(days=1)
+            if frames:
+                merged = pd.concat(frames)
+                stored = merged[~merged.index.duplicated(keep="last")].sort_index()
+                if new_start is not None and new_end is not None and new_end > new_start:
+                    await run_io(self.store.write, symbol, interval, stored, (new_start, new_end))
+        if stored.empty:
+            return stored
+        return stored.loc[(stored.index >= start) & (stored.index < end)]
+
+    async def _ingest(self, symbol: str, days: pd.DatetimeIndex) -> tuple[pd.DataFrame, list[pd.Timestamp]]:
+        """Fetch every day's articles (bounded concurrency), then score them all in one batch."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _fetch(day: pd.Timestamp) -> list[dict[str, Any]] | None:
+            async with semaphore:
+                try:
+                    iso = day.strftime("%Y-%m-%d")
+                    return await self.news.fetch_news(
+                        query=symbol, from_date=iso, to_date=iso, page_size=self.articles_per_day
+                    )
+                except Exception:
+                    return None
+
+        per_day = await asyncio.gather(*(_fetch(day) for day in days))
+        failed = [day for day, articles in zip(days, per_day) if articles is None]
+        done = [(day, articles) for day, articles in zip(days, per_day) if articles is not None]
+        if not done:
+            return pd.DataFrame(columns=["sentiment", "article_count"]), failed
+        texts = [_article_text(a) for _, articles in done for a in articles]
+        scores = await run_io(self.analyzer.analyze_batch, texts) if texts else []
+        compound = np.array([s["compound"] for s in scores], dtype=float)
+        sentiment, counts, offset = [], [], 0
+        for _, articles in done:
+            n = len(articles)
+            sentiment.append((compound[offset:offset + n].mean() + 1) / 2 if n else np.nan)
+            counts.append(n)
+            offset += n
+        frame = pd.DataFrame(
+            {"sentiment": sentiment, "article_count": counts},
+            index=pd.DatetimeIndex([day for day, _ in done], name="date"),
+        )
+        return frame, failed
+
+
+def bar_sentiment(daily: pd.DataFrame, bars: pd.DatetimeIndex) -> pd.DataFrame:
+    """Align a daily series to trading bars for the backtester, without look-ahead.
+
+    Bar ``D`` sees news published up to the end of ``D - 1`` (a day's articles
+    can arrive after the close), and days without articles, weekends
+    included, carry the last known value forward.
+    """
+    if "sentiment" in daily.columns:
+        series = daily["sentiment"].astype(float).dropna()
+    else:
+        series = pd.Series(dtype=float, index=pd.DatetimeIndex([]))
+    series.index = series.index + pd.Timedelta(days=1)
+    aligned = series.reindex(series.index.union(bars)).ffill().reindex(bars)
+    return pd.DataFrame({"sentiment": aligned.fillna(NEUTRAL_SENTIMENT).to_numpy()}, index=bars)
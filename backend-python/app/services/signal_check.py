@@ -9,6 +9,8 @@ import pandas as pd
 from app.services.backtest_engine import BacktestEngine
 from app.services.feature_engineering import TechnicalFeatures
 from app.services.market_data import MarketDataService
+from app.services.rule_compiler import required_indicators
+from app.services.streaming_indicators import STREAM_COLUMNS, IndicatorStreams
 
 # Indicator keys used in rule evaluation (exposed for API/frontend)
 INDICATOR_KEYS = [
@@ -16,45 +18,84 @@ INDICATOR_KEYS = [
     "sma_20", "sma_50", "bb_high", "bb_low", "volume_ratio", "close",
 ]
 
+# Per-process indicator state for live checks: a symbol is warmed up from
+# history on its first check and then only advanced by the new bars.
+LIVE_STREAMS = IndicatorStreams()
+_STREAM_ROW_INDEX = pd.Index([*STREAM_COLUMNS, "sentiment"])
 
-async def check_entry_exit_signals(
-    strategy: dict[str, Any],
+
+async def _streamed_rows(
+    streams: IndicatorStreams,
+    market_svc: MarketDataService,
     symbol: str,
+    start: str,
+    end: str,
+) -> tuple[pd.Series, pd.Series] | None:
+    """Latest two indicator rows from the symbol's stream, fetching only bars it has not seen."""
+    stream = streams.get(symbol)
+    if stream is None or stream.timestamp is None:
+        df = await market_svc.fetch_ohlcv_frame(symbol, start, end)
+        if df.empty:
+            return None
+        stream = streams.warm_up(symbol, df)
+    else:
+        # Re-read the latest bar too, in case it was still forming last time
+        df = await market_svc.fetch_ohlcv_frame(symbol, stream.timestamp.strftime("%Y-%m-%d"), end)
+        if not df.empty:
+            stream.warm_up(df)
+    if stream.bars < 2:
+        return None
+    # Reuse one index; building Series from dicts dominates a scan of thousands of symbols
+    current = pd.Series(
+        [*(stream.current[c] for c in STREAM_COLUMNS), 0.5], index=_STREAM_ROW_INDEX, name=stream.timestamp
+    )
+    prev = pd.Series([*(stream.previous[c] for c in STREAM_COLUMNS), 0.5], index=_STREAM_ROW_INDEX)
+    return current, prev
+
+
+async def latest_rows(
+    symbol: str,
+    indicators: list[str],
+    market_svc: MarketDataService,
     days_lookback: int = 60,
-) -> Tuple[bool, bool, dict[str, Any]]:
-    """
-    Fetch recent data, compute features, and check if entry/exit conditions
-    match on the latest bar. Returns (entry_matched, exit_matched, current_values).
+    streams: IndicatorStreams | None = LIVE_STREAMS,
+) -> tuple[pd.Series, pd.Series] | None:
+    """(current, previous) feature rows for the latest bar, or None without enough data.
+
+    Indicators come from ``streams`` (O(1) per new bar) unless a rule needs a
+    column the streams do not track, such as ``rsi_7``; then, or with
+    ``streams=None``, they are computed from the lookback window.
     """
-    empty_values: dict[str, Any] = {}
-    market_svc = MarketDataService()
     end = datetime.utcnow()
     start = (end - timedelta(days=days_lookback)).strftime("%Y-%m-%d")
     end_str = end.strftime("%Y-%m-%d")
-    raw = await market_svc.fetch_ohlcv(symbol, start, end_str)
-    if not raw["data"]:
-        return False, False, empty_values
-    df = pd.DataFrame(raw["data"])
-    if "Date" in df.columns:
-        df = df.set_index("Date")
-    elif "date" in df.columns:
-        df = df.set_index("date")
-    df.index = pd.to_datetime(df.index)
+    if streams is not None and set(indicators) <= set(STREAM_COLUMNS):
+        return await _streamed_rows(streams, market_svc, symbol, start, end_str)
+    df = await market_svc.fetch_ohlcv_frame(symbol, start, end_str)
+    if df.empty:
+        return None
     tech = TechnicalFeatures()
-    data = tech.calculate_all_features(df)
+    data = tech.calculate_all_features(df, [k for k in INDICATOR_KEYS if k != "close"] + list(indicators))
     data.columns = [c.lower() for c in data.columns]
     if "sentiment" not in data.columns:
         data["sentiment"] = 0.5
     data = data.dropna(subset=["close"])
     if len(data) < 2:
-        return False, False, empty_values
-    current = data.iloc[-1]
-    prev = data.iloc[-2]
+        return None
+    return data.iloc[-1], data.iloc[-2]
+
+
+def evaluate_signals(strategy: dict[str, Any], current: pd.Series, prev: pd.Series) -> Tuple[bool, bool]:
+    """(entry_matched, exit_matched) for a strategy on the latest bar."""
     engine = BacktestEngine()
     entry_matched = engine._check_entry(current, prev, strategy)
     dummy_position = {"entry_price": float(current["close"])}
     exit_matched = engine._check_exit(current, prev, strategy, dummy_position)
-    # Build current values for frontend (only include keys that exist and are numeric)
+    return entry_matched, exit_matched
+
+
+def current_indicator_values(current: pd.Series) -> dict[str, Any]:
+    """Current values for frontend (only include keys that exist and are numeric)."""
     s = current.get("sentiment", 0.5)
     current_values: dict[str, Any] = {"sentiment_score": round(float(s), 4) if pd.notna(s) else 0.5}
     for key in INDICATOR_KEYS:
@@ -65,4 +106,23 @@ async def check_entry_exit_signals(
                     current_values[key] = round(float(val), 4)
                 except (TypeError, ValueError):
                     pass
-    return entry_matched, exit_matched, current_values
+    return current_values
+
+
+async def check_entry_exit_signals(
+    strategy: dict[str, Any],
+    symbol: str,
+    days_lookback: int = 60,
+    streams: IndicatorStreams | None = LIVE_STREAMS,
+) -> Tuple[bool, bool, dict[str, Any]]:
+    """
+    Fetch recent data, compute features, and check if entry/exit conditions
+    match on the latest bar. Returns (entry_matched, exit_matched, current_values).
+    """
+    rules = (strategy.get("entry_rules") or []) + (strategy.get("exit_rules") or [])
+    rows = await latest_rows(symbol, required_indicators(rules), MarketDataService(), days_lookback, streams)
+    if rows is None:
+        return False, False, {}
+    current, prev = rows
+    entry_matched, exit_matched = evaluate_signals(strategy, current, prev)
+    return entry_matched, exit_matched, current_indicator_values(current)
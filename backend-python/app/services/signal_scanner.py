@@ -0,0 +1,271 @@
+"""Scheduled bulk signal scanner over (strategy, symbols) subscriptions (for alerts)."""
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Awaitable, Callable
+
+import numpy as np
+
+from app.config import Settings
+from app.services.email_notifications import send_entry_signal, send_exit_signal
+from app.services.executors import run_io
+from app.services.market_data import MarketDataService
+from app.services.rule_compiler import required_indicators
+from app.services.signal_check import (
+    LIVE_STREAMS,
+    current_indicator_values,
+    evaluate_signals,
+    latest_rows,
+)
+from app.services.streaming_indicators import IndicatorStreams
+
+
+@dataclass
+class Subscription:
+    """One strategy watched on a list of symbols."""
+    strategy: dict[str, Any]
+    symbols: list[str]
+    emails: list[str] | None = None
+    subscription_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+
+    @property
+    def rules(self) -> list[str]:
+        return (self.strategy.get("entry_rules") or []) + (self.strategy.get("exit_rules") or [])
+
+
+@dataclass
+class SignalEvent:
+    """An entry or exit condition that became true on the latest bar."""
+    subscription_id: str
+    strategy_name: str
+    symbol: str
+    kind: str  # entry | exit
+    bar: str
+    detected_at: str
+    values: dict[str, Any]
+
+
+@dataclass
+class ScanCycleStats:
+    """Timing for one scan cycle; ``overran`` means it took longer than the interval."""
+    started_at: str
+    duration_s: float
+    interval_s: float
+    overran: bool
+    symbols: int
+    subscriptions: int
+    evaluations: int
+    events: int
+    errors: int
+    symbol_latency_p50_s: float
+    symbol_latency_p95_s: float
+    symbol_latency_max_s: float
+    symbols_per_s: float
+
+
+class SignalScanner:
+    """Evaluate every subscription once per cycle and emit only new entry/exit matches.
+
+    Subscriptions are grouped by symbol, so each symbol is fetched and
+    featurized once per cycle however many strategies watch it. Symbols are
+    processed concurrently, at most ``concurrency`` at a time. A match is
+    emitted when it turns from false to true for a (subscription, symbol); it
+    is not repeated while it stays true.
+    """
+
+    def __init__(
+        self,
+        interval_s: float = 60.0,
+        concurrency: int = 32,
+        days_lookback: int = 60,
+        market_svc: MarketDataService | None = None,
+        streams: IndicatorStreams | None = LIVE_STREAMS,
+        settings: Settings | None = None,
+        history: int = 100,
+    ) -> None:
+        self.interval_s = interval_s
+        self.concurrency = max(1, concurrency)
+        self.days_lookback = days_lookback
+        self.market_svc = market_svc
+        self.streams = streams
+        self.settings = settings or Settings()
+        self.listeners: list[Callable[[SignalEvent], Awaitable[None] | None]] = []
+        self.cycles: deque[ScanCycleStats] = deque(maxlen=history)
+        self.recent_events: deque[SignalEvent] = deque(maxlen=history * 10)
+        self._subscriptions: dict[str, Subscription] = {}
+        self._state: dict[tuple[str, str], tuple[bool, bool]] = {}
+        self._task: asyncio.Task | None = None
+
+    # Registry
+
+    def subscribe(self, strategy: dict[str, Any], symbols: list[str], emails: list[str] | None = None) -> Subscription:
+        cleaned = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+        if not cleaned:
+            raise ValueError("No symbols")
+        sub = Subscription(strategy=strategy, symbols=cleaned, emails=emails)
+        self._subscriptions[sub.subscription_id] = sub
+        return sub
+
+    def unsubscribe(self, subscription_id: str) -> bool:
+        sub = self._subscriptions.pop(subscription_id, None)
+        if sub is None:
+            return False
+        for symbol in sub.symbols:
+            self._state.pop((subscription_id, symbol), None)
+        return True
+
+    def subscriptions(self) -> list[Subscription]:
+        return list(self._subscriptions.values())
+
+    # Scanning
+
+    def _by_symbol(self) -> dict[str, list[Subscription]]:
+        groups: dict[str, list[Subscription]] = {}
+        for sub in self._subscriptions.values():
+            for symbol in sub.symbols:
+                groups.setdefault(symbol, []).append(sub)
+        return groups
+
+    async def scan_once(self) -> tuple[ScanCycleStats, list[SignalEvent]]:
+        """Run one cycle over all subscriptions."""
+        started = time.monotonic()
+        started_at = datetime.utcnow().isoformat() + "Z"
+        groups = self._by_symbol()
+        market_svc = self.market_svc or MarketDataService()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        latencies: list[float] = []
+        events: list[SignalEvent] = []
+        counts = {"evaluations": 0, "errors": 0}
+
+        async def _scan_symbol(symbol: str, subs: list[Subscription]) -> None:
+            async with semaphore:
+                t0 = time.monotonic()
+                try:
+                    indicators = required_indicators([r for sub in subs for r in sub.rules])
+                    rows = await latest_rows(symbol, indicators, market_svc, self.days_lookback, self.streams)
+                    if rows is not None:
+                        current, prev = rows
+                        values = current_indicator_values(current)
+                        for sub in subs:
+                            counts["evaluations"] += 1
+                            matched = evaluate_signals(sub.strategy, current, prev)
+                            events.extend(self._transitions(sub, symbol, matched, str(current.name), values))
+                except Exception:
+                    counts["errors"] += 1
+                latencies.append(time.monotonic() - t0)
+
+        await asyncio.gather(*(_scan_symbol(symbol, subs) for symbol, subs in groups.items()))
+        for event in events:
+            await self._emit(event)
+
+        duration = time.monotonic() - started
+        lat = np.asarray(latencies) if latencies else np.zeros(1)
+        stats = ScanCycleStats(
+            started_at=started_at,
+            duration_s=round(duration, 4),
+            interval_s=self.interval_s,
+            overran=duration > self.interval_s,
+            symbols=len(groups),
+            subscriptions=len(self._subscriptions),
+            evaluations=counts["evaluations"],
+            events=len(events),
+            errors=counts["errors"],
+            symbol_latency_p50_s=round(float(np.percentile(lat, 50)), 4),
+            symbol_latency_p95_s=round(float(np.percentile(lat, 95)), 4),
+            symbol_latency_max_s=round(float(lat.max()), 4),
+            symbols_per_s=round(len(groups) / duration, 2) if duration > 0 else 0.0,
+        )
+        self.cycles.append(stats)
+        return stats, events
+
+    def _transitions(
+        self,
+        sub: Subscription,
+        symbol: str,
+        matched: tuple[bool, bool],
+        bar: str,
+        values: dict[str, Any],
+    ) -> list[SignalEvent]:
+        key = (sub.subscription_id, symbol)
+        before = self._state.get(key, (False, False))
+        self._state[key] = matched
+        detected_at = datetime.utcnow().isoformat() + "Z"
+        name = sub.strategy.get("name", "Unnamed")
+        return [
+            SignalEvent(sub.subscription_id, name, symbol, kind, bar, detected_at, values)
+            for kind, now, was in zip(("entry", "exit"), matched, before)
+            if now and not was
+        ]
+
+    async def _emit(self, event: SignalEvent) -> None:
+        self.recent_events.append(event)
+        for listener in self.listeners:
+            try:
+                result = listener(event)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:
+                pass
+        s = self.settings
+        if s.smtp_host and s.smtp_user and s.smtp_password:
+            sub = self._subscriptions.get(event.subscription_id)
+            send = send_entry_signal if event.kind == "entry" else send_exit_signal
+            await run_io(send, event.strategy_name, event.symbol, sub.emails if sub else None)
+
+    # Schedule
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            if self._subscriptions:
+                try:
+                    await self.scan_once()
+                except Exception:
+                    pass
+            # An overrunning cycle starts the next one immediately rather than queueing up
+            await asyncio.sleep(max(0.0, self.interval_s - (time.monotonic() - started)))
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "interval_s": self.interval_s,
+            "concurrency": self.concurrency,
+            "subscriptions": len(self._subscriptions),
+            "symbols": len(self._by_symbol()),
+            "cycles": [asdict(c) for c in self.cycles],
+            "recent_events": [asdict(e) for e in self.recent_events],
+        }
+
+
+@lru_cache(maxsize=1)
+def get_signal_scanner() -> SignalScanner:
+    """Process-wide scanner built from Settings."""
+    settings = Settings()
+    return SignalScanner(
+        interval_s=settings.signal_scan_interval_s,
+        concurrency=settings.signal_scan_concurrency,
+        settings=settings,
+    )
@@ -1,15 +1,31 @@
 """Pillar 3: RAG + LLM strategy generation."""
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import re
-from typing import Any
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
 
 import numpy as np
 import pandas as pd
 
 from app.config import Settings
-from app.services.vector_db import StrategyKnowledgeBase
+from app.services.backtest_engine import BacktestCancelled, BacktestEngine
+from app.services.cache import SharedCache, cache_key, get_shared_cache
+from app.services.executors import run_io
+from app.services.rule_compiler import RuleCompileError, compile_rule
+
+if TYPE_CHECKING:
+    from app.services.vector_db import StrategyKnowledgeBase
+
+LLM_MODEL = "claude-sonnet-4-20250514"
+LLM_TEMPERATURE = 0.7
+# Bars between cancellation checks while ranking candidates
+_RANK_CHECK_BARS = 1000
 
 
 def _detect_market_regime(market_data: pd.DataFrame) -> str:
@@ -73,6 +89,33 @@ def _parse_strategy(llm_output: str) -> dict[str, Any]:
     return json.loads(json_str)
 
 
+def validate_strategy(strategy: Any) -> dict[str, Any]:
+    """Raise ValueError unless the strategy has entry and exit rules that all compile."""
+    if not isinstance(strategy, dict):
+        raise ValueError("Strategy is not a JSON object")
+    for field_name in ("entry_rules", "exit_rules"):
+        rules = strategy.get(field_name)
+        if not isinstance(rules, list) or not rules or not all(isinstance(r, str) for r in rules):
+            raise ValueError(f"{field_name} must be a non-empty list of strings")
+        for rule in rules:
+            try:
+                compile_rule(rule)
+            except RuleCompileError as e:
+                raise ValueError(f"Invalid rule {rule!r}: {e}") from e
+    return strategy
+
+
+@dataclass
+class GenerationResult:
+    """A generated strategy and how it was produced (source: cache | llm | fallback)."""
+    strategy: dict[str, Any]
+    source: str
+    candidates: int = 0
+    valid_candidates: int = 0
+    elapsed_s: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+
 # Default strategy when LLM is not configured
 DEFAULT_STRATEGY = {
     "name": "Momentum-Sentiment Hybrid",
@@ -96,27 +139,43 @@ DEFAULT_STRATEGY = {
 
 
 class StrategyGenerator:
-    """Generate trading strategy using RAG + optional LLM."""
+    """Generate trading strategy using RAG + optional LLM.
+
+    LLM answers are cached (shared cache) by a hash of the market context,
+    the retrieved strategies and the risk tolerance, so a repeated request
+    costs no tokens. ``agenerate_strategy`` can ask for several candidates
+    concurrently, keeps those that parse and compile, ranks them by a quick
+    backtest on the request's data, and gives up on the LLM when the latency
+    budget runs out (pending calls are cancelled).
+    """
 
     def __init__(
         self,
         knowledge_base: StrategyKnowledgeBase | None = None,
         settings: Settings | None = None,
+        cache: SharedCache | None = None,
     ) -> None:
         self.settings = settings or Settings()
-        self.knowledge_base = knowledge_base or StrategyKnowledgeBase(
-            persist_directory=self.settings.chroma_persist_dir
-        )
+        if knowledge_base is None:
+            # Imported here: loads LangChain, Chroma and sentence-transformers
+            from app.services.vector_db import StrategyKnowledgeBase
+
+            knowledge_base = StrategyKnowledgeBase(persist_directory=self.settings.chroma_persist_dir)
+        self.knowledge_base = knowledge_base
+        self.cache = cache if cache is not None else get_shared_cache()
         self._llm = None
+        self._chain = None
         if self.settings.anthropic_api_key:
             try:
                 from langchain_anthropic import ChatAnthropic
                 from langchain_core.prompts import ChatPromptTemplate
                 from langchain_core.output_parsers import StrOutputParser
                 self._llm = ChatAnthropic(
-                    model="claude-sonnet-4-20250514",
-                    temperature=0.7,
+                    model=LLM_MODEL,
+                    temperature=LLM_TEMPERATURE,
                     api_key=self.settings.anthropic_api_key,
+                    default_request_timeout=self.settings.llm_budget_s,
+                    max_retries=1,
                 )
                 self._prompt = ChatPromptTemplate.from_messages([
                     ("system", "You are an expert quantitative trading strategist. Output only valid JSON."),
@@ -135,6 +194,20 @@ Generate a complete strategy with: name, description, entry_rules (list of strin
                 self._chain = self._prompt | self._llm | StrOutputParser()
             except Exception:
                 self._llm = None
+                self._chain = None
+
+    def _fallback(self, market_data: pd.DataFrame) -> dict[str, Any]:
+        regime = _detect_market_regime(market_data)
+        strategy = dict(DEFAULT_STRATEGY)
+        strategy["name"] = f"Momentum-Sentiment Hybrid ({regime})"
+        strategy["market_regime"] = regime
+        return strategy
+
+    @staticmethod
+    def _response_key(inputs: dict[str, str], candidates: int) -> str:
+        payload = json.dumps({**inputs, "model": LLM_MODEL, "temperature": LLM_TEMPERATURE, "candidates": candidates},
+                             sort_keys=True)
+        return cache_key("llm", hashlib.sha256(payload.encode()).hexdigest())
 
     def generate_strategy(
         self,
@@ -143,24 +216,119 @@ Generate a complete strategy with: name, description, entry_rules (list of strin
         technical_indicators: dict[str, Any],
         risk_tolerance: str = "medium",
     ) -> dict[str, Any]:
-        """Generate strategy via RAG + LLM or return template."""
+        """Generate strategy via RAG + LLM or return template (blocking; async callers use agenerate_strategy)."""
+        return asyncio.run(
+            self.agenerate_strategy(market_data, sentiment_data, technical_indicators, risk_tolerance)
+        ).strategy
+
+    async def agenerate_strategy(
+        self,
+        market_data: pd.DataFrame,
+        sentiment_data: dict[str, Any],
+        technical_indicators: dict[str, Any],
+        risk_tolerance: str = "medium",
+        candidates: int = 1,
+        budget_s: float | None = None,
+    ) -> GenerationResult:
+        """Generate up to ``candidates`` strategies within ``budget_s`` seconds and return the best."""
+        started = time.monotonic()
+        budget = self.settings.llm_budget_s if budget_s is None else budget_s
+        candidates = max(1, candidates)
         market_context = _create_market_context(market_data, sentiment_data, technical_indicators)
-        similar = self.knowledge_base.retrieve_similar_strategies(market_context, k=5)
+        # Chroma search blocks (and embeds the context); keep it off the event loop
+        similar = await run_io(self.knowledge_base.retrieve_similar_strategies, market_context, 5)
         historical_str = json.dumps([{"content": s["content"], "metadata": s["metadata"]} for s in similar], indent=2)
+        if self._chain is None:
+            return GenerationResult(self._fallback(market_data), "fallback", errors=["LLM not configured"])
+
+        inputs = {
+            "market_context": market_context,
+            "historical_strategies": historical_str,
+            "risk_tolerance": risk_tolerance,
+        }
+        key = self._response_key(inputs, candidates)
+        hit = await run_io(self.cache.get, key)
+        if isinstance(hit, dict) and hit.get("strategy_json"):
+            return GenerationResult(
+                json.loads(hit["strategy_json"]), "cache", elapsed_s=round(time.monotonic() - started, 3),
+            )
 
-        if self._llm is not None and self._chain is not None:
+        errors: list[str] = []
+        tasks = [asyncio.ensure_future(self._chain.ainvoke(inputs)) for _ in range(candidates)]
+        # With several candidates, hold back part of the budget for ranking them
+        reserve = min(2.0, 0.2 * budget) if candidates > 1 else 0.0
+        remaining = max(0.0, budget - reserve - (time.monotonic() - started))
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=remaining)
+        finally:
+            # Over budget, or the request itself was cancelled: stop the outstanding LLM calls
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        if pending:
+            errors.append(f"{len(pending)} candidate(s) cancelled after the {budget:g}s budget")
+        valid: list[dict[str, Any]] = []
+        for task in tasks:
+            if task not in done:
+                continue
             try:
-                result = self._chain.invoke({
-                    "market_context": market_context,
-                    "historical_strategies": historical_str,
-                    "risk_tolerance": risk_tolerance,
-                })
-                return _parse_strategy(result)
-            except Exception:
-                pass
-        # Fallback: return default strategy with regime-aware name
-        regime = _detect_market_regime(market_data)
-        strategy = dict(DEFAULT_STRATEGY)
-        strategy["name"] = f"Momentum-Sentiment Hybrid ({regime})"
-        strategy["market_regime"] = regime
-        return strategy
+                valid.append(validate_strategy(_parse_strategy(task.result())))
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+        if not valid:
+            return GenerationResult(
+                self._fallback(market_data), "fallback", candidates, 0,
+                round(time.monotonic() - started, 3), errors,
+            )
+        best = valid[0]
+        if len(valid) > 1:
+            best = await self._best_by_backtest(valid, market_data, budget - (time.monotonic() - started), errors)
+        # Stored as JSON text so the strategy comes back exactly as the LLM wrote it
+        await run_io(self.cache.set, key, {"strategy_json": json.dumps(best)}, self.settings.llm_cache_ttl_s)
+        return GenerationResult(
+            best, "llm", candidates, len(valid), round(time.monotonic() - started, 3), errors,
+        )
+
+    async def _best_by_backtest(
+        self,
+        valid: list[dict[str, Any]],
+        market_data: pd.DataFrame,
+        remaining_s: float,
+        errors: list[str],
+    ) -> dict[str, Any]:
+        """Highest Sharpe on the request's own feature frame; the first candidate if ranking fails or runs out of time."""
+        # On a thread so the cancel event reaches the simulation and stops it at the budget
+        cancel_event = threading.Event()
+        try:
+            scores = await asyncio.wait_for(
+                run_io(_rank_scores, valid, market_data, cancel_event), timeout=max(0.0, remaining_s)
+            )
+        except Exception as e:
+            errors.append(f"Ranking skipped: {type(e).__name__}")
+            return valid[0]
+        finally:
+            cancel_event.set()
+        return valid[int(np.argmax(scores))]
+
+
+def _rank_scores(
+    strategies: list[dict[str, Any]],
+    market_data: pd.DataFrame,
+    cancel_event: threading.Event,
+) -> list[float]:
+    """Sharpe ratio per strategy (-inf when its backtest fails); BacktestCancelled once ``cancel_event`` is set."""
+    scores = []
+    for strategy in strategies:
+        if cancel_event.is_set():
+            raise BacktestCancelled()
+        try:
+            result = BacktestEngine().run_backtest(
+                strategy, market_data, chunk_bars=_RANK_CHECK_BARS, cancel_event=cancel_event
+            )
+            sharpe = result["metrics"].get("sharpe_ratio")
+        except BacktestCancelled:
+            raise
+        except Exception:
+            sharpe = None
+        scores.append(float(sharpe) if sharpe is not None and np.isfinite(sharpe) else float("-inf"))
+    return scores
@@ -0,0 +1,72 @@
+"""Server-sent event streams for long-running backtests and optimizations."""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import uuid
+from typing import Any, AsyncIterator, Awaitable
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from app.services.backtest_engine import BacktestCancelled
+
+# Open streams in this worker, so DELETE /streams/{id} can cancel one
+_streams: dict[str, "ProgressStream"] = {}
+
+
+def sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+def get_stream(stream_id: str) -> "ProgressStream | None":
+    return _streams.get(stream_id)
+
+
+class ProgressStream:
+    """Carries events from a job (on any thread) to an SSE response, and cancellation back.
+
+    ``emit`` is thread-safe and never blocks the job. ``events`` runs the job
+    and yields ``started``, then every emitted event in order, then exactly
+    one of ``result``, ``cancelled`` or ``error``. If the client disconnects
+    or the stream is cancelled, ``cancel_event`` is set so the engine or
+    optimizer stops at its next checkpoint.
+    """
+
+    def __init__(self) -> None:
+        self.stream_id = str(uuid.uuid4())
+        self.cancel_event = threading.Event()
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[tuple[str, Any] | None] = asyncio.Queue()
+
+    def emit(self, event: str, data: Any) -> None:
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (event, data))
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    async def events(self, job: Awaitable[Any]) -> AsyncIterator[str]:
+        _streams[self.stream_id] = self
+        task = asyncio.ensure_future(job)
+        # Runs after every emit the job made before finishing (same loop, FIFO)
+        task.add_done_callback(lambda _: self._queue.put_nowait(None))
+        try:
+            yield sse("started", {"stream_id": self.stream_id})
+            while (item := await self._queue.get()) is not None:
+                yield sse(*item)
+            error = task.exception()
+            if error is None:
+                yield sse("result", task.result())
+            elif isinstance(error, BacktestCancelled):
+                yield sse("cancelled", {"stream_id": self.stream_id})
+            elif isinstance(error, HTTPException):
+                yield sse("error", {"status_code": error.status_code, "detail": error.detail})
+            else:
+                yield sse("error", {"status_code": 500, "detail": str(error)})
+        finally:
+            if not task.done():
+                # Client went away: stop the work, not just the response
+                self.cancel_event.set()
+                task.cancel()
+            _streams.pop(self.stream_id, None)
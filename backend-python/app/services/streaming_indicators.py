@@ -0,0 +1,317 @@
+"""Pillar 2: Incremental (O(1) per bar) technical indicators for live signal checks."""
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+# Columns a stream produces; names and formulas match TechnicalFeatures.calculate_all_features
+STREAM_COLUMNS = (
+    "close", "volume", "returns", "log_returns",
+    "rsi", "macd", "macd_signal", "macd_diff",
+    "sma_20", "sma_50", "bb_high", "bb_low", "bb_mid", "bb_width",
+    "volume_sma", "volume_ratio", "price_position",
+)
+_SNAPSHOT_VERSION = 1
+_NAN = float("nan")
+
+
+class _EWM:
+    """pandas ``ewm(alpha, min_periods, adjust=False).mean()`` one value at a time; NaN inputs are skipped."""
+
+    __slots__ = ("alpha", "min_periods", "value", "count", "_before")
+
+    def __init__(self, alpha: float, min_periods: int) -> None:
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = _NAN
+        self.count = 0
+        self._before = (_NAN, 0)
+
+    def push(self, x: float) -> None:
+        self._before = (self.value, self.count)
+        if math.isnan(x):
+            return
+        self.value = x if self.count == 0 else (1 - self.alpha) * self.value + self.alpha * x
+        self.count += 1
+
+    def replace_last(self, x: float) -> None:
+        self.value, self.count = self._before
+        self.push(x)
+
+    @property
+    def output(self) -> float:
+        return self.value if self.count >= self.min_periods else _NAN
+
+    def state(self) -> list[float]:
+        return [self.value, self.count, *self._before]
+
+    def load(self, state: list[float]) -> None:
+        self.value, self.count = float(state[0]), int(state[1])
+        self._before = (float(state[2]), int(state[3]))
+
+
+class _Rolling:
+    """Full-window rolling mean and population std from running sums.
+
+    Sums are taken around a shift (the oldest value at the last resync) to
+    limit cancellation, and are recomputed from the window every ``window``
+    pushes so rounding error cannot build up; that keeps updates amortized O(1).
+    """
+
+    __slots__ = ("window", "values", "_shift", "_sum", "_sumsq", "_pushes")
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.values: deque[float] = deque(maxlen=window)
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._pushes = 0
+
+    def push(self, x: float) -> None:
+        if len(self.values) == self.window:
+            self._remove(self.values[0])
+        self.values.append(x)
+        self._add(x)
+        self._pushes += 1
+        if self._pushes >= self.window:
+            self._resync()
+
+    def replace_last(self, x: float) -> None:
+        self._remove(self.values[-1])
+        self.values[-1] = x
+        self._add(x)
+
+    def _add(self, x: float) -> None:
+        d = x - self._shift
+        self._sum += d
+        self._sumsq += d * d
+
+    def _remove(self, x: float) -> None:
+        d = x - self._shift
+        self._sum -= d
+        self._sumsq -= d * d
+
+    def _resync(self) -> None:
+        self._shift = self.values[0] if self.values else 0.0
+        self._sum = math.fsum(v - self._shift for v in self.values)
+        self._sumsq = math.fsum((v - self._shift) ** 2 for v in self.values)
+        self._pushes = 0
+
+    @property
+    def mean(self) -> float:
+        if len(self.values) < self.window:
+            return _NAN
+        return self._shift + self._sum / self.window
+
+    @property
+    def std(self) -> float:
+        if len(self.values) < self.window:
+            return _NAN
+        var = self._sumsq / self.window - (self._sum / self.window) ** 2
+        return math.sqrt(max(var, 0.0))
+
+    def state(self) -> list[float]:
+        return list(self.values)
+
+    def load(self, state: list[float]) -> None:
+        self.values = deque((float(v) for v in state), maxlen=self.window)
+        self._resync()
+
+
+def _ratio(num: float, den: float) -> float:
+    return _NAN if den == 0 or math.isnan(den) else num / den
+
+
+class StreamingIndicators:
+    """Indicator state for one symbol, updated bar by bar.
+
+    Each new bar costs O(1) regardless of history length. Pushing a bar with
+    the same timestamp as the latest one revises it in place, which is how a
+    still-forming intraday bar is tracked. ``current`` and ``previous`` are the
+    last two rows as calculate_all_features would compute them on the same
+    bars; values agree to floating-point rounding.
+    """
+
+    _EWMS = ("rsi_up", "rsi_down", "ema_fast", "ema_slow", "macd_signal")
+    _ROLLING = ("sma_20", "sma_50", "volume_sma")
+
+    def __init__(self) -> None:
+        self.timestamp: pd.Timestamp | None = None
+        self.bars = 0
+        self._close = _NAN
+        self._prior_close = _NAN
+        self._rsi_up = _EWM(1 / 14, 14)
+        self._rsi_down = _EWM(1 / 14, 14)
+        self._ema_fast = _EWM(2 / 13, 12)
+        self._ema_slow = _EWM(2 / 27, 26)
+        self._macd_signal = _EWM(2 / 10, 9)
+        self._sma_20 = _Rolling(20)
+        self._sma_50 = _Rolling(50)
+        self._volume_sma = _Rolling(20)
+        self.current: dict[str, float] = {}
+        self.previous: dict[str, float] = {}
+
+    def update(self, close: float, volume: float = 1.0, timestamp: Any = None) -> dict[str, float]:
+        """Apply one bar (or revise the latest one if ``timestamp`` repeats); returns the current row."""
+        close, volume = float(close), float(volume)
+        ts = pd.Timestamp(timestamp) if timestamp is not None else None
+        if ts is not None and self.timestamp is not None and ts < self.timestamp:
+            return self.current
+        if ts is not None and ts == self.timestamp:
+            self._revise(close, volume)
+        else:
+            self._push(close, volume)
+            self.timestamp = ts
+            self.bars += 1
+        self.current = self._row(close, volume)
+        return self.current
+
+    def _push(self, close: float, volume: float) -> None:
+        self.previous = self.current
+        self._prior_close = self._close
+        self._close = close
+        up, down = self._moves(close)
+        self._rsi_up.push(up)
+        self._rsi_down.push(down)
+        self._ema_fast.push(close)
+        self._ema_slow.push(close)
+        self._macd_signal.push(self._ema_fast.output - self._ema_slow.output)
+        self._sma_20.push(close)
+        self._sma_50.push(close)
+        self._volume_sma.push(volume)
+
+    def _revise(self, close: float, volume: float) -> None:
+        self._close = close
+        up, down = self._moves(close)
+        self._rsi_up.replace_last(up)
+        self._rsi_down.replace_last(down)
+        self._ema_fast.replace_last(close)
+        self._ema_slow.replace_last(close)
+        self._macd_signal.replace_last(self._ema_fast.output - self._ema_slow.output)
+        self._sma_20.replace_last(close)
+        self._sma_50.replace_last(close)
+        self._volume_sma.replace_last(volume)
+
+    def _moves(self, close: float) -> tuple[float, float]:
+        # The first bar has no diff; ta counts it as a zero move
+        diff = close - self._prior_close
+        if math.isnan(diff):
+            return 0.0, 0.0
+        return max(diff, 0.0), max(-diff, 0.0)
+
+    def _row(self, close: float, volume: float) -> dict[str, float]:
+        up, down = self._rsi_up.output, self._rsi_down.output
+        if down == 0:
+            rsi = 100.0
+        elif math.isnan(up) or math.isnan(down):
+            rsi = _NAN
+        else:
+            rsi = 100 - (100 / (1 + up / down))
+        macd = self._ema_fast.output - self._ema_slow.output
+        signal = self._macd_signal.output
+        mid = self._sma_20.mean
+        std = self._sma_20.std
+        high, low = mid + 2 * std, mid - 2 * std
+        volume_sma = self._volume_sma.mean
+        prior = self._prior_close
+        return {
+            "close": close,
+            "volume": volume,
+            "returns": close / prior - 1 if prior and not math.isnan(prior) else _NAN,
+            "log_returns": math.log(close / prior) if prior and close > 0 and prior > 0 else _NAN,
+            "rsi": rsi,
+            "macd": macd,
+            "macd_signal": signal,
+            "macd_diff": macd - signal,
+            "sma_20": mid,
+            "sma_50": self._sma_50.mean,
+            "bb_high": high,
+            "bb_low": low,
+            "bb_mid": mid,
+            "bb_width": high - low,
+            "volume_sma": volume_sma,
+            "volume_ratio": _ratio(volume, volume_sma),
+            "price_position": _ratio(close - low, high - low),
+        }
+
+    def warm_up(self, bars: pd.DataFrame) -> dict[str, float]:
+        """Feed historical bars (``close`` and optional ``volume`` columns, any case) in order."""
+        columns = {str(c).lower(): c for c in bars.columns}
+        closes = bars[columns["close"]].to_numpy(float)
+        volumes = bars[columns["volume"]].to_numpy(float) if "volume" in columns else np.ones(len(bars))
+        for ts, close, vol in zip(bars.index, closes, volumes):
+            if not math.isnan(close):
+                self.update(close, vol, ts)
+        return self.current
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-serializable state; restore with ``from_snapshot``."""
+        return {
+            "version": _SNAPSHOT_VERSION,
+            "timestamp": self.timestamp.isoformat() if self.timestamp is not None else None,
+            "bars": self.bars,
+            "close": self._close,
+            "prior_close": self._prior_close,
+            "ewm": {name: getattr(self, f"_{name}").state() for name in self._EWMS},
+            "rolling": {name: getattr(self, f"_{name}").state() for name in self._ROLLING},
+            "current": self.current,
+            "previous": self.previous,
+        }
+
+    @classmethod
+    def from_snapshot(cls, state: dict[str, Any]) -> StreamingIndicators:
+        if state.get("version") != _SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported indicator snapshot version {state.get('version')!r}")
+        stream = cls()
+        stream.timestamp = pd.Timestamp(state["timestamp"]) if state.get("timestamp") else None
+        stream.bars = int(state["bars"])
+        stream._close = float(state["close"])
+        stream._prior_close = float(state["prior_close"])
+        for name in cls._EWMS:
+            getattr(stream, f"_{name}").load(state["ewm"][name])
+        for name in cls._ROLLING:
+            getattr(stream, f"_{name}").load(state["rolling"][name])
+        stream.current = {k: float(v) for k, v in state["current"].items()}
+        stream.previous = {k: float(v) for k, v in state["previous"].items()}
+        return stream
+
+
+class IndicatorStreams:
+    """Streaming indicator state for many symbols."""
+
+    def __init__(self) -> None:
+        self._streams: dict[str, StreamingIndicators] = {}
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._streams
+
+    def __len__(self) -> int:
+        return len(self._streams)
+
+    def get(self, symbol: str) -> StreamingIndicators | None:
+        return self._streams.get(symbol.upper())
+
+    def warm_up(self, symbol: str, bars: pd.DataFrame) -> StreamingIndicators:
+        """Replace a symbol's state with one built from historical bars."""
+        stream = StreamingIndicators()
+        stream.warm_up(bars)
+        self._streams[symbol.upper()] = stream
+        return stream
+
+    def update(self, symbol: str, close: float, volume: float = 1.0, timestamp: Any = None) -> dict[str, float]:
+        stream = self._streams.setdefault(symbol.upper(), StreamingIndicators())
+        return stream.update(close, volume, timestamp)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        return {symbol: stream.snapshot() for symbol, stream in self._streams.items()}
+
+    @classmethod
+    def restore(cls, snapshot: dict[str, dict[str, Any]]) -> IndicatorStreams:
+        streams = cls()
+        streams._streams = {s.upper(): StreamingIndicators.from_snapshot(v) for s, v in snapshot.items()}
+        return streams
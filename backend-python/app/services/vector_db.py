@@ -8,15 +8,32 @@ from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from app.services.embedding_cache import CachedEmbeddings, EmbeddingCache, RetrievalCache
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
 
 class StrategyKnowledgeBase:
-    """Store and retrieve strategy patterns for RAG."""
+    """Store and retrieve strategy patterns for RAG.
+
+    Embeddings go through an LRU (optionally on disk) keyed by normalized
+    text, and search results are cached per query-embedding bucket until the
+    next ``add_strategy_patterns``.
+    """
 
-    def __init__(self, persist_directory: str = "./chroma_db") -> None:
+    def __init__(
+        self,
+        persist_directory: str = "./chroma_db",
+        embedding_cache: EmbeddingCache | None = None,
+        retrieval_cache: RetrievalCache | None = None,
+    ) -> None:
         Path(persist_directory).mkdir(parents=True, exist_ok=True)
-        self._embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={"device": "cpu"},
+        self.embedding_cache = embedding_cache or EmbeddingCache()
+        self.retrieval_cache = retrieval_cache or RetrievalCache()
+        self._embeddings = CachedEmbeddings(
+            HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL, model_kwargs={"device": "cpu"}),
+            self.embedding_cache,
+            model_name=EMBEDDING_MODEL,
         )
         self._persist = persist_directory
         self._collection = Chroma(
@@ -53,16 +70,37 @@ class StrategyKnowledgeBase:
                 chunks_docs.append(chunk)
                 chunks_meta.append(meta)
         if chunks_docs:
-            self._collection.add_texts(chunks_docs, metadatas=chunks_meta)
-            self._collection.persist()
+            try:
+                self._collection.add_texts(chunks_docs, metadatas=chunks_meta)
+                self._collection.persist()
+            finally:
+                self.retrieval_cache.invalidate()
 
-    def retrieve_similar_strategies(self, query: str, k: int = 5) -> list[dict[str, Any]]:
-        """Return similar strategy chunks."""
+    def retrieve_similar_strategies(
+        self,
+        query: str,
+        k: int = 5,
+        metadata_filter: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return similar strategy chunks (optionally restricted by a Chroma metadata filter)."""
         try:
-            results = self._collection.similarity_search_with_score(query, k=k)
-            return [
+            generation = self.retrieval_cache.generation
+            embedding = self._embeddings.embed_query(query)
+            cached = self.retrieval_cache.get(embedding, k, metadata_filter)
+            if cached is not None:
+                return cached
+            # Same distances as similarity_search_with_score, without embedding the query again
+            results = self._collection.similarity_search_by_vector_with_relevance_scores(
+                embedding, k=k, filter=metadata_filter
+            )
+            out = [
                 {"content": doc.page_content, "metadata": doc.metadata, "score": float(score)}
                 for doc, score in results
             ]
+            self.retrieval_cache.put(embedding, k, metadata_filter, out, generation)
+            return out
         except Exception:
             return []
+
+    def cache_stats(self) -> dict[str, Any]:
+        return {"embeddings": self.embedding_cache.info(), "retrieval": self.retrieval_cache.info()}
@@ -0,0 +1,183 @@
+"""Pillar 4: Walk-forward optimization with out-of-sample evaluation."""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import time
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest_engine import BacktestEngine, Trade
+from app.services.executors import sweep_pool
+from app.services.optimizer import StrategyOptimizer
+
+
+def walk_forward_windows(
+    n_bars: int,
+    train_bars: int,
+    test_bars: int,
+    step_bars: int | None = None,
+    anchored: bool = False,
+) -> list[tuple[slice, slice]]:
+    """(train, test) bar slices; rolling windows slide, anchored windows grow from bar 0."""
+    if train_bars < 2 or test_bars < 2:
+        raise ValueError("train_bars and test_bars must be at least 2")
+    step = step_bars or test_bars
+    if step < test_bars:
+        raise ValueError("step_bars must be >= test_bars so out-of-sample windows do not overlap")
+    windows = []
+    start = 0
+    while start + train_bars + test_bars <= n_bars:
+        train_start = 0 if anchored else start
+        train_end = start + train_bars
+        windows.append((slice(train_start, train_end), slice(train_end, train_end + test_bars)))
+        start += step
+    return windows
+
+
+# Per-worker full feature frame, set once by the pool initializer (pool processes only); folds slice it.
+_FOLD_WORKER: dict[str, Any] = {}
+
+
+def _init_fold_worker(data: pd.DataFrame, initial_capital: float) -> None:
+    _FOLD_WORKER["data"] = data
+    _FOLD_WORKER["initial_capital"] = initial_capital
+
+
+def _run_fold(
+    data: pd.DataFrame,
+    capital: float,
+    strategy: dict[str, Any],
+    train: slice,
+    test: slice,
+    optimize_kwargs: dict[str, Any],
+    cancel_event: threading.Event | None = None,
+) -> dict[str, Any]:
+    """Optimize on the train slice, then backtest the winner on the following test slice."""
+    optimizer = StrategyOptimizer(data.iloc[train], initial_capital=capital)
+    optimized = optimizer.optimize(strategy, cancel_event=cancel_event, **optimize_kwargs)
+    best = optimized["optimized_strategy"]
+    oos = BacktestEngine(initial_capital=capital).run_backtest(best, data.iloc[test])
+    return {
+        "train_start": str(data.index[train.start]),
+        "train_end": str(data.index[train.stop - 1]),
+        "test_start": str(data.index[test.start]),
+        "test_end": str(data.index[test.stop - 1]),
+        "best_params": optimized["best_params"],
+        "strategy": best,
+        "in_sample": optimized["best_metrics"],
+        "out_of_sample": oos["metrics"],
+        "equity_curve": oos["equity_curve"],
+        "trades": oos["trades"],
+    }
+
+
+def _run_fold_indexed(task: tuple[int, dict[str, Any], slice, slice, dict[str, Any]]) -> tuple[int, dict[str, Any]]:
+    k, strategy, train, test, optimize_kwargs = task
+    return k, _run_fold(_FOLD_WORKER["data"], _FOLD_WORKER["initial_capital"], strategy, train, test, optimize_kwargs)
+
+
+class WalkForwardAnalyzer:
+    """Rolling or anchored walk-forward analysis over one precomputed feature frame.
+
+    Features are computed once over the full history by the caller and sliced
+    per fold. Indicators only look backwards, so test slices keep their warm-up
+    without leaking future data. Folds are independent and run across a
+    process pool.
+    """
+
+    def __init__(self, data: pd.DataFrame, initial_capital: float = 100_000, max_workers: int = 1) -> None:
+        self.data = data
+        self.initial_capital = initial_capital
+        self.max_workers = max(1, min(max_workers, os.cpu_count() or 1))
+
+    def run(
+        self,
+        strategy: dict[str, Any],
+        train_bars: int = 252,
+        test_bars: int = 63,
+        step_bars: int | None = None,
+        anchored: bool = False,
+        target_metric: str = "sharpe_ratio",
+        method: str = "grid",
+        steps: int = 5,
+        span: float = 0.5,
+        max_candidates: int = 100,
+        seed: int | None = None,
+        time_budget_s: float = 60.0,
+        cancel_event: threading.Event | None = None,
+    ) -> dict[str, Any]:
+        """Optimize each train window, evaluate on its test window, and stitch the OOS equity."""
+        started = time.monotonic()
+        deadline = started + time_budget_s
+        windows = walk_forward_windows(len(self.data), train_bars, test_bars, step_bars, anchored)
+        if not windows:
+            raise ValueError("Not enough bars for one train/test window")
+
+        def _kwargs() -> dict[str, Any]:
+            return {
+                "target_metric": target_metric,
+                "method": method,
+                "steps": steps,
+                "span": span,
+                "max_candidates": max_candidates,
+                "seed": seed,
+                "time_budget_s": max(0.0, deadline - time.monotonic()),
+            }
+
+        def _stopped() -> bool:
+            return time.monotonic() >= deadline or (cancel_event is not None and cancel_event.is_set())
+
+        folds: dict[int, dict[str, Any]] = {}
+        if self.max_workers == 1:
+            # Inline: pass the frame directly; _FOLD_WORKER belongs to pool processes
+            for k, (train, test) in enumerate(windows):
+                if _stopped():
+                    break
+                folds[k] = _run_fold(self.data, self.initial_capital, strategy, train, test, _kwargs(), cancel_event)
+        else:
+            # Terminated on exit, so folds still optimizing stop with the budget or cancel
+            with sweep_pool(self.max_workers, _init_fold_worker, (self.data, self.initial_capital)) as pool:
+                results = pool.imap_unordered(
+                    _run_fold_indexed,
+                    [(k, strategy, train, test, _kwargs()) for k, (train, test) in enumerate(windows)],
+                )
+                remaining = len(windows)
+                while remaining and not _stopped():
+                    try:
+                        k, fold = results.next(timeout=min(0.25, max(0.0, deadline - time.monotonic())))
+                    except multiprocessing.TimeoutError:
+                        continue
+                    folds[k] = fold
+                    remaining -= 1
+
+        ordered = [folds[k] for k in sorted(folds)]
+        equity = self._stitch([f["equity_curve"] for f in ordered])
+        engine = BacktestEngine(initial_capital=self.initial_capital)
+        engine.trades = [Trade(**t) for f in ordered for t in f["trades"]]
+        # _calculate_metrics only uses the frame for its length (years of data)
+        oos_metrics = engine._calculate_metrics(equity, equity) if ordered else None
+        return {
+            "folds": [{k: v for k, v in f.items() if k not in ("equity_curve", "trades")} for f in ordered],
+            "out_of_sample_metrics": oos_metrics,
+            "out_of_sample_equity_curve": equity,
+            "total_folds": len(windows),
+            "completed_folds": len(ordered),
+            "cancelled": len(ordered) < len(windows),
+            "elapsed_s": round(time.monotonic() - started, 3),
+        }
+
+    def _stitch(self, curves: list[list[float]]) -> list[float]:
+        """Chain fold curves: each test fold compounds from where the previous one ended."""
+        if not curves:
+            return [float(self.initial_capital)]
+        stitched = [float(self.initial_capital)]
+        for curve in curves:
+            arr = np.asarray(curve, dtype=float)
+            if len(arr) < 2 or arr[0] == 0:
+                continue
+            stitched.extend((arr[1:] / arr[0] * stitched[-1]).tolist())
+        return stitched
@@ -0,0 +1,275 @@
+"""Micro-benchmarks for the feature, rule-evaluation, backtest and signal hot paths.
+
+    python scripts/benchmark.py --save benchmarks/baseline.json         # record a baseline
+    python scripts/benchmark.py --compare benchmarks/baseline.json      # exit 1 on a regression
+    python scripts/benchmark.py --sizes 1k,100k --symbols 1,50 --filter backtest
+
+Data comes from a seeded synthetic OHLCV generator, so every run times the
+same bars. Each benchmark reports the best of ``--repeat`` timings (each
+averaged over enough calls to last ``--min-time``); comparisons use that best
+time, and a benchmark regresses when it is more than ``--threshold`` slower
+than the baseline. Baselines are machine-specific: record and compare on the
+same host.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.backtest_engine import BacktestEngine  # noqa: E402
+from app.services.feature_engineering import TechnicalFeatures  # noqa: E402
+from app.services.portfolio_engine import PortfolioBacktestEngine  # noqa: E402
+from app.services.rule_compiler import rules_mask  # noqa: E402
+from app.services.signal_check import evaluate_signals  # noqa: E402
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+SYMBOL_COUNTS = (1, 50, 500)
+# Bars per symbol for the multi-symbol benchmarks (about four years of daily data)
+PANEL_BARS = 1_000
+
+STRATEGY = {
+    "name": "Benchmark",
+    "entry_rules": ["rsi < 35 and volume_ratio > 1.0", "macd_diff > 0 and price_position < 0.2"],
+    "exit_rules": ["rsi > 65 or price_position > 0.95"],
+    "stop_loss": 0.02,
+    "take_profit": 0.04,
+    "asset_allocation": {"max_position_size": 0.2, "max_positions": 10},
+}
+
+Benchmark = tuple[str, Callable[[], Callable[[], Any]]]  # (name, setup returning the timed callable)
+
+
+def synthetic_ohlcv(bars: int, seed: int = 0, start: str = "2000-01-03") -> pd.DataFrame:
+    """Deterministic minute-bar OHLCV: GBM closes with volatility regimes, so rules fire and trades close."""
+    rng = np.random.default_rng(seed)
+    regime_vol = np.repeat(rng.choice([0.002, 0.006, 0.012], size=bars // 500 + 1), 500)[:bars]
+    close = 100 * np.exp(np.cumsum(rng.normal(0.00001, regime_vol)))
+    open_ = np.concatenate(([close[0]], close[:-1])) * (1 + rng.normal(0, regime_vol / 4))
+    wick = np.abs(rng.normal(0, regime_vol / 2, (2, bars)))
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) * (1 + wick[0]),
+            "low": np.minimum(open_, close) * (1 - wick[1]),
+            "close": close,
+            "volume": rng.lognormal(13, 0.5, bars).round(),
+        },
+        index=pd.date_range(start, periods=bars, freq="min", name="date"),
+    )
+
+
+def synthetic_panel(symbols: int, bars: int = PANEL_BARS, seed: int = 0) -> dict[str, pd.DataFrame]:
+    """``symbols`` independent daily OHLCV frames on shared business days (as fetch_multiple_symbols returns)."""
+    index = pd.bdate_range("2015-01-01", periods=bars, name="date")
+    return {
+        f"SYM{i:03d}": synthetic_ohlcv(bars, seed + i).set_axis(index)
+        for i in range(symbols)
+    }
+
+
+@lru_cache(maxsize=None)
+def _ohlcv(bars: int) -> pd.DataFrame:
+    return synthetic_ohlcv(bars)
+
+
+@lru_cache(maxsize=None)
+def _features(bars: int) -> pd.DataFrame:
+    return TechnicalFeatures.calculate_all_features(_ohlcv(bars))
+
+
+@lru_cache(maxsize=None)
+def _panel(symbols: int) -> dict[str, pd.DataFrame]:
+    return synthetic_panel(symbols)
+
+
+def _latest_rows(symbols: int) -> list[tuple[pd.Series, pd.Series]]:
+    """(current, prev) rows per symbol, what the scanner evaluates each cycle."""
+    rows = []
+    for df in _panel(symbols).values():
+        tail = TechnicalFeatures.calculate_all_features(df.iloc[-120:])
+        tail["sentiment"] = 0.5
+        rows.append((tail.iloc[-1], tail.iloc[-2]))
+    return rows
+
+
+def build_benchmarks(sizes: list[str], symbol_counts: list[int]) -> list[Benchmark]:
+    benches: list[Benchmark] = []
+    for label in sizes:
+        bars = SIZES[label]
+
+        def _metrics(bars: int = bars) -> Callable[[], Any]:
+            engine = BacktestEngine()
+            equity = engine.run_backtest(STRATEGY, _features(bars))["equity_curve"]
+            return lambda: engine._calculate_metrics(equity, _features(bars))
+
+        benches += [
+            (f"features/{label}", lambda bars=bars: lambda: TechnicalFeatures.calculate_all_features(_ohlcv(bars))),
+            (f"rules_mask/{label}", lambda bars=bars: lambda: rules_mask(STRATEGY["entry_rules"], _features(bars))),
+            (f"backtest/{label}", lambda bars=bars: lambda: BacktestEngine().run_backtest(STRATEGY, _features(bars))),
+            (f"metrics/{label}", _metrics),
+        ]
+
+    def _evaluate_rule() -> Callable[[], Any]:
+        data = _features(SIZES["1k"]).iloc[-1000:].copy()
+        data["sentiment"] = 0.5
+        engine = BacktestEngine()
+        rows = [data.iloc[i] for i in range(1, len(data))]
+        rule = STRATEGY["entry_rules"][0]
+        return lambda: [engine._evaluate_rule(rule, rows[i], rows[i - 1]) for i in range(1, len(rows))]
+
+    benches.append(("evaluate_rule/1k_rows", _evaluate_rule))
+    for count in symbol_counts:
+
+        def _signals(count: int = count) -> Callable[[], Any]:
+            rows = _latest_rows(count)
+            return lambda: [evaluate_signals(STRATEGY, current, prev) for current, prev in rows]
+
+        def _panel_features(count: int = count) -> Callable[[], Any]:
+            panel = _panel(count)
+            close = pd.DataFrame({s: df["close"] for s, df in panel.items()})
+            volume = pd.DataFrame({s: df["volume"] for s, df in panel.items()})
+            return lambda: TechnicalFeatures.calculate_panel_features(close, volume)
+
+        benches += [
+            (f"signals/{count}sym", _signals),
+            (f"panel_features/{count}sym", _panel_features),
+            (f"portfolio/{count}sym", lambda count=count: lambda: PortfolioBacktestEngine().run_portfolio(STRATEGY, _panel(count))),
+        ]
+    return benches
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> dict[str, Any]:
+    """Seconds per call: ``repeat`` timings, each looping ``number`` calls so it lasts at least ``min_time``."""
+    fn()  # warm-up: compiled rules, lazy imports, allocator
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - t0) / number)
+    return {
+        "best_s": min(times),
+        "median_s": statistics.median(times),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run_benchmarks(
+    benches: list[Benchmark],
+    repeat: int = 5,
+    min_time: float = 0.2,
+    name_filter: str | None = None,
+    log: Callable[[str], None] | None = print,
+) -> dict[str, Any]:
+    results = {}
+    for name, setup in benches:
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = measure(setup(), repeat, min_time)
+        if log is not None:
+            log(f"{name:<28} {_fmt(results[name]['best_s']):>10}  (x{results[name]['number']})")
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float = 0.2) -> list[dict[str, Any]]:
+    """Rows for benchmarks present in both runs; ``regressed`` when slower than baseline by more than ``threshold``."""
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["best_s"] / base["best_s"] if base["best_s"] > 0 else 1.0
+        rows.append({
+            "name": name,
+            "baseline_s": base["best_s"],
+            "current_s": result["best_s"],
+            "ratio": ratio,
+            "regressed": ratio > 1 + threshold,
+        })
+    return rows
+
+
+def _fmt(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.3f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(SIZES), help="bar counts for single-symbol benchmarks")
+    parser.add_argument("--symbols", default=",".join(map(str, SYMBOL_COUNTS)), help="symbol counts for panel benchmarks")
+    parser.add_argument("--filter", help="only benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON to compare against; exit 1 on regression")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before failing (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    benches = build_benchmarks(
+        [s.strip() for s in args.sizes.split(",") if s.strip()],
+        [int(s) for s in args.symbols.split(",") if s.strip()],
+    )
+    current = run_benchmarks(benches, args.repeat, args.min_time, args.filter)
+    rows = []
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        rows = compare(baseline, current, args.threshold)
+        # Re-time apparent regressions once, so a single noisy timing does not fail the run
+        suspects = {row["name"] for row in rows if row["regressed"]}
+        if suspects:
+            retry = run_benchmarks([b for b in benches if b[0] in suspects], args.repeat, args.min_time, log=None)
+            for name, result in retry["results"].items():
+                if result["best_s"] < current["results"][name]["best_s"]:
+                    current["results"][name] = result
+            rows = compare(baseline, current, args.threshold)
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(current, indent=2))
+    if args.compare:
+        print(f"\n{'benchmark':<28} {'baseline':>10} {'current':>10} {'ratio':>7}")
+        for row in rows:
+            flag = "  REGRESSED" if row["regressed"] else ""
+            print(f"{row['name']:<28} {_fmt(row['baseline_s']):>10} {_fmt(row['current_s']):>10} {row['ratio']:>6.2f}x{flag}")
+        if any(row["regressed"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Concurrent load test for the Python API: latency percentiles under N in-flight requests.
+
+    python scripts/load_test.py --url http://localhost:8000 --path /api/v1/backtest/run \
+        --body backtest.json --requests 500 --concurrency 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any
+
+import httpx
+import numpy as np
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    path: str,
+    body: dict[str, Any] | None = None,
+    requests: int = 500,
+    concurrency: int = 50,
+) -> dict[str, float]:
+    """Send ``requests`` calls with ``concurrency`` in flight; return latency percentiles in ms."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def _one() -> None:
+        nonlocal errors
+        async with semaphore:
+            t0 = time.perf_counter()
+            try:
+                r = await (client.post(path, json=body) if body is not None else client.get(path))
+                if r.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    lat = np.asarray(latencies)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(float(np.percentile(lat, 50)), 1),
+        "p95_ms": round(float(np.percentile(lat, 95)), 1),
+        "p99_ms": round(float(np.percentile(lat, 99)), 1),
+        "max_ms": round(float(lat.max()), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/v1/health")
+    parser.add_argument("--body", help="JSON file to POST (GET when omitted)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+    body = None
+    if args.body:
+        with open(args.body) as f:
+            body = json.load(f)
+
+    async def _run() -> dict[str, float]:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+            return await run_load(client, args.path, body, args.requests, args.concurrency)
+
+    print(json.dumps(asyncio.run(_run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -34,3 +34,105 @@ def test_backtest_engine_run():
     assert "equity_curve" in result
     assert result["metrics"]["total_trades"] >= 0
     assert result["metrics"]["final_equity"] >= 0
+
+
+def test_array_mode_matches_reference_loop():
+    """Array state machine reproduces the per-bar reference loop exactly."""
+    from app.services.feature_engineering import TechnicalFeatures
+    rng = np.random.default_rng(7)
+    n = 400
+    dates = pd.date_range("2020-01-01", periods=n, freq="B")
+    data = pd.DataFrame(
+        {"close": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), "volume": rng.uniform(1e5, 1e6, n)},
+        index=dates,
+    )
+    data = TechnicalFeatures().calculate_all_features(data)
+    sentiment = pd.DataFrame({"sentiment": rng.uniform(0, 1, n)}, index=dates)
+    strategy = {
+        "entry_rules": ["rsi < 40 and sentiment_score > 0.4", "macd_diff > 0 and volume_ratio > 1.0"],
+        "exit_rules": ["rsi > 60 or sentiment_score < 0.2"],
+        "stop_loss": 0.02,
+        "take_profit": 0.05,
+        "asset_allocation": {"max_position_size": 0.5},
+    }
+    fast = BacktestEngine(mode="array").run_backtest(strategy, data, sentiment)
+    ref = BacktestEngine(mode="reference").run_backtest(strategy, data, sentiment)
+    assert fast["metrics"]["total_trades"] > 0
+    assert fast["equity_curve"] == ref["equity_curve"]
+    assert fast["trades"] == ref["trades"]
+    assert fast["metrics"] == ref["metrics"]
+
+
+def test_run_batch_matches_individual_runs():
+    """Batch over a shared frame gives the same results as one run per strategy."""
+    from app.services.feature_engineering import TechnicalFeatures
+    rng = np.random.default_rng(3)
+    n = 300
+    data = pd.DataFrame(
+        {"close": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), "volume": 1_000_000.0},
+        index=pd.date_range("2020-01-01", periods=n, freq="B"),
+    )
+    data = TechnicalFeatures().calculate_all_features(data)
+    strategies = [
+        {"entry_rules": [f"rsi < {t}"], "exit_rules": ["rsi > 60"], "stop_loss": 0.03, "take_profit": 0.06}
+        for t in (30, 40, 50)
+    ] + [{"entry_rules": ["rsi < 40"], "stop_loss": "bad"}]
+    engine = BacktestEngine()
+    batch = engine.run_batch(strategies, data)
+    for strategy, result in zip(strategies[:3], batch[:3]):
+        single = BacktestEngine().run_backtest(strategy, data)
+        assert result["metrics"] == single["metrics"]
+        assert result["equity_curve"] == single["equity_curve"]
+    assert "error" in batch[3]
+
+
+def test_streamed_chunks_rebuild_the_curve_and_cancel_stops():
+    """on_chunk slices concatenate to the full equity curve; a set cancel_event aborts."""
+    import threading
+
+    import pytest
+
+    from app.services.backtest_engine import BacktestCancelled
+    from app.services.feature_engineering import TechnicalFeatures
+    rng = np.random.default_rng(11)
+    n = 1000
+    data = pd.DataFrame(
+        {"close": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), "volume": 1_000_000.0},
+        index=pd.date_range("2020-01-01", periods=n, freq="B"),
+    )
+    data = TechnicalFeatures().calculate_all_features(data)
+    strategy = {"entry_rules": ["rsi < 40"], "exit_rules": ["rsi > 60"], "stop_loss": 0.03}
+    for mode in ("array", "reference"):
+        chunks = []
+        result = BacktestEngine(mode=mode).run_backtest(
+            strategy, data, on_chunk=lambda offset, values: chunks.append((offset, values)), chunk_bars=100
+        )
+        assert len(chunks) > 3
+        assert [o for o, _ in chunks] == list(np.cumsum([0] + [len(v) for _, v in chunks[:-1]]))
+        assert [v for _, values in chunks for v in values] == result["equity_curve"]
+
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(BacktestCancelled):
+        BacktestEngine().run_backtest(strategy, data, chunk_bars=100, cancel_event=cancel)
+
+
+def test_metrics_when_equity_ends_below_zero():
+    """A wiped-out account reports -100% annual return instead of failing on a complex power."""
+    data = pd.DataFrame({"close": [1.0, 1.0, 1.0]})
+    metrics = BacktestEngine()._calculate_metrics([100_000.0, 50_000.0, -10.0], data)
+    assert metrics["annual_return"] == -1.0
+    assert metrics["total_return"] < -1
+
+
+def test_invalid_risk_parameters_raise_in_both_modes():
+    """Malformed stop_loss / asset_allocation raise ValueError (a 400 in the API) rather than being skipped."""
+    import pytest
+    data = pd.DataFrame({"close": np.linspace(100, 110, 50)}, index=pd.date_range("2020-01-01", periods=50, freq="B"))
+    for strategy in (
+        {"entry_rules": ["close > 0"], "stop_loss": "abc"},
+        {"entry_rules": ["close > 0"], "asset_allocation": ["not", "an", "object"]},
+    ):
+        for mode in ("array", "reference"):
+            with pytest.raises(ValueError):
+                BacktestEngine(mode=mode).run_backtest(strategy, data)
@@ -0,0 +1,32 @@
+"""Benchmark suite: deterministic data, every benchmark runs, regression detection."""
+import numpy as np
+
+from scripts.benchmark import build_benchmarks, compare, run_benchmarks, synthetic_ohlcv, synthetic_panel
+
+
+def test_synthetic_ohlcv_is_deterministic_and_consistent():
+    a, b = synthetic_ohlcv(2000, seed=3), synthetic_ohlcv(2000, seed=3)
+    assert a.equals(b)
+    assert not a.equals(synthetic_ohlcv(2000, seed=4))
+    assert (a["high"] >= a[["open", "close"]].max(axis=1)).all()
+    assert (a["low"] <= a[["open", "close"]].min(axis=1)).all()
+    assert np.isfinite(a.to_numpy()).all()
+    panel = synthetic_panel(3, bars=50)
+    assert list(panel) == ["SYM000", "SYM001", "SYM002"]
+    assert all(df.index.equals(panel["SYM000"].index) for df in panel.values())
+
+
+def test_every_benchmark_runs():
+    benches = build_benchmarks(["1k"], [1])
+    current = run_benchmarks(benches, repeat=1, min_time=0, log=None)
+    assert set(current["results"]) == {name for name, _ in benches}
+    assert {"features/1k", "backtest/1k", "metrics/1k", "evaluate_rule/1k_rows", "signals/1sym"} <= set(current["results"])
+    assert all(r["best_s"] > 0 for r in current["results"].values())
+
+
+def test_compare_flags_only_regressions_past_threshold():
+    baseline = {"results": {"a": {"best_s": 1.0}, "b": {"best_s": 1.0}, "gone": {"best_s": 1.0}}}
+    current = {"results": {"a": {"best_s": 1.1}, "b": {"best_s": 1.5}, "new": {"best_s": 9.0}}}
+    rows = {r["name"]: r for r in compare(baseline, current, threshold=0.2)}
+    assert set(rows) == {"a", "b"}
+    assert not rows["a"]["regressed"] and rows["b"]["regressed"]
@@ -0,0 +1,50 @@
+"""Shared cache tier tests (Redis is unreachable here, so the in-process tier serves)."""
+import numpy as np
+import pandas as pd
+
+from app.services.cache import LocalLRU, SharedCache, decode_value, encode_value, strategy_hash
+
+
+def test_encode_roundtrip_frame_and_record():
+    index = pd.date_range("2021-01-01", periods=50, name="date")
+    frame = pd.DataFrame({"close": np.linspace(1, 2, 50), "volume": np.arange(50)}, index=index)
+    pd.testing.assert_frame_equal(decode_value(encode_value(frame)), frame, check_freq=False)
+    record = {
+        "metrics": {"sharpe_ratio": 1.5, "total_trades": 2},
+        "equity_curve": [100.0, 101.5],
+        "trades": [{"entry_date": "2021-01-04", "pnl": 1.5, "shares": 10}],
+    }
+    assert decode_value(encode_value(record)) == record
+
+
+def test_strategy_hash_ignores_key_order_and_cosmetic_fields():
+    a = {"name": "A", "entry_rules": ["rsi < 30"], "stop_loss": 0.02}
+    b = {"stop_loss": 0.02, "entry_rules": ["rsi < 30"], "name": "B"}
+    assert strategy_hash(a) == strategy_hash(b)
+    assert strategy_hash(a) != strategy_hash({**a, "stop_loss": 0.03})
+
+
+def test_local_lru_evicts_by_bytes_and_expires():
+    lru = LocalLRU(max_bytes=250)
+    lru.set("a", b"x" * 100, ttl_s=60)
+    lru.set("b", b"x" * 100, ttl_s=60)
+    lru.get("a")  # a is now most recently used
+    lru.set("c", b"x" * 100, ttl_s=60)
+    assert lru.get("b") is None and lru.get("a") is not None and lru.nbytes == 200
+    lru.set("d", b"x" * 10, ttl_s=0)
+    assert lru.get("d") is None
+    lru.set("big", b"x" * 1000, ttl_s=60)
+    assert lru.get("big") is None
+
+
+def test_falls_back_to_local_tier_when_redis_is_down():
+    cache = SharedCache(redis_url="redis://127.0.0.1:1/0", socket_timeout_s=0.05)
+    assert cache.get("k") is None
+    assert cache.stats["redis_errors"] == 1 and not cache.redis_available
+    assert cache.set("k", {"value": [1.0, 2.0]})
+    assert cache.get("k") == {"value": [1.0, 2.0]}
+    assert cache.stats["local_hits"] == 1
+
+    small = SharedCache(max_item_bytes=64)
+    assert not small.set("big", {"value": list(range(1000))})
+    assert small.stats["oversize"] == 1
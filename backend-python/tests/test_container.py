@@ -0,0 +1,90 @@
+"""Service container: build once, record failures, retry on next access (or after a cooldown)."""
+import threading
+import time
+
+import pytest
+
+from app.config import Settings
+from app.services.container import FAILED, READY, ServiceContainer
+
+
+def test_service_is_built_once_across_threads():
+    container = ServiceContainer(Settings(warm_up_services=True))
+    builds = []
+
+    def _build():
+        builds.append(1)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(container._get("sentiment", _build))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(builds) == 1
+    assert all(r is results[0] for r in results)
+    assert container.status()["sentiment"]["state"] == READY
+
+
+def test_warm_up_records_failures_and_sets_ready(tmp_path):
+    container = ServiceContainer(Settings(warm_up_services=True, mlflow_tracking_uri=None, data_dir=str(tmp_path)))
+    assert not container.ready
+    status = container.warm_up()
+    assert container.ready
+    assert status["sentiment"]["state"] == READY
+    assert container.sentiment is container.sentiment
+    assert status["leaderboard"]["state"] == READY
+    for name in ("knowledge_base", "generator", "tracker"):
+        assert status[name]["state"] in (READY, FAILED)
+    container.close()
+
+
+def test_failed_build_is_retried():
+    container = ServiceContainer(Settings(warm_up_services=False))
+    assert container.ready
+    calls = []
+
+    def _flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("down")
+        return "service"
+
+    try:
+        container._get("tracker", _flaky)
+    except RuntimeError:
+        pass
+    assert container.status()["tracker"] == {"state": FAILED, "error": "down"}
+    assert container._get("tracker", _flaky) == "service"
+    assert container.status()["tracker"]["state"] == READY
+
+
+def test_failed_build_waits_for_cooldown(monkeypatch):
+    container = ServiceContainer(Settings(warm_up_services=False))
+    calls = []
+
+    def _down():
+        calls.append(1)
+        raise RuntimeError("down")
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    for _ in range(3):
+        with pytest.raises(RuntimeError, match="down"):
+            container._get("tracker", _down, retry_after_s=30)
+    assert len(calls) == 1
+    assert container.status()["tracker"] == {"state": FAILED, "error": "down"}
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+    assert container._get("tracker", lambda: "service", retry_after_s=30) == "service"
+    assert container.status()["tracker"]["state"] == READY
+
+
+def test_mlflow_queue_status_does_not_build_the_queue(tmp_path):
+    container = ServiceContainer(Settings(warm_up_services=False, mlflow_tracking_uri=None, data_dir=str(tmp_path)))
+    assert container.mlflow_queue_status() is None
+    assert container.status()["mlflow_queue"]["state"] == "pending"
+    container.mlflow_queue
+    assert container.mlflow_queue_status()["journal_depth"] == 0
+    container.close()
@@ -0,0 +1,60 @@
+"""Embedding and retrieval caches for the knowledge base."""
+import numpy as np
+
+from app.services.embedding_cache import CachedEmbeddings, EmbeddingCache, RetrievalCache
+
+
+class _CountingModel:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.texts = 0
+
+    def _vec(self, text):
+        rng = np.random.default_rng(abs(hash(" ".join(text.split()).lower())) % 2**32)
+        return rng.standard_normal(8).tolist()
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.texts += len(texts)
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        return self._vec(text)
+
+
+def test_embedding_cache_normalizes_text_and_persists(tmp_path):
+    model = _CountingModel()
+    emb = CachedEmbeddings(model, EmbeddingCache(max_entries=2, persist_dir=tmp_path), model_name="m")
+    first = emb.embed_query("RSI  oversold\nin a Bull market")
+    assert emb.embed_query("rsi oversold in a bull market") == first
+    assert model.calls == 1
+
+    docs = emb.embed_documents(["a", "b", "rsi oversold in a bull market"])
+    assert model.texts == 2 and docs[2] == first
+
+    # A fresh process (empty LRU) reads the vectors back from disk
+    cache = EmbeddingCache(max_entries=2, persist_dir=tmp_path)
+    reloaded = CachedEmbeddings(model, cache, model_name="m")
+    assert reloaded.embed_query("RSI oversold in a bull market") == first
+    assert cache.stats["disk_hits"] == 1 and model.calls == 2
+
+
+def test_retrieval_cache_buckets_near_queries_and_invalidates():
+    cache = RetrievalCache(max_entries=8, ttl_s=60)
+    rng = np.random.default_rng(1)
+    q = rng.standard_normal(384)
+    results = [{"content": "x", "metadata": {}, "score": 0.1}]
+    cache.put(q, 5, None, results)
+
+    assert cache.get(q + 1e-4 * rng.standard_normal(384), 5) == results
+    assert cache.get(q, 3) is None
+    assert cache.get(q, 5, {"market_regime": "Bullish"}) is None
+    assert cache.get(rng.standard_normal(384), 5) is None
+
+    generation = cache.generation
+    cache.invalidate()
+    assert cache.get(q, 5) is None
+    cache.put(q, 5, None, results, generation)  # search started before the write
+    assert cache.get(q, 5) is None
+    assert cache.info()["hits"] == 1 and cache.info()["invalidations"] == 1
@@ -0,0 +1,63 @@
+"""Worker pool helpers: CPU stages run in a process pool, I/O in threads."""
+import asyncio
+import os
+import threading
+
+from app.services.executors import run_cpu, run_io, shutdown_executors
+
+
+def test_run_cpu_uses_another_process_and_run_io_another_thread(monkeypatch):
+    monkeypatch.setenv("CPU_WORKERS", "1")
+    shutdown_executors()
+
+    async def _run():
+        return await asyncio.gather(run_cpu(os.getpid), run_io(threading.get_ident), run_io(sum, [1, 2, 3]))
+
+    try:
+        pid, thread, total = asyncio.run(_run())
+    finally:
+        shutdown_executors()
+    assert pid != os.getpid()
+    assert thread != threading.get_ident()
+    assert total == 6
+
+
+def test_zero_cpu_workers_falls_back_to_threads(monkeypatch):
+    monkeypatch.setenv("CPU_WORKERS", "0")
+    shutdown_executors()
+    try:
+        assert asyncio.run(run_cpu(os.getpid)) == os.getpid()
+    finally:
+        shutdown_executors()
+
+
+def test_sweep_slot_caps_concurrent_sweeps(monkeypatch):
+    import pytest
+
+    from app.services.executors import SweepsBusy, sweep_slot
+
+    monkeypatch.setenv("OPTIMIZER_MAX_SWEEPS", "1")
+
+    async def _run():
+        async with sweep_slot(1.0):
+            with pytest.raises(SweepsBusy):
+                async with sweep_slot(0.05):
+                    pass
+        async with sweep_slot(0.05):
+            return True
+
+    assert asyncio.run(_run())
+
+
+def test_sweep_pool_terminates_running_workers():
+    import time
+
+    from app.services.executors import sweep_pool
+
+    with sweep_pool(1, None, ()) as pool:
+        pid = pool.apply(os.getpid)
+        pool.apply_async(time.sleep, (60,))
+        started = time.monotonic()
+    # Exiting kills the worker instead of waiting for the minute-long task
+    assert time.monotonic() - started < 10
+    assert pid != os.getpid()
@@ -0,0 +1,60 @@
+"""Technical feature tests."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.feature_engineering import TechnicalFeatures
+from app.services.rule_compiler import required_indicators, rules_mask
+
+
+def _ohlcv(n: int = 400) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame(
+        {"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close, "Volume": rng.integers(0, 1e6, n)},
+        index=pd.date_range("2020-01-01", periods=n, freq="B"),
+    )
+
+
+def test_lazy_features_match_full_computation():
+    df = _ohlcv()
+    full = TechnicalFeatures.calculate_all_features(df)
+    names = [c for c in full.columns if c not in ("open", "high", "low", "close", "volume")]
+    lazy = TechnicalFeatures.calculate_all_features(df, names)
+    pd.testing.assert_frame_equal(lazy, full)
+
+    only_rsi = TechnicalFeatures.calculate_features(df, ["rsi"])
+    assert list(only_rsi.columns) == ["open", "high", "low", "close", "volume", "rsi"]
+    # bb_width pulls in the Bollinger bands it depends on without adding them as columns
+    width = TechnicalFeatures.calculate_features(df, ["bb_width"])
+    np.testing.assert_array_equal(width["bb_width"].to_numpy(), full["bb_width"].to_numpy())
+    assert "bb_high" not in width.columns
+
+
+def test_custom_windows_from_rules():
+    df = _ohlcv()
+    rules = ["rsi_7 < 30 and sma_200 > 0 and sentiment_score > 0.5", "bogus(1)"]
+    assert required_indicators(rules) == ["rsi_7", "sma_200"]
+    data = TechnicalFeatures.calculate_features(df, required_indicators(rules))
+    expected = data["close"].rolling(200).mean()
+    np.testing.assert_allclose(data["sma_200"].to_numpy(), expected.to_numpy(), equal_nan=True)
+    # Same warm-up as ta: the first diff counts as a zero move
+    assert data["rsi_7"].iloc[6:].notna().all() and data["rsi_7"].iloc[:6].isna().all()
+    mask = rules_mask(["rsi_7 < 30 and sma_200 > 0"], data)
+    assert not mask[:199].any()
+    assert (mask == ((data["rsi_7"] < 30) & (data["sma_200"] > 0)).to_numpy()).all()
+
+    with pytest.raises(ValueError):
+        TechnicalFeatures.calculate_features(df, ["rsi_0"])
+
+
+def test_indicator_memo_is_bounded_in_bytes():
+    from app.services.feature_engineering import _IndicatorMemo
+
+    memo = _IndicatorMemo(max_bytes=3 * 8 * 1000)
+    for i in range(5):
+        memo.put(("fp", "sma", i), pd.Series(np.zeros(1000)))
+    assert memo.bytes == 3 * 8 * 1000
+    assert memo.get(("fp", "sma", 0)) is None and memo.get(("fp", "sma", 4)) is not None
+    memo.put(("fp", "sma", 99), pd.Series(np.zeros(10_000)))  # larger than the whole budget
+    assert memo.get(("fp", "sma", 99)) is None
@@ -0,0 +1,57 @@
+"""Local strategy leaderboard: incremental records, filtered top-N, MLflow reconcile."""
+from app.services.leaderboard import StrategyLeaderboard
+from app.services.mlflow_tracking import summarize_run
+
+
+def _run(run_id, sharpe, total_return, symbol="AAPL", regime="bull", logged_at=1_700_000_000_000):
+    return summarize_run(
+        run_id,
+        {"name": f"s{run_id}", "market_regime": regime},
+        {"metrics": {"sharpe_ratio": sharpe, "total_return": total_return, "win_rate": 0.5}},
+        {"symbol": symbol, "start_date": "2024-01-01", "end_date": "2024-06-30"},
+        logged_at=logged_at,
+    )
+
+
+def test_top_orders_and_filters(tmp_path):
+    board = StrategyLeaderboard(tmp_path / "lb.sqlite3")
+    board.upsert([
+        _run("1", 1.0, 0.30),
+        _run("2", 2.0, 0.10),
+        _run("3", 3.0, 0.20, symbol="msft", regime="bear"),
+        _run("4", 0.5, 0.50, logged_at=1_600_000_000_000),
+    ])
+    assert [r["run_id"] for r in board.top(limit=2)] == ["3", "2"]
+    assert [r["run_id"] for r in board.top(order_by="total_return")][:2] == ["4", "1"]
+    assert [r["run_id"] for r in board.top(symbol="MSFT")] == ["3"]
+    assert [r["run_id"] for r in board.top(regime="bull")] == ["2", "1", "4"]
+    assert [r["run_id"] for r in board.top(since="2023-01-01")] == ["3", "2", "1"]
+    assert [r["run_id"] for r in board.top(until="2020-12-31")] == ["4"]
+    top = board.top(limit=1)[0]
+    assert top["symbol"] == "MSFT" and top["start_date"] == "2024-01-01" and top["sharpe_ratio"] == 3.0
+
+
+def test_record_hook_indexes_logged_job(tmp_path):
+    board = StrategyLeaderboard(tmp_path / "lb.sqlite3")
+    job = {"strategy": {"name": "x"}, "results": {"metrics": {"sharpe_ratio": 1.5}}, "params": {"symbol": "spy"}}
+    board.record("run-1", job)
+    board.record("run-1", job)  # replayed: still one row
+    assert len(board) == 1
+    assert board.top(symbol="SPY")[0]["name"] == "x"
+
+
+def test_reconcile_is_incremental(tmp_path):
+    board = StrategyLeaderboard(tmp_path / "lb.sqlite3", reconcile_interval_s=3600)
+    remote = [_run("a", 1.0, 0.1, logged_at=1_000_000), _run("b", 2.0, 0.2, logged_at=5_000_000)]
+    seen = []
+
+    def fetch(since_ms):
+        seen.append(since_ms)
+        return [r for r in remote if r["logged_at"] >= since_ms]
+
+    assert board.reconcile_if_due(fetch) == 2
+    assert board.reconcile_if_due(fetch) == 0  # not due yet
+    remote.append(_run("c", 3.0, 0.3, logged_at=9_000_000))
+    board.reconcile(fetch)
+    assert seen == [0, 5_000_000 - 60_000]
+    assert [r["run_id"] for r in board.top()] == ["c", "b", "a"]
@@ -0,0 +1,84 @@
+"""Market data store tests (yfinance is stubbed; no network)."""
+import asyncio
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.services.cache import SharedCache
+from app.services.market_data import MarketDataService
+from app.services.ohlcv_store import OHLCVStore
+
+
+def test_fetch_downloads_only_missing_gaps(tmp_path, monkeypatch):
+    history = pd.DataFrame(
+        {"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": np.arange(600.0), "Volume": 10},
+        index=pd.date_range("2019-01-01", periods=600, freq="B", tz="America/New_York"),
+    )
+    calls = []
+
+    def fake_history(self, start, end, interval):
+        calls.append((start, end))
+        lo, hi = pd.Timestamp(start, tz="America/New_York"), pd.Timestamp(end, tz="America/New_York")
+        return history[(history.index >= lo) & (history.index < hi)]
+
+    monkeypatch.setattr("yfinance.Ticker.history", fake_history)
+    svc = MarketDataService(OHLCVStore(tmp_path), cache=SharedCache())
+    first = asyncio.run(svc.fetch_ohlcv_frame("AAPL", "2020-01-01", "2020-06-01"))
+    asyncio.run(svc.fetch_ohlcv_frame("AAPL", "2020-02-01", "2020-03-01"))
+    wide = asyncio.run(svc.fetch_ohlcv_frame("AAPL", "2019-06-01", "2020-09-01"))
+    assert calls == [("2020-01-01", "2020-06-01"), ("2019-06-01", "2020-01-01"), ("2020-06-01", "2020-09-01")]
+    assert list(first.columns) == ["open", "high", "low", "close", "volume"]
+    assert wide.index.tz is None and wide.index.is_monotonic_increasing
+    assert wide.index[0] == pd.Timestamp("2019-06-03")
+
+    # A fresh service on the same store is served from disk
+    calls.clear()
+    fresh = MarketDataService(OHLCVStore(tmp_path), cache=SharedCache())
+    again = asyncio.run(fresh.fetch_ohlcv_frame("AAPL", "2019-06-01", "2020-09-01"))
+    assert calls == []
+    pd.testing.assert_frame_equal(again, wide)
+
+    # A service on an empty store is served by the shared cache
+    shared = MarketDataService(OHLCVStore(tmp_path / "other"), cache=svc.cache)
+    hit = asyncio.run(shared.fetch_ohlcv_frame("AAPL", "2019-06-01", "2020-09-01"))
+    assert calls == [] and not (tmp_path / "other" / "AAPL_1d.arrow").exists()
+    pd.testing.assert_frame_equal(hit, wide, check_freq=False)
+
+
+class _ThreadRecordingCache(SharedCache):
+    def __init__(self) -> None:
+        super().__init__()
+        self.threads: list[int] = []
+
+    def get(self, key):
+        self.threads.append(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key, value, ttl_s=None):
+        self.threads.append(threading.get_ident())
+        return super().set(key, value, ttl_s)
+
+
+def test_cache_and_store_calls_stay_off_the_event_loop(tmp_path, monkeypatch):
+    history = pd.DataFrame(
+        {"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": np.arange(50.0), "Volume": 10},
+        index=pd.date_range("2020-01-01", periods=50, freq="B"),
+    )
+    monkeypatch.setattr("yfinance.Ticker.history", lambda self, start, end, interval: history)
+    cache = _ThreadRecordingCache()
+    store = OHLCVStore(tmp_path)
+    store_threads = []
+    read, write = store.read, store.write
+    monkeypatch.setattr(store, "read", lambda *a: store_threads.append(threading.get_ident()) or read(*a))
+    monkeypatch.setattr(store, "write", lambda *a: store_threads.append(threading.get_ident()) or write(*a))
+    svc = MarketDataService(store, cache=cache)
+
+    async def _fetch():
+        await svc.fetch_ohlcv_frame("AAPL", "2020-01-01", "2020-02-01")
+        await svc.fetch_ohlcv_frame("AAPL", "2020-01-01", "2020-02-01")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(_fetch())
+    assert len(cache.threads) == 3 and loop_thread not in cache.threads
+    assert len(store_threads) == 2 and loop_thread not in store_threads
@@ -0,0 +1,32 @@
+"""Monte Carlo robustness tests."""
+import numpy as np
+
+from app.services.monte_carlo import run_monte_carlo
+
+
+def _backtest() -> dict:
+    rng = np.random.default_rng(0)
+    equity = (100_000 * np.cumprod(1 + rng.normal(0.0005, 0.01, 500))).tolist()
+    trades = [{"pnl": float(p)} for p in rng.normal(50, 500, 40)]
+    return {"equity_curve": equity, "trades": trades}
+
+
+def test_results_are_seeded_and_independent_of_chunk_size():
+    bt = _backtest()
+    a = run_monte_carlo(bt, simulations=500, seed=42, chunk_size=7)
+    b = run_monte_carlo(bt, simulations=500, seed=42)
+    assert a["metrics"] == b["metrics"]
+    for name in ("total_return", "max_drawdown", "sharpe_ratio"):
+        m = a["metrics"][name]
+        assert m["ci_lower"] <= m["median"] <= m["ci_upper"]
+    assert a["metrics"]["max_drawdown"]["ci_upper"] <= 0
+
+
+def test_trade_resampling_preserves_total_pnl_on_average():
+    bt = _backtest()
+    result = run_monte_carlo(bt, simulations=2000, method="trades", block_size=5, seed=1)
+    assert result["block_size"] == 1
+    assert 0 <= result["probability_of_loss"] <= 1
+    # Resampling with replacement leaves the expected additive return unchanged
+    mean_trade_return = np.mean([t["pnl"] for t in bt["trades"]]) / 100_000
+    assert abs(result["metrics"]["total_return"]["median"] - 40 * mean_trade_return) < 0.05
@@ -0,0 +1,98 @@
+"""NewsService against a local stub of NewsAPI's /everything endpoint."""
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from app.config import Settings
+from app.services.news_data import NewsService, dedupe_articles
+
+
+class _StubNewsAPI(BaseHTTPRequestHandler):
+    total = 250
+    rate_limit_next = 0
+    requests: list[dict] = []
+
+    def do_GET(self):
+        query = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        type(self).requests.append({**query, "api_key": self.headers.get("X-Api-Key")})
+        if type(self).rate_limit_next:
+            type(self).rate_limit_next -= 1
+            self._send(429, {"status": "error", "code": "rateLimited"}, {"Retry-After": "0"})
+            return
+        size, page = int(query["pageSize"]), int(query["page"])
+        start = (page - 1) * size
+        articles = []
+        for i in range(start, min(start + size, self.total)):
+            # Every 10th article is a syndicated copy of the one before it
+            n = i - 1 if i % 10 == 9 else i
+            articles.append({
+                "title": f"Headline {n}",
+                "description": "",
+                "url": f"https://news.example.com/{n}?utm_source={i}",
+                "publishedAt": "2024-01-02T00:00:00Z",
+                "source": {"name": "stub"},
+            })
+        self._send(200, {"status": "ok", "totalResults": self.total, "articles": articles})
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubNewsAPI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _StubNewsAPI.requests = []
+    _StubNewsAPI.rate_limit_next = 0
+    yield f"http://127.0.0.1:{server.server_address[1]}/v2"
+    server.shutdown()
+
+
+def _settings(stub_url, tmp_path):
+    return Settings(news_api_key="k", news_api_base_url=stub_url, data_dir=str(tmp_path), news_backoff_s=0.0)
+
+
+def test_pages_are_fetched_deduplicated_and_cached(stub_url, tmp_path):
+    svc = NewsService(_settings(stub_url, tmp_path))
+    articles = asyncio.run(svc.fetch_news("AAPL", "2024-01-01", "2024-01-03", max_articles=250))
+    pages = sorted(int(r["page"]) for r in _StubNewsAPI.requests)
+    assert pages == [1, 2, 3] and all(r["api_key"] == "k" for r in _StubNewsAPI.requests)
+    assert len(articles) == 225  # 25 syndicated copies dropped
+    assert len({a["url"] for a in articles}) == 225
+
+    _StubNewsAPI.requests.clear()
+    again = NewsService(_settings(stub_url, tmp_path))
+    assert asyncio.run(again.fetch_news("AAPL", "2024-01-01", "2024-01-03", max_articles=50)) == articles[:50]
+    assert _StubNewsAPI.requests == []
+
+
+def test_rate_limit_is_retried(stub_url, tmp_path):
+    _StubNewsAPI.rate_limit_next = 2
+    svc = NewsService(_settings(stub_url, tmp_path))
+    articles = asyncio.run(svc.fetch_news("MSFT", "2024-01-01", "2024-01-03"))
+    assert len(articles) == 18 and len(_StubNewsAPI.requests) == 3
+
+
+def test_dedupe_by_url_or_title():
+    articles = [
+        {"title": "Fed holds rates", "url": "https://a.com/x?ref=1"},
+        {"title": "Different title", "url": "http://www.a.com/x/"},
+        {"title": "  fed HOLDS rates ", "url": "https://b.com/y"},
+        {"title": "Other", "url": ""},
+    ]
+    assert [a["title"] for a in dedupe_articles(articles)] == ["Fed holds rates", "Other"]
@@ -0,0 +1,155 @@
+"""Strategy optimizer tests."""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.services.feature_engineering import TechnicalFeatures
+from app.services.optimizer import StrategyOptimizer, apply_parameters, build_search_space, extract_parameters
+
+STRATEGY = {
+    "entry_rules": ["RSI < 30 and sentiment_score > 0.4", "macd_diff > 0"],
+    "exit_rules": ["rsi > 70"],
+    "stop_loss": 0.02,
+    "take_profit": 0.05,
+    "asset_allocation": {"max_position_size": 0.2},
+}
+
+
+def _data(n: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    df = pd.DataFrame(
+        {"close": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), "volume": 1e6},
+        index=pd.date_range("2020-01-01", periods=n, freq="B"),
+    )
+    return TechnicalFeatures.calculate_all_features(df)
+
+
+def test_extract_and_apply_parameters():
+    specs = extract_parameters(STRATEGY)
+    keys = [s.key for s in specs]
+    # macd_diff > 0 is a sign test and is not tuned
+    assert keys == ["entry_rules[0]#0", "entry_rules[0]#1", "exit_rules[0]#0", "stop_loss", "take_profit", "max_position_size"]
+    out = apply_parameters(STRATEGY, specs, {"entry_rules[0]#0": 25.0, "entry_rules[0]#1": 0.55, "max_position_size": 0.3})
+    assert out["entry_rules"][0] == "RSI < 25 and sentiment_score > 0.55"
+    assert out["asset_allocation"]["max_position_size"] == 0.3
+    assert STRATEGY["entry_rules"][0] == "RSI < 30 and sentiment_score > 0.4"
+
+
+def test_search_space_falls_back_to_random_when_grid_too_large():
+    specs = extract_parameters(STRATEGY)
+    space = build_search_space(specs, "grid", steps=5, max_candidates=50, seed=1)
+    assert len(space) == 50
+    assert space[0] == {s.key: s.value for s in specs}
+    assert space == build_search_space(specs, "grid", steps=5, max_candidates=50, seed=1)
+
+
+def test_optimize_returns_best_by_target_metric():
+    result = StrategyOptimizer(_data()).optimize(STRATEGY, method="random", max_candidates=20, seed=3)
+    assert result["evaluated"] == 20 and not result["cancelled"]
+    sharpes = [r["metrics"]["sharpe_ratio"] for r in result["results"]]
+    assert result["best_metrics"]["sharpe_ratio"] == max(sharpes)
+    assert result["best_metrics"]["sharpe_ratio"] >= result["baseline_metrics"]["sharpe_ratio"]
+
+
+def test_optimize_reports_each_chunk():
+    seen = []
+    result = StrategyOptimizer(_data(), chunk_size=8).optimize(
+        STRATEGY, method="random", max_candidates=20, seed=3, on_result=lambda *a: seen.append(a)
+    )
+    assert [(evaluated, total) for _, evaluated, total in seen] == [(8, 20), (16, 20), (20, 20)]
+    streamed = sorted((r for rows, _, _ in seen for r in rows), key=lambda r: r["candidate"])
+    assert streamed == sorted(result["results"], key=lambda r: r["candidate"])
+
+
+def test_optimize_stops_when_cancelled():
+    cancel = threading.Event()
+    cancel.set()
+    result = StrategyOptimizer(_data()).optimize(STRATEGY, max_candidates=20, cancel_event=cancel)
+    assert result["cancelled"] and result["evaluated"] == 0
+    assert result["optimized_strategy"] == STRATEGY
+
+
+def test_walk_forward_windows_and_stitched_out_of_sample():
+    from app.services.walk_forward import WalkForwardAnalyzer, walk_forward_windows
+
+    rolling = walk_forward_windows(100, train_bars=40, test_bars=20)
+    assert [(w[0].start, w[0].stop, w[1].start, w[1].stop) for w in rolling] == [(0, 40, 40, 60), (20, 60, 60, 80), (40, 80, 80, 100)]
+    anchored = walk_forward_windows(100, train_bars=40, test_bars=20, anchored=True)
+    assert [w[0].start for w in anchored] == [0, 0, 0]
+
+    result = WalkForwardAnalyzer(_data(300)).run(
+        STRATEGY, train_bars=120, test_bars=60, method="random", max_candidates=8, seed=2
+    )
+    assert result["completed_folds"] == result["total_folds"] == 3
+    # One starting bar plus each test window after its first bar
+    assert len(result["out_of_sample_equity_curve"]) == 1 + 3 * 59
+    assert result["out_of_sample_metrics"]["total_trades"] == sum(f["out_of_sample"]["total_trades"] for f in result["folds"])
+
+
+def test_optimize_in_process_pool_matches_in_thread():
+    serial = StrategyOptimizer(_data()).optimize(STRATEGY, method="random", max_candidates=12, seed=4)
+    pooled = StrategyOptimizer(_data(), max_workers=2, chunk_size=4).optimize(
+        STRATEGY, method="random", max_candidates=12, seed=4
+    )
+    assert pooled["evaluated"] == 12 and not pooled["cancelled"]
+    assert pooled["best_params"] == serial["best_params"]
+
+
+def test_apply_parameters_with_non_ascii_rule_text():
+    strategy = {"entry_rules": ["RSI < 30 AND 'İé' != 'x' AND volume_ratio > 1.5"], "exit_rules": []}
+    specs = extract_parameters(strategy)
+    out = apply_parameters(strategy, specs, {specs[0].key: 25.0, specs[1].key: 2.0})
+    assert out["entry_rules"][0] == "RSI < 25 AND 'İé' != 'x' AND volume_ratio > 2"
+
+
+def test_walk_forward_in_process_pool_and_budget():
+    from app.services.walk_forward import WalkForwardAnalyzer
+
+    analyzer = WalkForwardAnalyzer(_data(300), max_workers=2)
+    result = analyzer.run(STRATEGY, train_bars=120, test_bars=60, method="random", max_candidates=8, seed=2)
+    assert result["completed_folds"] == 3 and not result["cancelled"]
+    expired = analyzer.run(STRATEGY, train_bars=120, test_bars=60, max_candidates=8, time_budget_s=0)
+    assert expired["cancelled"] and expired["completed_folds"] == 0
+
+
+def test_concurrent_inline_sweeps_keep_their_own_data():
+    frames = [_data(), _data().iloc[::-1].set_axis(_data().index)]
+    expected = [
+        StrategyOptimizer(df).optimize(STRATEGY, method="random", max_candidates=30, seed=1)["results"]
+        for df in frames
+    ]
+    got = [None, None]
+
+    def _sweep(i):
+        got[i] = StrategyOptimizer(frames[i], chunk_size=1).optimize(
+            STRATEGY, method="random", max_candidates=30, seed=1
+        )["results"]
+
+    threads = [threading.Thread(target=_sweep, args=(i,)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert got == expected
+
+
+def test_inline_walk_forward_leaves_worker_globals_alone():
+    from app.services import optimizer, walk_forward
+    from app.services.walk_forward import WalkForwardAnalyzer
+
+    WalkForwardAnalyzer(_data(300)).run(STRATEGY, train_bars=120, test_bars=60, method="random", max_candidates=4)
+    assert not walk_forward._FOLD_WORKER and not optimizer._WORKER
+
+
+def test_invalid_strategies_are_rejected_before_sweeping():
+    import pytest
+
+    for strategy in (
+        {**STRATEGY, "stop_loss": "abc"},
+        {**STRATEGY, "entry_rules": ["foo(1) > 0"]},
+        {**STRATEGY, "exit_rules": [3]},
+        {**STRATEGY, "entry_rules": []},
+    ):
+        with pytest.raises(ValueError):
+            StrategyOptimizer(_data()).optimize(strategy, max_candidates=4)
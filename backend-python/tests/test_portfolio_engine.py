@@ -0,0 +1,95 @@
+"""Portfolio backtest engine tests."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.feature_engineering import TechnicalFeatures
+from app.services.portfolio_engine import PortfolioBacktestEngine
+
+
+def _panel(n_bars: int = 300, n_symbols: int = 6) -> dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(11)
+    dates = pd.date_range("2020-01-01", periods=n_bars, freq="B")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_bars, n_symbols)), axis=0))
+    return {
+        f"SYM{i}": pd.DataFrame({"Close": close[:, i], "Volume": rng.uniform(1e5, 1e6, n_bars)}, index=dates)
+        for i in range(n_symbols)
+    }
+
+
+def test_panel_features_match_single_symbol_features():
+    panel = _panel()
+    close = pd.DataFrame({s: df["Close"] for s, df in panel.items()})
+    volume = pd.DataFrame({s: df["Volume"] for s, df in panel.items()})
+    close.iloc[:40, 1] = np.nan  # late listing
+    volume.iloc[:40, 1] = np.nan
+    features = TechnicalFeatures.calculate_panel_features(close, volume)
+    for sym in ("SYM0", "SYM1"):
+        single = TechnicalFeatures.calculate_all_features(
+            pd.DataFrame({"close": close[sym], "volume": volume[sym]}).dropna()
+        )
+        for col in ("rsi", "macd_diff", "sma_50", "bb_low", "volume_ratio"):
+            np.testing.assert_allclose(features[col][sym].reindex(single.index), single[col], equal_nan=True)
+
+
+def test_portfolio_respects_position_and_exposure_limits():
+    strategy = {
+        "entry_rules": ["rsi < 45"],
+        "exit_rules": ["rsi > 55"],
+        "stop_loss": 0.05,
+        "take_profit": 0.08,
+        "max_positions": 2,
+        "asset_allocation": {"max_position_size": 0.3, "max_total_exposure": 0.5},
+    }
+    result = PortfolioBacktestEngine(initial_capital=100_000).run_portfolio(strategy, _panel())
+    assert len(result["equity_curve"]) == 300
+    assert result["metrics"]["total_trades"] > 0
+    trades = pd.DataFrame(result["trades"])
+    open_counts = [
+        ((trades["entry_date"] <= d) & (trades["exit_date"] > d)).sum() for d in trades["entry_date"].unique()
+    ]
+    assert max(open_counts) <= 2
+    # 0.3 of equity per position means the 0.5 exposure cap admits only one at a time
+    assert max(result["exposure"]) < 0.5 + 0.1
+
+
+def test_windowed_indicators_in_panel_rules():
+    panel = _panel()
+    close = pd.DataFrame({s: df["Close"] for s, df in panel.items()})
+    close.iloc[:40, 1] = np.nan  # late listing
+    features = TechnicalFeatures.calculate_panel_features(close, indicators=["rsi", "rsi_7", "sma_30"])
+    single = TechnicalFeatures.calculate_features(pd.DataFrame({"close": close["SYM1"]}).dropna(), ["rsi_7", "sma_30"])
+    for col in ("rsi_7", "sma_30"):
+        np.testing.assert_allclose(features[col]["SYM1"].reindex(single.index), single[col], equal_nan=True)
+
+    strategy = {"entry_rules": ["rsi_7 < 40"], "exit_rules": ["rsi_7 > 60"], "max_positions": 6}
+    result = PortfolioBacktestEngine().run_portfolio(strategy, panel)
+    assert result["metrics"]["total_trades"] > 0
+
+
+def test_unaffordable_candidates_do_not_block_later_ones():
+    dates = pd.date_range("2020-01-01", periods=40, freq="B")
+    cheap = np.full(40, 25_000.0)
+    cheap[20:] = 30_000.0  # take-profit closes the position so the trade is recorded
+    panel = {
+        "AAA": pd.DataFrame({"Close": 1e6, "Volume": 1e6}, index=dates),  # not one whole share
+        "BBB": pd.DataFrame({"Close": 10.0, "Volume": 1e6}, index=dates),  # 30k position over the 28k budget
+        "CCC": pd.DataFrame({"Close": cheap, "Volume": 1e6}, index=dates),  # one share for 25k fits
+    }
+    strategy = {
+        "entry_rules": ["rsi < 101"],
+        "exit_rules": ["rsi > 101"],
+        "take_profit": 0.1,
+        "max_positions": 1,
+        "asset_allocation": {"max_position_size": 0.3, "max_total_exposure": 0.28},
+    }
+    engine = PortfolioBacktestEngine(initial_capital=100_000, commission=0.0, slippage=0.0)
+    result = engine.run_portfolio(strategy, panel)
+    assert {t["symbol"] for t in result["trades"]} == {"CCC"}
+    assert pd.Timestamp(result["trades"][0]["entry_date"]) == dates[1]
+
+
+def test_max_positions_must_be_positive():
+    strategy = {"entry_rules": ["rsi < 45"], "exit_rules": ["rsi > 55"], "max_positions": 0}
+    with pytest.raises(ValueError, match="max_positions"):
+        PortfolioBacktestEngine().run_portfolio(strategy, _panel(n_bars=60, n_symbols=2))
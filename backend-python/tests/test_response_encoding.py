@@ -0,0 +1,64 @@
+"""Response encoding: LTTB downsampling, Arrow IPC round trip, content negotiation."""
+import json
+
+import numpy as np
+import pyarrow as pa
+
+from app.services.response_encoding import (
+    ARROW_STREAM,
+    decode_arrow,
+    downsample_series,
+    encode_response,
+    lttb_indices,
+)
+
+
+def _payload(n=5000):
+    rng = np.random.default_rng(0)
+    equity = (100_000 * np.cumprod(1 + rng.normal(0, 0.01, n))).tolist()
+    trades = [{"entry_date": "2024-01-02", "exit_date": "2024-01-09", "pnl": 12.5, "shares": 10}] * 50
+    return {"backtest_id": "x", "metrics": {"sharpe_ratio": 1.1}, "equity_curve": equity, "trades": trades}
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    y = np.zeros(1000)
+    y[337], y[700] = 5.0, -4.0
+    picks = lttb_indices(y, 50)
+    assert len(picks) == 50
+    assert picks[0] == 0 and picks[-1] == 999
+    assert np.all(np.diff(picks) > 0)
+    assert 337 in picks and 700 in picks
+    assert len(lttb_indices(y, 5000)) == 1000
+
+
+def test_downsample_series_adds_bar_index():
+    payload = {"equity_curve": list(range(100)), "exposure": [0.5] * 100, "trades": []}
+    out = downsample_series(payload, ("equity_curve", "exposure"), 10)
+    assert len(out["equity_curve"]) == len(out["exposure"]) == len(out["equity_curve_index"]) == 10
+    assert out["equity_curve"] == [float(i) for i in out["equity_curve_index"]]
+    assert downsample_series(payload, ("equity_curve",), None) is payload
+
+
+def test_default_response_is_plain_json():
+    payload = _payload(100)
+    response = encode_response(payload, accept="*/*", accept_encoding="gzip")
+    assert response.media_type == "application/json"
+    assert "content-encoding" not in response.headers
+    assert json.loads(response.body) == payload
+
+
+def test_arrow_round_trip_and_zstd():
+    payload = _payload()
+    json_size = len(encode_response(payload).body)
+    response = encode_response(payload, accept=ARROW_STREAM)
+    assert response.media_type == ARROW_STREAM
+    assert len(response.body) < json_size / 2
+    decoded = decode_arrow(response.body)
+    assert decoded["metrics"] == payload["metrics"] and decoded["trades"] == payload["trades"]
+    np.testing.assert_allclose(decoded["equity_curve"], payload["equity_curve"], rtol=1e-6)
+
+    compressed = encode_response(payload, accept_encoding="gzip, zstd")
+    assert compressed.headers["content-encoding"] == "zstd"
+    raw = pa.Codec("zstd").decompress(compressed.body, decompressed_size=json_size, asbytes=True)
+    assert json.loads(raw) == payload
+    assert "content-encoding" not in encode_response(payload, accept_encoding="zstd;q=0").headers
@@ -0,0 +1,55 @@
+"""Rule compiler tests."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.rule_compiler import RuleCompileError, compile_rule, evaluate_rule_row, rules_mask
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "rsi": [25.0, np.nan, 75.0, 40.0],
+            "macd_diff": [0.5, -0.2, np.nan, 0.1],
+            "volume_ratio": [1.5, 0.0, 2.0, 0.8],
+            "sentiment": [0.7, np.nan, 0.2, 0.9],
+        }
+    )
+
+
+def test_rules_mask_or_of_rules_with_nan_defaults():
+    data = _frame()
+    mask = rules_mask(["rsi < 30 and sentiment_score > 0.6", "RSI > 70 OR sentiment_score < 0.3"], data)
+    assert mask.tolist() == [True, False, True, False]
+    # NaN rsi -> 50, NaN sentiment -> 0.5, NaN macd_diff -> 0
+    assert rules_mask(["rsi == 50 and sentiment_score == 0.5"], data).tolist() == [False, True, False, False]
+    assert rules_mask(["macd_diff == 0"], data).tolist() == [False, False, True, False]
+
+
+def test_row_evaluation_matches_mask():
+    data = _frame()
+    rule = "macd_diff / volume_ratio > 0.1"
+    mask = rules_mask([rule], data)
+    assert mask.tolist() == [evaluate_rule_row(rule, data.iloc[i]) for i in range(len(data))]
+    # Division by zero is false, as it was under eval
+    assert not mask[1]
+
+
+def test_unsupported_rules_are_rejected_and_never_match():
+    with pytest.raises(RuleCompileError):
+        compile_rule("__import__('os').system('true')")
+    with pytest.raises(RuleCompileError):
+        compile_rule("close > 100")
+    assert not rules_mask(["__import__('os')", "rsi <"], _frame()).any()
+
+
+def test_compiled_rules_are_cached_by_text():
+    assert compile_rule("rsi < 30") is compile_rule("rsi < 30")
+
+
+def test_non_string_rules_are_rejected_and_never_match():
+    for rule in (3, ["rsi < 30"], {"rsi": 30}):
+        with pytest.raises(RuleCompileError):
+            compile_rule(rule)
+    assert rules_mask([3, ["rsi < 30"], {"rsi": 30}], _frame()).tolist() == [False] * 4
+    assert rules_mask([3, "rsi < 30"], _frame()).tolist() == [True, False, False, False]
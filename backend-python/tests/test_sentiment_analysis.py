@@ -0,0 +1,45 @@
+"""Sentiment batching plan and result cache (rule-based scorer; FinBERT is optional)."""
+from app.services.sentiment_analysis import FinancialSentimentAnalyzer, LexiconScorer, plan_batches
+
+
+def test_plan_batches_respects_size_and_token_budget():
+    lengths = [10, 500, 12, 11, 480, 9, 13]
+    batches = plan_batches(lengths, max_batch_size=3, max_batch_tokens=1000)
+    assert sorted(i for b in batches for i in b) == list(range(len(lengths)))
+    for b in batches:
+        assert len(b) <= 3
+        assert len(b) == 1 or max(lengths[i] for i in b) * len(b) <= 1000
+    # Short texts are grouped together, away from the long ones
+    assert sorted(batches[0]) == [0, 3, 5]
+
+
+def test_analyze_batch_scores_each_distinct_text_once():
+    analyzer = FinancialSentimentAnalyzer(cache_size=100)
+    texts = ["Shares surge on profit beat", "Guidance cut, stock falls", "Shares surge on profit beat"]
+    first = analyzer.analyze_batch(texts)
+    assert first[0] == first[2] and first[0]["compound"] > 0 > first[1]["compound"]
+    assert analyzer.cache.info()["size"] == 2
+
+    again = analyzer.aggregate_news_sentiment([{"title": "Shares surge on profit beat", "description": ""}])
+    assert again["article_count"] == 1
+    analyzer.analyze_batch(texts)
+    assert analyzer.cache.stats["hits"] == 3
+
+
+def test_lexicon_matches_whole_words_and_phrases():
+    scorer = LexiconScorer()
+    # "execute" / "enterprise" no longer count as "cut" / "rise"
+    assert scorer.masses(["Enterprise unit to execute plan"]).tolist() == [[0.0, 0.0]]
+    # The phrase wins over its first word, and weights add up
+    assert scorer.masses(["Company misses estimates, stock plunges"]).tolist() == [[0.0, 2.5]]
+    assert scorer.compound(["Shares surge", "Shares fall", "Flat day"]).round(3).tolist() == [1.0, -1.0, 0.0]
+
+
+def test_custom_lexicon_is_pluggable(tmp_path):
+    path = tmp_path / "lexicon.json"
+    path.write_text('{"Guidance Raised": 2, "halted": -1}')
+    scorer = LexiconScorer.from_file(str(path))
+    assert scorer.masses(["Trading halted; guidance  raised"]).tolist() == [[2.0, 1.0]]
+    analyzer = FinancialSentimentAnalyzer(lexicon=scorer)
+    assert analyzer.scorer == scorer.name != LexiconScorer().name
+    assert analyzer.analyze_sentiment("surge")["compound"] == 0.0
@@ -0,0 +1,82 @@
+"""Daily sentiment pipeline: incremental fetch/score/persist and bar alignment."""
+import asyncio
+import threading
+
+import pandas as pd
+
+from app.config import Settings
+from app.services.ohlcv_store import OHLCVStore
+from app.services.sentiment_analysis import FinancialSentimentAnalyzer
+from app.services.sentiment_history import SentimentHistoryService, bar_sentiment
+
+
+class _DailyNews:
+    def __init__(self, fail_on: set[str] = frozenset()) -> None:
+        self.settings = Settings(news_api_key="test")
+        self.fail_on = set(fail_on)
+        self.calls: list[str] = []
+
+    async def fetch_news(self, query, from_date, to_date, page_size=20):
+        self.calls.append(from_date)
+        if from_date in self.fail_on:
+            raise RuntimeError("rate limited")
+        if pd.Timestamp(from_date).dayofweek == 0:
+            return [{"title": f"{query} shares surge", "description": "profit beat"}]
+        if pd.Timestamp(from_date).dayofweek == 2:
+            return [{"title": f"{query} shares plunge", "description": ""}]
+        return []
+
+
+def _service(tmp_path, news):
+    return SentimentHistoryService(FinancialSentimentAnalyzer(), news=news, store=OHLCVStore(tmp_path))
+
+
+def test_daily_series_is_persisted_and_only_new_days_fetched(tmp_path):
+    news = _DailyNews()
+    svc = _service(tmp_path, news)
+    daily = asyncio.run(svc.daily_sentiment("AAPL", "2024-01-01", "2024-01-15"))
+    assert len(news.calls) == 14 and len(daily) == 14
+    assert daily.loc["2024-01-01", "sentiment"] > 0.99  # Monday: all positive
+    assert daily.loc["2024-01-03", "sentiment"] < 0.01  # Wednesday: all negative
+    assert pd.isna(daily.loc["2024-01-02", "sentiment"]) and daily.loc["2024-01-02", "article_count"] == 0
+
+    news.calls.clear()
+    again = _service(tmp_path, news)
+    daily = asyncio.run(again.daily_sentiment("AAPL", "2023-12-28", "2024-01-20"))
+    assert sorted(news.calls) == ["2023-12-28", "2023-12-29", "2023-12-30", "2023-12-31",
+                                  "2024-01-15", "2024-01-16", "2024-01-17", "2024-01-18", "2024-01-19"]
+    assert len(daily) == 23
+
+
+def test_failed_day_ends_coverage_and_is_retried(tmp_path):
+    news = _DailyNews(fail_on={"2024-01-05"})
+    asyncio.run(_service(tmp_path, news).daily_sentiment("MSFT", "2024-01-01", "2024-01-10"))
+    news.fail_on.clear()
+    news.calls.clear()
+    asyncio.run(_service(tmp_path, news).daily_sentiment("MSFT", "2024-01-01", "2024-01-10"))
+    assert news.calls == ["2024-01-05", "2024-01-06", "2024-01-07", "2024-01-08", "2024-01-09"]
+
+
+
+def test_store_calls_stay_off_the_event_loop(tmp_path, monkeypatch):
+    svc = _service(tmp_path, _DailyNews())
+    threads = []
+    read, write = svc.store.read, svc.store.write
+    monkeypatch.setattr(svc.store, "read", lambda *a: threads.append(threading.get_ident()) or read(*a))
+    monkeypatch.setattr(svc.store, "write", lambda *a: threads.append(threading.get_ident()) or write(*a))
+
+    async def _run():
+        await svc.daily_sentiment("AAPL", "2024-01-01", "2024-01-05")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(_run())
+    assert len(threads) == 2 and loop_thread not in threads
+
+def test_bar_sentiment_uses_prior_days_news_and_carries_forward():
+    daily = pd.DataFrame(
+        {"sentiment": [0.9, None, 0.2], "article_count": [3, 0, 1]},
+        index=pd.to_datetime(["2024-01-05", "2024-01-06", "2024-01-08"]),
+    )
+    bars = pd.to_datetime(["2024-01-05", "2024-01-08", "2024-01-09"])
+    aligned = bar_sentiment(daily, bars)["sentiment"].tolist()
+    assert aligned == [0.5, 0.9, 0.2]
@@ -0,0 +1,50 @@
+"""Bulk signal scanner tests (market data comes from an in-memory frame)."""
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from app.config import Settings
+from app.services.signal_scanner import SignalScanner
+from app.services.streaming_indicators import IndicatorStreams
+
+
+class _FrameMarketData:
+    def __init__(self, frame: pd.DataFrame) -> None:
+        self.frame = frame
+        self.calls: list[str] = []
+
+    async def fetch_ohlcv_frame(self, symbol, start_date, end_date, interval="1d"):
+        self.calls.append(symbol)
+        return self.frame
+
+
+def test_scan_groups_by_symbol_and_emits_only_transitions():
+    close = np.linspace(100, 130, 60)
+    frame = pd.DataFrame({"close": close, "volume": 1e6}, index=pd.date_range("2024-01-01", periods=60, freq="B"))
+    market = _FrameMarketData(frame)
+    scanner = SignalScanner(
+        concurrency=2, market_svc=market, streams=IndicatorStreams(), settings=Settings(smtp_host=None),
+    )
+    always = {"name": "Always", "entry_rules": ["sma_20 > 0"], "exit_rules": ["sma_20 < 0"]}
+    trend = {"name": "Trend", "entry_rules": ["sma_20 > sma_50"], "exit_rules": ["rsi_7 > 101"]}
+    scanner.subscribe(always, ["aapl", "MSFT"])
+    sub = scanner.subscribe(trend, ["AAPL"])
+    seen = []
+    scanner.listeners.append(seen.append)
+
+    stats, events = asyncio.run(scanner.scan_once())
+    assert sorted(market.calls) == ["AAPL", "MSFT"]
+    assert stats.symbols == 2 and stats.evaluations == 3 and stats.errors == 0
+    assert sorted((e.strategy_name, e.symbol, e.kind) for e in events) == [
+        ("Always", "AAPL", "entry"), ("Always", "MSFT", "entry"), ("Trend", "AAPL", "entry"),
+    ]
+    assert seen == events
+
+    # Conditions still hold on the next cycle, so nothing new is emitted
+    stats, events = asyncio.run(scanner.scan_once())
+    assert events == [] and stats.evaluations == 3
+    assert len(scanner.cycles) == 2 and not scanner.cycles[-1].overran
+
+    assert scanner.unsubscribe(sub.subscription_id)
+    assert scanner.status()["symbols"] == 2 and scanner.status()["subscriptions"] == 1
@@ -0,0 +1,135 @@
+"""Strategy generation: LLM answer cache, concurrent candidates, validation, ranking and budget."""
+import asyncio
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.config import Settings
+from app.services.backtest_engine import BacktestCancelled
+from app.services.cache import SharedCache
+from app.services.feature_engineering import TechnicalFeatures
+from app.services import strategy_generator
+from app.services.strategy_generator import StrategyGenerator, _rank_scores
+
+GOOD = {"name": "Good", "entry_rules": ["rsi < 45"], "exit_rules": ["rsi > 55"], "stop_loss": 0.05}
+NEVER = {"name": "Never", "entry_rules": ["rsi < -1"], "exit_rules": ["rsi > 101"]}
+
+
+class _KnowledgeBase:
+    def retrieve_similar_strategies(self, context, k=5):
+        return []
+
+
+class _Chain:
+    """Stands in for prompt | llm | parser: hands out ``outputs`` in order, after ``delay_s``."""
+
+    def __init__(self, outputs, delay_s=0.0):
+        self.outputs = list(outputs)
+        self.delay_s = delay_s
+        self.calls = 0
+        self.cancelled = 0
+
+    async def ainvoke(self, inputs):
+        output = self.outputs[self.calls % len(self.outputs)]
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay_s)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return output
+
+
+def _data(n: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame(
+        {"close": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), "volume": 1e6},
+        index=pd.date_range("2020-01-01", periods=n, freq="B"),
+    )
+    return TechnicalFeatures.calculate_all_features(df)
+
+
+def _generator(chain: _Chain) -> StrategyGenerator:
+    gen = StrategyGenerator(
+        knowledge_base=_KnowledgeBase(), settings=Settings(anthropic_api_key=None), cache=SharedCache()
+    )
+    gen._chain = chain
+    return gen
+
+
+def _generate(gen: StrategyGenerator, **kwargs):
+    return asyncio.run(gen.agenerate_strategy(_data(), {}, {}, **kwargs))
+
+
+def test_llm_answer_is_cached():
+    chain = _Chain([json.dumps(GOOD)])
+    gen = _generator(chain)
+    first = _generate(gen)
+    second = _generate(gen)
+    assert (first.source, second.source) == ("llm", "cache")
+    assert second.strategy == first.strategy == GOOD
+    assert chain.calls == 1
+
+
+def test_candidates_are_validated_and_invalid_ones_reported():
+    chain = _Chain([f"```json\n{json.dumps(GOOD)}\n```", json.dumps({**GOOD, "entry_rules": ["rsi <"]}), "not json"])
+    result = _generate(_generator(chain), candidates=3)
+    assert chain.calls == 3
+    assert result.source == "llm" and result.strategy == GOOD
+    assert (result.candidates, result.valid_candidates, len(result.errors)) == (3, 1, 2)
+
+
+def test_candidates_ranked_by_backtest_sharpe():
+    scores = _rank_scores([NEVER, GOOD], _data(), threading.Event())
+    assert scores[0] != scores[1]
+    best = [NEVER, GOOD][int(np.argmax(scores))]
+    result = _generate(_generator(_Chain([json.dumps(NEVER), json.dumps(GOOD)])), candidates=2)
+    assert result.strategy == best and result.valid_candidates == 2
+    result = _generate(_generator(_Chain([json.dumps(GOOD), json.dumps(NEVER)])), candidates=2)
+    assert result.strategy == best
+
+
+def test_ranking_failure_falls_back_to_first_valid(monkeypatch):
+    def _broken(*args):
+        raise RuntimeError("A process in the process pool was terminated abruptly")
+
+    monkeypatch.setattr(strategy_generator, "_rank_scores", _broken)
+    result = _generate(_generator(_Chain([json.dumps(NEVER), json.dumps(GOOD)])), candidates=2)
+    assert result.source == "llm" and result.strategy == NEVER
+    assert result.errors == ["Ranking skipped: RuntimeError"]
+
+
+def test_ranking_stops_when_cancelled():
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(BacktestCancelled):
+        _rank_scores([GOOD], _data(), cancel)
+
+
+def test_budget_cancels_pending_llm_calls():
+    chain = _Chain([json.dumps(GOOD)], delay_s=60)
+    result = _generate(_generator(chain), candidates=2, budget_s=0.1)
+    assert result.source == "fallback" and result.elapsed_s < 5
+    assert chain.cancelled == 2
+    assert "cancelled after the 0.1s budget" in result.errors[0]
+
+
+def test_cancelled_request_cancels_llm_calls():
+    chain = _Chain([json.dumps(GOOD)], delay_s=60)
+    gen = _generator(chain)
+
+    async def _run():
+        task = asyncio.ensure_future(gen.agenerate_strategy(_data(), {}, {}, candidates=3, budget_s=30))
+        while chain.calls < 3:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        # Cancelled by agenerate_strategy itself, not by asyncio.run's cleanup
+        return chain.cancelled
+
+    assert asyncio.run(_run()) == 3
@@ -0,0 +1,79 @@
+"""Progress streams: event order, terminal events, cancellation on disconnect."""
+import asyncio
+import json
+import threading
+import time
+
+from fastapi import HTTPException
+
+from app.services.backtest_engine import BacktestCancelled
+from app.services.executors import run_io
+from app.services.streaming import ProgressStream, get_stream
+
+
+def _parse(frame):
+    event, data = frame.strip().split("\n")
+    return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+async def _collect(stream, job):
+    return [_parse(frame) async for frame in stream.events(job)]
+
+
+def test_events_from_worker_thread_arrive_in_order_before_result():
+    async def main():
+        stream = ProgressStream()
+
+        def work():
+            for i in range(5):
+                stream.emit("progress", {"i": i})
+            return {"done": True}
+
+        return stream, await _collect(stream, run_io(work))
+
+    stream, events = asyncio.run(main())
+    assert events[0] == ("started", {"stream_id": stream.stream_id})
+    assert events[1:6] == [("progress", {"i": i}) for i in range(5)]
+    assert events[-1] == ("result", {"done": True})
+    assert get_stream(stream.stream_id) is None
+
+
+def test_terminal_events_for_cancel_and_errors():
+    async def main():
+        async def cancelled():
+            raise BacktestCancelled()
+
+        async def bad_request():
+            raise HTTPException(status_code=400, detail="No market data")
+
+        return (
+            (await _collect(ProgressStream(), cancelled()))[-1],
+            (await _collect(ProgressStream(), bad_request()))[-1],
+        )
+
+    cancelled, error = asyncio.run(main())
+    assert cancelled[0] == "cancelled"
+    assert error == ("error", {"status_code": 400, "detail": "No market data"})
+
+
+def test_disconnect_sets_cancel_event_for_the_worker():
+    stopped = threading.Event()
+
+    async def main():
+        stream = ProgressStream()
+
+        def work():
+            while not stream.cancel_event.is_set():
+                stream.emit("progress", {})
+                time.sleep(0.01)
+            stopped.set()
+
+        events = stream.events(run_io(work))
+        await events.__anext__()  # started
+        await events.__anext__()  # first progress
+        await events.aclose()  # what the server does when the client goes away
+        return stream
+
+    stream = asyncio.run(main())
+    assert stream.cancel_event.is_set()
+    assert stopped.wait(2)
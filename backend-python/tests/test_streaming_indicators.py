@@ -0,0 +1,52 @@
+"""Streaming indicator tests: bar-by-bar state must match the batch features."""
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.services.feature_engineering import TechnicalFeatures
+from app.services.streaming_indicators import STREAM_COLUMNS, IndicatorStreams, StreamingIndicators
+
+
+def _ohlcv(n: int = 600) -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    return pd.DataFrame(
+        {"close": close, "volume": rng.integers(0, 1e6, n).astype(float)},
+        index=pd.date_range("2021-01-01", periods=n, freq="B"),
+    )
+
+
+def test_stream_matches_batch_features():
+    df = _ohlcv()
+    batch = TechnicalFeatures.calculate_all_features(df)
+    stream = StreamingIndicators()
+    rows = [dict(stream.update(c, v, ts)) for ts, c, v in zip(df.index, df["close"], df["volume"])]
+    streamed = pd.DataFrame(rows, index=df.index)
+    for column in STREAM_COLUMNS:
+        np.testing.assert_allclose(
+            streamed[column].to_numpy(), batch[column].to_numpy(), rtol=1e-9, atol=1e-9, equal_nan=True,
+            err_msg=column,
+        )
+    assert stream.previous == rows[-2]
+
+
+def test_revising_the_latest_bar_and_snapshot_restore():
+    df = _ohlcv(200)
+    streams = IndicatorStreams()
+    streams.warm_up("abc", df.iloc[:-1])
+    last_ts = df.index[-1]
+    # A forming bar revised several times ends where a single final update would
+    for price in (10.0, 80.0, df["close"].iloc[-1]):
+        streams.update("ABC", price, df["volume"].iloc[-1], last_ts)
+    expected = StreamingIndicators()
+    expected.warm_up(df)
+    assert streams.get("ABC").bars == 200
+    for column in STREAM_COLUMNS:
+        np.testing.assert_allclose(streams.get("ABC").current[column], expected.current[column], equal_nan=True)
+
+    restored = IndicatorStreams.restore(json.loads(json.dumps(streams.snapshot())))
+    next_ts = last_ts + pd.offsets.BDay()
+    assert restored.update("abc", 55.0, 1000.0, next_ts) == streams.update("abc", 55.0, 1000.0, next_ts)
+    # Bars older than the latest are ignored
+    assert restored.update("abc", 1.0, 1.0, df.index[0])["close"] == 55.0